@@ -1,6 +1,6 @@
 import numpy as np
-import cvxpy as cvx
 import pandas as pd
+from pyfin_frontier import ad_frontier, frontier
 import matplotlib.pyplot as plt
 from matplotlib.font_manager import FontProperties
 import sys
@@ -12,23 +12,9 @@ N = R.shape[1]
 Mu = R.mean().values
 Return_Dev = (R - Mu).values / T
 
-# 平均絶対偏差最小化問題の設定
-Weight = cvx.Variable(N)
-Deviation = cvx.Variable(T)
-Target_Return = cvx.Parameter(nonneg=True)
-Risk_AD = cvx.norm(Deviation, 1)
-Opt_Portfolio = cvx.Problem(cvx.Minimize(Risk_AD),
-                            [Return_Dev * Weight == Deviation,
-                             Weight.T * Mu == Target_Return,
-                             cvx.sum(Weight) == 1.0,
-                             Weight >= 0.0])
-
 # 最小平均絶対偏差フロンティアの計算
 V_Target = np.linspace(Mu.min(), Mu.max(), num=250)
-V_Risk = np.zeros(V_Target.shape)
-for idx, Target_Return.value in enumerate(V_Target):
-    Opt_Portfolio.solve(solver=cvx.ECOS)
-    V_Risk[idx] = Risk_AD.value
+V_Risk = frontier(ad_frontier, R.values, V_Target)
 
 # 最小平均絶対偏差フロンティアのグラフの作成
 fig1 = plt.figure(1, facecolor='w')
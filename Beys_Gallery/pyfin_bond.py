@@ -8,6 +8,7 @@ import matplotlib.pyplot as plt
 import numpy.polynomial.polynomial as pol
 from matplotlib.font_manager import FontProperties
 import sys
+from pyfin_bond_book import Book_Price, Book_Yield
 
 
 # 債券価格の計算
@@ -52,7 +53,7 @@ print([P_A, Y_B])
 #   債券の利回りと価格の関係を示すグラフの作成
 #   残存期間7年，表面利率5%，額面100円の利付債
 V_Yield = np.linspace(0, 12, 41)
-V_Price = np.array([Bond_Price(Yield, 7, 5, 100) for Yield in V_Yield])
+V_Price = Book_Price(V_Yield, 7, 5, 100)
 
 fig1 = plt.figure(num=1, facecolor='w')
 plt.plot(V_Yield, V_Price, 'b-')
@@ -106,8 +107,8 @@ print([P_A, P_B, D_A, D_B, C_A, C_B])
 
 # 債券のデュレーションとコンベクシティの関係を示すグラフの作成
 V_Yield = np.linspace(0, 12, 41)
-V_Price_A = np.array([Bond_Price(Yield, 10, 7, 100) for Yield in V_Yield])
-V_Price_B = np.array([Bond_Price(Yield, 8, 0.9, 100) for Yield in V_Yield])
+V_Price_A = Book_Price(V_Yield, 10, 7, 100)
+V_Price_B = Book_Price(V_Yield, 8, 0.9, 100)
 
 fig3 = plt.figure(num=3, facecolor='w')
 plt.plot(V_Yield, V_Price_A / P_A, 'b-')
@@ -137,8 +138,7 @@ Bond = np.array([
 ])
 F = 100
 #   利付債利回りの計算
-Yield = np.array([Bond_Yield(Bond[idx, 0], Bond[idx, 1], Bond[idx, 2], F)
-                  for idx in range(0, Bond.shape[0])])
+Yield = Book_Yield(Bond[:, 0], Bond[:, 1], Bond[:, 2], F)
 #   割引債利回りの計算
 P = Bond[:, 0]
 C = F * np.identity(Bond.shape[0]) + np.tril(np.transpose(
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+#%% 債券ブック・キャッシュフロー配列の一括評価
+#   pyfin_bond.py / pyfin_npv_irr.py の Bond_Price, Bond_Yield, Bond_Duration,
+#   Bond_Convexity, NPV, IRR を銘柄の配列に対して一度に計算する．
+#   債券は年1回利払い・残存期間は整数年(銘柄ごとに異なってよい)．
+#   利回りは多項式の根ではなく，デュレーションで初期化したNewton法で求める．
+import time
+import warnings
+import numpy as np
+
+
+def _bond_moments(Yield, Maturity, CouponRate, FaceValue, order=1):
+    # 割引キャッシュフローの 0..order 次モーメント sum t^k CF_t v^t を返す
+    #   銘柄を残存期間順に並べ，時点 t では残存期間が t 以上の銘柄(配列の末尾部分)
+    #   だけをまとめて更新する．計算量は銘柄ごとの残存期間の合計に比例する
+    v, Maturity, CouponRate, FaceValue = np.broadcast_arrays(
+        1.0 / (1.0 + 0.01 * np.asarray(Yield, dtype=float)),
+        np.asarray(Maturity).astype(int), np.asarray(CouponRate, dtype=float),
+        np.asarray(FaceValue, dtype=float))
+    shape = v.shape
+    Order = np.argsort(Maturity.ravel(), kind='stable')
+    M = Maturity.ravel()[Order]
+    v = v.ravel()[Order]
+    Sums = np.zeros((order + 1, M.size))
+    vt = np.ones(M.size)
+    First = np.searchsorted(M, np.arange(1, M.max(initial=0) + 1))
+    for t, s in enumerate(First, start=1):
+        vt[s:] *= v[s:]
+        for k in range(order + 1):
+            Sums[k, s:] += t ** k * vt[s:]
+    # 終了時の vt は v^M ，クーポン分 C sum t^k v^t に額面分 F M^k v^M を加える
+    Coupon = 0.01 * CouponRate.ravel()[Order] * FaceValue.ravel()[Order]
+    Face = FaceValue.ravel()[Order] * vt
+    Moments = np.empty((order + 1, M.size))
+    for k in range(order + 1):
+        Moments[k, Order] = Coupon * Sums[k] + Face * M ** k
+    return Moments.reshape((order + 1,) + shape)
+
+
+def Book_Price(Yield, Maturity, CouponRate, FaceValue=100.0):
+    #      Yield: 債券利回り (%)        (配列可)
+    #   Maturity: 残存期間              (配列可)
+    # CouponRate: 表面利率 (%)          (配列可)
+    #  FaceValue: 額面                  (配列可)
+    #     Output: 債券価格の配列
+    return _bond_moments(Yield, Maturity, CouponRate, FaceValue, order=0)[0]
+
+
+def Book_Duration(Yield, Maturity, CouponRate, FaceValue=100.0):
+    #     Output: (マコーレー)デュレーションの配列
+    M0, M1 = _bond_moments(Yield, Maturity, CouponRate, FaceValue, order=1)
+    return M1 / M0
+
+
+def Book_Convexity(Yield, Maturity, CouponRate, FaceValue=100.0):
+    #     Output: コンベクシティの配列
+    #   Bond_Convexity と同じく (分散 + (1 + D) D) / (1 + y)^2 ，分散 = E[t^2] - D^2
+    M0, M1, M2 = _bond_moments(Yield, Maturity, CouponRate, FaceValue, order=2)
+    Duration = M1 / M0
+    Dispersion = M2 / M0 - Duration ** 2
+    return (Dispersion + (1.0 + Duration) * Duration) \
+        / (1.0 + 0.01 * np.asarray(Yield, dtype=float)) ** 2
+
+
+def Book_Yield(Price, Maturity, CouponRate, FaceValue=100.0, tol=1e-12,
+               max_iter=50):
+    #      Price: 債券価格              (配列可)
+    #     Output: 債券利回り (%) の配列
+    #   初期値は表面利率でのデュレーションによる1次近似
+    #     y0 = c + (P(c) - Price) / (D(c) P(c) / (1 + c))
+    #   以降は収束していない銘柄だけを Newton 法で更新する
+    Price, Maturity, CouponRate, FaceValue = np.broadcast_arrays(
+        np.asarray(Price, dtype=float), np.asarray(Maturity),
+        np.asarray(CouponRate, dtype=float), np.asarray(FaceValue, dtype=float))
+    Shape = Price.shape
+    Price, Maturity = Price.ravel(), Maturity.ravel()
+    CouponRate, FaceValue = CouponRate.ravel(), FaceValue.ravel()
+    Yield = 0.01 * CouponRate
+    Active = np.arange(Price.size)
+    for _ in range(max_iter):
+        y = Yield[Active]
+        M0, M1 = _bond_moments(100.0 * y, Maturity[Active], CouponRate[Active],
+                               FaceValue[Active], order=1)
+        # dP/dy = -sum t CF v^(t+1) = -M1 / (1 + y)
+        Step = (M0 - Price[Active]) / (M1 / (1.0 + y))
+        Yield[Active] = y + Step
+        Active = Active[np.abs(Step) > tol]
+        if Active.size == 0:
+            break
+    else:
+        warnings.warn('Book_Yield: {0} of {1} yields did not converge in {2} '
+                      'iterations'.format(Active.size, Price.size, max_iter),
+                      RuntimeWarning)
+    return 100.0 * Yield.reshape(Shape)
+
+
+def _as_csr(CF):
+    # キャッシュフローを (値, 行の先頭位置) のCSR形式にする
+    #   CF は (銘柄数, 期間数) の0埋め配列，配列のリスト，または (値, indptr)
+    if isinstance(CF, tuple):
+        Values, Indptr = CF
+        return np.asarray(Values, dtype=float), np.asarray(Indptr)
+    if isinstance(CF, list):
+        Lengths = np.array([len(c) for c in CF])
+        return (np.concatenate([np.asarray(c, dtype=float) for c in CF]),
+                np.concatenate(([0], np.cumsum(Lengths))))
+    CF = np.atleast_2d(np.asarray(CF, dtype=float))
+    return CF.ravel(), np.arange(0, CF.size + 1, CF.shape[1])
+
+
+def pad_cash_flows(CF):
+    # 長さの異なるキャッシュフローのリストを0埋めの2次元配列にする
+    Values, Indptr = _as_csr(CF)
+    Lengths = np.diff(Indptr)
+    Padded = np.zeros((Lengths.size, Lengths.max()))
+    Padded[np.arange(Padded.shape[1]) < Lengths[:, None]] = Values
+    return Padded
+
+
+def _npv_moments(Rate, Values, Indptr):
+    # 割引率(小数)ごとの sum CF_t v^t と sum t CF_t v^t
+    Rows = np.repeat(np.arange(Indptr.size - 1), np.diff(Indptr))
+    t = np.arange(Values.size) - Indptr[Rows]
+    PV = Values * (1.0 + Rate[Rows]) ** (-t)
+    n = Indptr.size - 1
+    return (np.bincount(Rows, PV, minlength=n),
+            np.bincount(Rows, t * PV, minlength=n))
+
+
+def Book_NPV(r, CF):
+    #       r: 割引率 (%) (スカラーまたは銘柄ごとの配列)
+    #      CF: キャッシュフロー(0埋めの2次元配列，リスト，または (値, indptr))
+    #  Output: 正味現在価値の配列
+    Values, Indptr = _as_csr(CF)
+    Rate = np.broadcast_to(0.01 * np.asarray(r, dtype=float),
+                           (Indptr.size - 1,))
+    return _npv_moments(Rate, Values, Indptr)[0]
+
+
+def Book_IRR(CF, tol=1e-12, max_iter=100):
+    #      CF: キャッシュフロー(時点0は投資額で負)
+    #  Output: 内部収益率 (%) の配列
+    #   初期値は 受取総額/投資額 をキャッシュフローの平均時点で年率換算した値
+    Values, Indptr = _as_csr(CF)
+    n = Indptr.size - 1
+    Rows = np.repeat(np.arange(n), np.diff(Indptr))
+    t = np.arange(Values.size) - Indptr[Rows]
+    Invest = -np.bincount(Rows, np.where(t == 0, Values, 0.0), minlength=n)
+    Receive = np.bincount(Rows, np.where(t > 0, Values, 0.0), minlength=n)
+    MeanTime = np.bincount(Rows, np.where(t > 0, t * Values, 0.0),
+                           minlength=n) / Receive
+    Rate = (Receive / Invest) ** (1.0 / MeanTime) - 1.0
+    for _ in range(max_iter):
+        M0, M1 = _npv_moments(Rate, Values, Indptr)
+        # dNPV/dr = -sum t CF v^(t+1)
+        Step = M0 / (M1 / (1.0 + Rate))
+        Rate = Rate + Step
+        if np.all(np.abs(Step) < tol):
+            break
+    else:
+        warnings.warn('Book_IRR: {0} of {1} rates did not converge in {2} '
+                      'iterations'.format(np.sum(~(np.abs(Step) < tol)), n,
+                                          max_iter), RuntimeWarning)
+    return 100.0 * Rate
+
+
+if __name__ == '__main__':
+    #%% スカラー版(pyfin_bond.py)との比較
+    print(Book_Price(7, 7, 5, 100), Book_Yield(98, 5, 5, 100))
+    print(Book_Price(5, [10, 8], [7, 0.9]), Book_Duration(5, [10, 8], [7, 0.9]),
+          Book_Convexity(5, [10, 8], [7, 0.9]))
+    V_CF = np.array([[-5.0, 1.5, 1.5, 1.5, 1.5],
+                     [-7.0, 2.0, 2.0, 2.0, 2.0],
+                     [-9.0, 4.0, 3.0, 2.0, 1.0],
+                     [-9.0, 1.0, 2.0, 3.0, 4.0]])
+    print(Book_NPV(5, V_CF), Book_IRR(V_CF))
+
+    #%% 100万銘柄の債券ブック
+    n = 1000000
+    rng = np.random.default_rng(8888)
+    Maturity = rng.integers(1, 31, n)
+    CouponRate = rng.uniform(0.0, 8.0, n)
+    TrueYield = rng.uniform(0.0, 10.0, n)
+    start = time.perf_counter()
+    Price = Book_Price(TrueYield, Maturity, CouponRate)
+    time_price = time.perf_counter() - start
+    start = time.perf_counter()
+    Yield = Book_Yield(Price, Maturity, CouponRate)
+    time_yield = time.perf_counter() - start
+    start = time.perf_counter()
+    Duration = Book_Duration(Yield, Maturity, CouponRate)
+    Convexity = Book_Convexity(Yield, Maturity, CouponRate)
+    time_risk = time.perf_counter() - start
+    print('{0} bonds: price {1:.2f}s, yield {2:.2f}s (max error {3:.1e}%), '
+          'duration+convexity {4:.2f}s'.format(
+              n, time_price, time_yield, np.abs(Yield - TrueYield).max(),
+              time_risk))
+    start = time.perf_counter()
+    IRR = Book_IRR([np.r_[-p, np.tile(0.01 * c * 100, m - 1), 100 + c]
+                    for p, m, c in zip(Price[:100000], Maturity[:100000],
+                                       CouponRate[:100000])])
+    print('100000 cash flows IRR {0:.2f}s (max error {1:.1e}%)'.format(
+        time.perf_counter() - start, np.abs(IRR - TrueYield[:100000]).max()))
@@ -8,6 +8,7 @@ import matplotlib.pyplot as plt
 import numpy.polynomial.polynomial as pol
 from matplotlib.font_manager import FontProperties
 import sys
+from pyfin_bond_book import Book_Yield
 
 # 債券利回りの計算
 
@@ -42,8 +43,7 @@ Bond = np.array([
 ])
 F = 100
 #   利付債利回りの計算
-Yield = np.array([Bond_Yield(Bond[idx, 0], Bond[idx, 1], Bond[idx, 2], F)
-                  for idx in range(0, Bond.shape[0])])
+Yield = Book_Yield(Bond[:, 0], Bond[:, 1], Bond[:, 2], F)
 #   割引債利回りの計算
 P = Bond[:, 0]
 C = F * np.identity(Bond.shape[0]) \
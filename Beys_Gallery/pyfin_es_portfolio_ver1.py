@@ -2,9 +2,10 @@
 # %% NumPyの読み込み
 import numpy as np
 #   CVXPYの読み込み
-import cvxpy as cvx
 #   Pandasの読み込み
 import pandas as pd
+#   フロンティア計算エンジン
+from pyfin_frontier import es_frontier, frontier_grid
 #   MatplotlibのPyplotモジュールの読み込み
 import matplotlib.pyplot as plt
 #   日本語フォントの設定
@@ -23,28 +24,11 @@ T = R.shape[0]
 N = R.shape[1]
 Mu = R.mean().values
 Return = R.values / T
-# %% 期待ショートフォール最小化問題の設定
-Weight = cvx.Variable(N)
-Deviation = cvx.Variable(T)
-VaR = cvx.Variable()
-Alpha = cvx.Parameter(nonneg=True)
-Target_Return = cvx.Parameter(nonneg=True)
-Risk_ES = cvx.sum(Deviation) / Alpha - VaR
-Opt_Portfolio = cvx.Problem(cvx.Minimize(Risk_ES),
-                            [Weight.T * Mu == Target_Return,
-                             cvx.sum(Weight) == 1.0,
-                             Weight >= 0.0,
-                             Deviation >= 0.0,
-                             Return * Weight - VaR / T + Deviation >= 0.0])
-# %% 最小ESフロンティアの計算
+# %% 最小ESフロンティアの計算(パラメトリック問題を一度だけ構築して解き直す)
 V_Alpha = np.array([0.05, 0.10, 0.25, 0.50])
 V_Target = np.linspace(Mu.min(), Mu.max(), num=250)
-V_Risk = np.zeros((V_Target.shape[0], V_Alpha.shape[0]))
-for idx_col, Alpha.value in enumerate(V_Alpha):
-    Alpha.value = V_Alpha[idx_col]
-    for idx_row, Target_Return.value in enumerate(V_Target):
-        Opt_Portfolio.solve(solver=cvx.ECOS)
-        V_Risk[idx_row, idx_col] = Risk_ES.value
+V_Risk = frontier_grid(es_frontier, R.values, V_Target,
+                       [{'Alpha': a} for a in V_Alpha])
 # %% 最小ESフロンティアのグラフの作成
 fig1 = plt.figure(1, facecolor='w')
 plt.plot(V_Risk[:, 0], V_Target, 'k-')
@@ -55,7 +39,7 @@ plt.xlabel(u'期待ショートフォール(%)', fontproperties=jpfont)
 plt.ylabel(u'期待収益率(%)', fontproperties=jpfont)
 fig2 = plt.figure(2, facecolor='w')
 LineTypes = ['solid', 'dashed', 'dashdot', 'dotted']
-for idx, Alpha.value in enumerate(V_Alpha):
+for idx in range(V_Alpha.shape[0]):
     plt.plot(V_Risk[:, idx], V_Target, color='k', linestyle=LineTypes[idx])
 plt.legend([u'最小ESフロンティア($\\alpha$={0:4.2f})'.format(a) for a in V_Alpha],
            loc='best', frameon=False, prop=jpfont)
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#%% 二項木(CRR)によるオプション価格の一括計算
+#   pyfin_option.py / pyfin_option_pricing.py の Binomial_Price_Tree,
+#   European_Option_Pricing, American_Option_Pricing は木の全段を配列のリストとして
+#   保持し，1回の計算で1つの利得しか評価しない．ここでは (節点数, 行使価格数) の
+#   バッファ1つの上で後ろ向き帰納法をその場で行い，行使価格の配列をまとめて評価する．
+#   メモリは O(N × 行使価格数) ，Numba があれば行使価格ごとのループをコンパイルする．
+import time
+import numpy as np
+import scipy.stats as st
+
+try:
+    import numba
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+
+def Black_Scholes_Price(S, K, r, v, T, Kind='call'):
+    #       S: 原資産価格
+    #       K: 行使価格 (配列可)
+    #       r: 安全利子率
+    #       v: ボラティリティ
+    #       T: 満期
+    #    Kind: 'call' または 'put'
+    #  Output: ヨーロピアン・オプション価格 (pyfin_black_scholes.py の公式)
+    K = np.asarray(K, dtype=float)
+    d1 = (np.log(S / K) + (r + 0.5 * v ** 2) * T) / (v * np.sqrt(T))
+    d2 = d1 - v * np.sqrt(T)
+    if Kind == 'call':
+        return S * st.norm.cdf(d1) - K * np.exp(-r * T) * st.norm.cdf(d2)
+    return K * np.exp(-r * T) * st.norm.cdf(-d2) - S * st.norm.cdf(-d1)
+
+
+def _lattice_kernel(Premium, Price, K, a, b, u, Sign, American):
+    # 行使価格ごとに1次元バッファ上で後ろ向き帰納法を行う
+    #   V[j] <- a V[j] + b V[j+1] は j の昇順なら未更新の V[j+1] を参照する
+    #   Sign は コール +1 ，プット -1 (アメリカンの行使価値 Sign (S - K))
+    m, N1 = Premium.shape
+    for i in range(m):
+        V = Premium[i]
+        P = Price.copy()
+        for n in range(N1 - 1, 0, -1):
+            for j in range(n):
+                V[j] = a * V[j] + b * V[j + 1]
+            if American:
+                for j in range(n):
+                    P[j] = P[j] / u
+                    Exercise = Sign * (P[j] - K[i])
+                    if Exercise > V[j]:
+                        V[j] = Exercise
+    return Premium
+
+
+if HAVE_NUMBA:
+    _lattice_kernel_jit = numba.njit(cache=True)(_lattice_kernel)
+
+
+def _lattice_numpy(Premium, Price, K, a, b, u, Payoff, American):
+    # (節点数, 行使価格数) の配列のまま1段ずつ更新する
+    #   節点を先頭の軸に置くと各段の Premium[:n] が連続領域になる．Work は
+    #   下隣の項と行使価値の計算に使い回し，段ごとの一時配列を作らない
+    Work = np.empty_like(Premium)
+    Price = Price[:, None].copy()
+    for n in range(Premium.shape[0] - 1, 0, -1):
+        np.multiply(Premium[1:n + 1], b, out=Work[:n])
+        Premium[:n] *= a
+        Premium[:n] += Work[:n]
+        if American:
+            Price[:n] /= u
+            if Payoff == 'call':
+                np.subtract(Price[:n], K, out=Work[:n])
+            elif Payoff == 'put':
+                np.subtract(K, Price[:n], out=Work[:n])
+            else:
+                Work[:n] = Payoff(Price[:n], K)
+            np.maximum(Premium[:n], Work[:n], out=Premium[:n])
+    return Premium
+
+
+def Lattice_Price(S, K, r, v, T, N, Payoff='call', American=False,
+                  use_numba=HAVE_NUMBA):
+    #       S: 原資産価格
+    #       K: 行使価格 (スカラーまたは配列)
+    #       r: 安全利子率
+    #       v: ボラティリティ
+    #       T: 満期
+    #       N: 満期までの期間数
+    #  Payoff: 'call', 'put' ，または利得関数 Payoff(Price, K)
+    #          (Price は (節点数, 1) ，K は (行使価格数,) の配列で放送される)
+    # American: True ならアメリカン・オプション
+    #  Output: K と同じ形のオプション価格
+    #   上昇率 u = exp(v sqrt(T/N)) ，下落率 1/u ，割引係数 exp(-r T/N) は
+    #   pyfin_option.py の二項木と同じ．節点は Binomial_Price_Tree と同じく降順
+    K = np.asarray(K, dtype=float)
+    Shape = K.shape
+    K = np.ascontiguousarray(K.ravel())
+    dt = T / N
+    u = np.exp(v * np.sqrt(dt))
+    d = 1.0 / u
+    f = np.exp(r * dt)
+    q = (f - d) / (u - d)
+    a, b = q / f, (1.0 - q) / f
+    Price = S * u ** (N - 2.0 * np.arange(N + 1))
+    if Payoff == 'call':
+        Premium = np.maximum(Price[:, None] - K, 0.0)
+    elif Payoff == 'put':
+        Premium = np.maximum(K - Price[:, None], 0.0)
+    else:
+        Premium = np.array(np.broadcast_to(Payoff(Price[:, None], K),
+                                           (N + 1, K.size)), dtype=float)
+    if use_numba and HAVE_NUMBA and Payoff in ('call', 'put'):
+        # カーネルは行使価格ごとに連続な (行使価格数, 節点数) の配列を使う
+        Premium = _lattice_kernel_jit(np.ascontiguousarray(Premium.T), Price,
+                                      K, a, b, u,
+                                      1.0 if Payoff == 'call' else -1.0,
+                                      American).T
+    else:
+        _lattice_numpy(Premium, Price, K, a, b, u, Payoff, American)
+    return Premium[0].reshape(Shape)
+
+
+def _tree_price(S, K, r, v, T, N):
+    # pyfin_option.py と同じ木の全段を保持する計算(比較用)
+    from pyfin_option_pricing import (Binomial_Price_Tree,
+                                      European_Option_Pricing)
+    u = np.exp(v * np.sqrt(T / N))
+    d = 1.0 / u
+    f = np.exp(r * T / N)
+    q = (f - d) / (u - d)
+    Price = [P for P in Binomial_Price_Tree(S, u, N)]
+    Payoff_Call = [np.maximum(P - K, 0.0) for P in Price]
+    return [C for C in European_Option_Pricing(Payoff_Call, 1.0 / f, q)][-1].item(0)
+
+
+if __name__ == '__main__':
+    #%% pyfin_black_scholes.py の条件
+    S = 100.0
+    r = 0.01
+    v = 0.20
+    T = 0.50
+    Strikes = np.linspace(80.0, 120.0, 41)
+    BS_Call = Black_Scholes_Price(S, Strikes, r, v, T, 'call')
+    BS_Put = Black_Scholes_Price(S, Strikes, r, v, T, 'put')
+
+    #%% 木の全段を保持する計算との比較 (行使価格1つ)
+    for N in (1000, 3000):
+        start = time.perf_counter()
+        Tree = _tree_price(S, 100.0, r, v, T, N)
+        time_tree = time.perf_counter() - start
+        start = time.perf_counter()
+        Lattice = Lattice_Price(S, 100.0, r, v, T, N, use_numba=False)
+        time_lattice = time.perf_counter() - start
+        print('N={0:5d}: tree {1:.3f}s ({2:.0f}MB), lattice {3:.3f}s, '
+              'diff {4:.1e}'.format(N, time_tree, 3 * 8 * (N + 1) * (N + 2)
+                                    / 2 / 2 ** 20, time_lattice,
+                                    abs(Tree - Lattice)))
+
+    #%% Black-Scholes への収束 (41 行使価格のコールとプット)
+    if HAVE_NUMBA:
+        Lattice_Price(S, Strikes, r, v, T, 10, use_numba=True)
+    print('    N   numpy  numba  max|call-BS|  max|put-BS|')
+    for N in (100, 300, 1000, 3000, 10000):
+        start = time.perf_counter()
+        Call = Lattice_Price(S, Strikes, r, v, T, N, 'call', use_numba=False)
+        time_numpy = time.perf_counter() - start
+        time_numba = np.nan
+        if HAVE_NUMBA:
+            start = time.perf_counter()
+            Call_jit = Lattice_Price(S, Strikes, r, v, T, N, 'call',
+                                     use_numba=True)
+            time_numba = time.perf_counter() - start
+            assert np.allclose(Call, Call_jit, rtol=0.0, atol=1e-10)
+        Put = Lattice_Price(S, Strikes, r, v, T, N, 'put')
+        print('{0:5d} {1:7.3f} {2:6.3f} {3:12.2e} {4:12.2e}'.format(
+            N, time_numpy, time_numba, np.abs(Call - BS_Call).max(),
+            np.abs(Put - BS_Put).max()))
+
+    #%% アメリカン・プット (早期行使プレミアム)
+    N = 3000
+    for use_numba in ([False, True] if HAVE_NUMBA else [False]):
+        start = time.perf_counter()
+        American_Put = Lattice_Price(S, Strikes, r, v, T, N, 'put',
+                                     American=True, use_numba=use_numba)
+        print('American put N={0} numba={1}: {2:.3f}s'.format(
+            N, use_numba, time.perf_counter() - start))
+    print('early exercise premium at K=100:',
+          American_Put[20] - Black_Scholes_Price(S, 100.0, r, v, T, 'put'))
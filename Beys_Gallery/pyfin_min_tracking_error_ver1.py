@@ -1,6 +1,6 @@
 import numpy as np
-import cvxpy as cvx
 import pandas as pd
+from pyfin_frontier import tracking_backtest
 import numpy.linalg as lin
 import scipy.optimize as opt
 import scipy.stats as st
@@ -17,24 +17,10 @@ N = R.shape[1]
 np.random.seed(8888)
 BenchmarkIndex = R.dot(np.tile(1.0 / N, N)) + st.norm(0.0, 3.0).rvs(T)
 
-# トラッキングエラー最小化問題のバックテスト
+# トラッキングエラー最小化問題のバックテスト(窓のデータをパラメータとして解き直す)
 MovingWindow = 96
 BackTesting = T - MovingWindow
-V_Tracking = np.zeros(BackTesting)
-Weight = cvx.Variable(N)
-Error = cvx.Variable(MovingWindow)
-TrackingError = cvx.sum_squares(Error)
-Asset_srT = R / np.sqrt(MovingWindow)
-Index_srT = BenchmarkIndex / np.sqrt(MovingWindow)
-for Month in range(0, BackTesting):
-    Asset = Asset_srT.values[Month:(Month + MovingWindow), :]
-    Index = Index_srT.values[Month:(Month + MovingWindow)]
-    Min_TrackingError = cvx.Problem(cvx.Minimize(TrackingError),
-                                    [Index - Asset * Weight == Error,
-                                     cvx.sum(Weight) == 1.0,
-                                     Weight >= 0.0])
-    Min_TrackingError.solve(solver=cvx.ECOS)
-    V_Tracking[Month] = R.values[Month + MovingWindow, :].dot(Weight.value)
+V_Tracking = tracking_backtest(R.values, BenchmarkIndex.values, MovingWindow)
 
 # バックテストの結果のグラフ
 fig1 = plt.figure(1, facecolor='w')
@@ -2,9 +2,10 @@
 #%% NumPyの読み込み
 import numpy as np
 #   CVXPYの読み込み
-import cvxpy as cvx
 #   Pandasの読み込み
 import pandas as pd
+#   フロンティア計算エンジン
+from pyfin_frontier import variance_frontier, frontier
 #   MatplotlibのPyplotモジュールの読み込み
 import matplotlib.pyplot as plt
 #   日本語フォントの設定
@@ -24,22 +25,9 @@ N = R.shape[1]
 Mu = R.mean().values
 Sigma = R.cov().values * ((T - 1.0) / T)
 Return_Dev = (R - Mu).values / np.sqrt(T)
-#%% 空売り制約の下での分散最小化問題の設定
-Weight = cvx.Variable(N)
-Deviation = cvx.Variable(T)
-Target_Return = cvx.Parameter(nonneg=True)
-Risk_Variance = cvx.sum_squares(Deviation)
-Opt_Portfolio = cvx.Problem(cvx.Minimize(Risk_Variance),
-                            [Return_Dev*Weight == Deviation,
-                             Weight.T*Mu == Target_Return,
-                             cvx.sum(Weight) == 1.0,
-                             Weight >= 0.0])
 #%% 空売り制約の下での最小分散フロンティアの計算
 V_Target = np.linspace(Mu.min(), Mu.max(), num=250)
-V_Risk = np.zeros(V_Target.shape)
-for idx, Target_Return.value in enumerate(V_Target):
-    Opt_Portfolio.solve(solver=cvx.ECOS)
-    V_Risk[idx] = np.sqrt(Risk_Variance.value)
+V_Risk = frontier(variance_frontier, R.values, V_Target)
 #%% 最小分散フロンティアのグラフの作成
 fig1 = plt.figure(1, facecolor='w')
 plt.plot(V_Risk, V_Target, 'k-')
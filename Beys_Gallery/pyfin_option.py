@@ -8,6 +8,8 @@
 import numpy as np
 #   SciPyのstatsモジュールの読み込み
 import scipy.stats as st
+#   1次元バッファの二項木 (pyfin_lattice.py)
+from pyfin_lattice import Lattice_Price
 
 
 # In[2]:
@@ -147,13 +149,8 @@ r = 0.05
 v = 0.15
 T = 0.50
 N = 10000
-u = np.exp(v*np.sqrt(T/N))
-d = 1.0/u
-f = np.exp(r*T/N)
-q = (f - d) / (u - d)
-Price = [S for S in Binomial_Price_Tree(S, u, N)]
-Payoff_Call = [np.maximum(S - K, 0.0) for S in Price]
-European_Call = [C for C in European_Option_Pricing(Payoff_Call, 1.0/f, q)][-1].item(0)
+#   全段を保持すると約1.2GBになるため，1次元バッファで後ろ向きに計算する
+European_Call = Lattice_Price(S, K, r, v, T, N, 'call').item(0)
 
 
 # In[15]:
@@ -1,6 +1,6 @@
 import numpy as np
-import cvxpy as cvx
 import pandas as pd
+from pyfin_frontier import semivariance_frontier, frontier
 import numpy.linalg as lin
 import scipy.optimize as opt
 import scipy.stats as st
@@ -16,24 +16,9 @@ N = R.shape[1]
 Mu = R.mean().values
 Return_Dev = (R - Mu).values / np.sqrt(T)
 
-# 下方半分散最小化問題の設定
-Weight = cvx.Variable(N)
-Deviation = cvx.Variable(T)
-Target_Return = cvx.Parameter(nonneg=True)
-Risk_Semivariance = cvx.sum_squares(Deviation)
-Opt_Portfolio = cvx.Problem(cvx.Minimize(Risk_Semivariance),
-                            [Weight.T * Mu == Target_Return,
-                             cvx.sum(Weight) == 1.0,
-                             Weight >= 0.0,
-                             Deviation >= 0.0,
-                             Return_Dev * Weight + Deviation >= 0.0])
-
 # 最小下方半分散フロンティアの計算
 V_Target = np.linspace(Mu.min(), Mu.max(), num=250)
-V_Risk = np.zeros(V_Target.shape)
-for idx, Target_Return.value in enumerate(V_Target):
-    Opt_Portfolio.solve(solver=cvx.ECOS)
-    V_Risk[idx] = np.sqrt(Risk_Semivariance.value)
+V_Risk = frontier(semivariance_frontier, R.values, V_Target)
 
 # 最小下方半分散フロンティアのグラフの作成
 fig1 = plt.figure(1, facecolor='w')
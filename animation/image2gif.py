@@ -70,6 +70,11 @@ try:
 except ImportError:
     np = None
 
+try:
+    import numba
+except ImportError:
+    numba = None
+
 
 def get_cKDTree():
     try:
@@ -346,11 +351,14 @@ class GifWriter:
         #    (time.time()-t0, len(ims2)) )
         return ims2, xy
 
-    def convertImagesToPIL(self, images, dither, nq=0, images_info=None):
-        """ convertImagesToPIL(images, nq=0)
+    def convertImagesToPIL(self, images, dither, nq=0, images_info=None,
+                           sharedPalette=False):
+        """ convertImagesToPIL(images, nq=0, sharedPalette=False)
 
         Convert images to Paletted PIL images, which can then be 
-        written to a single animated GIF.
+        written to a single animated GIF. If sharedPalette is True, one
+        palette is learned (with BatchNeuQuant) from a sample of all
+        images and used for every frame.
 
         """
 
@@ -372,21 +380,27 @@ class GifWriter:
 
         # Convert to paletted PIL images
         images, images2 = images2, []
-        if nq >= 1:
-            # NeuQuant algorithm
+        if nq >= 1 or sharedPalette:
+            # NeuQuant algorithm, learned per image or once for all images
+            samplefac = int(nq) if nq >= 1 else 10
+            if sharedPalette:
+                nqShared = BatchNeuQuant(images, samplefac, colors=255)
             for im in images:
                 im = im.convert("RGBA")  # NQ assumes RGBA
-                nqInstance = NeuQuant(im, int(nq))  # Learn colors from image
+                alpha = im.split()[3]
+                if sharedPalette:
+                    nqInstance = nqShared
+                else:
+                    nqInstance = BatchNeuQuant(im, samplefac, colors=255)
                 if dither:
                     im = im.convert("RGB").quantize(
                         palette=nqInstance.paletteImage(), colors=255)
                 else:
                     # Use to quantize the image itself
-                    im = nqInstance.quantize(im, colors=255)
+                    im = nqInstance.quantize(im)
 
                 self.transparency = True  # since NQ assumes transparency
                 if self.transparency:
-                    alpha = im.split()[3]
                     mask = Image.eval(alpha, lambda a: 255 if a <= 128 else 0)
                     im.paste(255, mask=mask)
                 images2.append(im)
@@ -406,6 +420,72 @@ class GifWriter:
         # Done
         return images2
 
+    def getPalette(self, im):
+        """ getPalette(im)
+
+        The color table of a paletted PIL image, as 768 bytes.
+
+        """
+        palette = getheader(im)[0][3]
+        # Recent PIL versions truncate the palette to the colors used,
+        # while the descriptors always announce 256 colors
+        return palette + b'\x00' * (768 - len(palette))
+
+    def writeHeader(self, fp, im, globalPalette, loops):
+        """ writeHeader(fp, im, globalPalette, loops)
+
+        Write the GIF header, global color table and loop extension.
+
+        """
+        fp.write(self.getheaderAnim(im))
+        fp.write(globalPalette)
+        fp.write(self.getAppExt(loops))
+
+    def writeFrame(self, fp, im, palette, globalPalette, duration, xy, dispose):
+        """ writeFrame(fp, im, palette, globalPalette, duration, xy, dispose)
+
+        Write the control extension, descriptor and LZW-compressed data
+        of one paletted PIL image.
+
+        """
+
+        # Gather info
+        data = getdata(im)
+        imdes, data = data[0], data[1:]
+        # Recent PIL versions return the LZW minimum code size
+        # as a separate chunk
+        if len(imdes) == 10:
+            lzwsize, data = data[0], data[1:]
+        else:
+            imdes, lzwsize = imdes[:10], imdes[10:]
+
+        transparent_flag = 0
+        if self.transparency:
+            transparent_flag = 1
+
+        graphext = self.getGraphicsControlExt(duration, dispose,
+                                              transparent_flag=transparent_flag, transparency_index=255)
+
+        # Make image descriptor suitable for using 256 local color palette
+        lid = self.getImageDescriptor(im, xy)
+
+        # Write local header
+        if (palette != globalPalette) or (dispose != 2):
+            # Use local color palette
+            fp.write(graphext)
+            fp.write(lid)  # write suitable image descriptor
+            fp.write(palette)  # write local color table
+            fp.write(lzwsize)  # LZW minimum size code
+        else:
+            # Use global color palette
+            fp.write(graphext)
+            fp.write(imdes)  # write suitable image descriptor
+            fp.write(lzwsize)
+
+        # Write image data
+        for d in data:
+            fp.write(d)
+
     def writeGifToFile(self, fp, images, durations, loops, xys, disposes):
         """ writeGifToFile(fp, images, durations, loops, xys, disposes)
 
@@ -416,7 +496,7 @@ class GifWriter:
         # Obtain palette for all images and count each occurance
         palettes, occur = [], []
         for im in images:
-            palettes.append(getheader(im)[0][3])
+            palettes.append(self.getPalette(im))
         for palette in palettes:
             occur.append(palettes.count(palette))
 
@@ -425,71 +505,154 @@ class GifWriter:
 
         # Init
         frames = 0
-        firstFrame = True
 
         for im, palette in zip(images, palettes):
 
-            if firstFrame:
-                # Write header
+            if frames == 0:
+                self.writeHeader(fp, im, globalPalette, loops)
 
-                # Gather info
-                header = self.getheaderAnim(im)
-                appext = self.getAppExt(loops)
+            # Write palette and image data
+            self.writeFrame(fp, im, palette, globalPalette, durations[frames],
+                            xys[frames], disposes[frames])
 
-                # Write
-                fp.write(header)
-                fp.write(globalPalette)
-                fp.write(appext)
+            # Prepare for next round
+            frames = frames + 1
 
-                # Next frame is not the first
-                firstFrame = False
+        fp.write(b';')  # end gif
+        return frames
 
-            if True:
-                # Write palette and image data
 
-                # Gather info
-                data = getdata(im)
-                imdes, data = data[0], data[1:]
+class GifStreamWriter(GifWriter):
+    """ GifStreamWriter(filename, duration=0.1, repeat=True, dither=False,
+                        subRectangles=True, quantizer=None)
 
-                transparent_flag = 0
-                if self.transparency:
-                    transparent_flag = 1
+    Write an animated GIF frame by frame, e.g. from a generator. Each
+    frame is compared with the previous one, only the changed bounding
+    box is quantized and its LZW-compressed data is written right away,
+    so at most two frames are held in memory, whatever the length of the
+    animation.
 
-                graphext = self.getGraphicsControlExt(durations[frames],
-                                                      disposes[frames], transparent_flag=transparent_flag, transparency_index=255)
+    Without a quantizer, each frame gets its own adaptive PIL palette.
+    With a quantizer (e.g. a BatchNeuQuant learned on a few sample
+    frames), all frames share its palette.
 
-                # Make image descriptor suitable for using 256 local color palette
-                lid = self.getImageDescriptor(im, xys[frames])
+    Use as a context manager, or call close() at the end:
 
-                # Write local header
-                if (palette != globalPalette) or (disposes[frames] != 2):
-                    # Use local color palette
-                    fp.write(graphext)
-                    fp.write(lid)  # write suitable image descriptor
-                    fp.write(palette)  # write local color table
-                    fp.write(b'\x08')  # LZW minimum size code
-                else:
-                    # Use global color palette
-                    fp.write(graphext)
-                    fp.write(imdes)  # write suitable image descriptor
+        with GifStreamWriter('anim.gif', duration=0.04) as writer:
+            for frame in frames:
+                writer.append(frame)
 
-                # Write image data
-                for d in data:
-                    fp.write(d)
+    """
 
-            # Prepare for next round
-            frames = frames + 1
+    def __init__(self, filename, duration=0.1, repeat=True, dither=False,
+                 subRectangles=True, quantizer=None):
 
-        fp.write(b';')  # end gif
-        return frames
+        # Check PIL
+        if PIL is None:
+            raise RuntimeError("Need PIL to write animated gif files.")
+
+        if repeat is False:
+            self.loops = 1
+        elif repeat is True:
+            self.loops = 0  # 0 means infinite
+        else:
+            self.loops = int(repeat)
+        self.duration = duration
+        self.dither = dither
+        self.subRectangles = subRectangles
+        self.dispose = 1 if subRectangles else 2
+        self.quantizer = quantizer
+        self.transparency = False
+        self.frames = 0
+        self.prev = None
+        self.globalPalette = None
+        self.fp = open(filename, 'wb')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def getChangedBox(self, im):
+        """ getChangedBox(im)
+
+        Bounding box (x0, y0, x1, y1) of the pixels that differ from the
+        previous frame, or a minimal box if nothing changed.
+
+        """
+        changed = im != self.prev
+        if changed.ndim == 3:
+            changed = changed.any(2)
+        rows = np.flatnonzero(changed.any(1))
+        cols = np.flatnonzero(changed.any(0))
+        if rows.size and cols.size:
+            return int(cols[0]), int(rows[0]), int(cols[-1] + 1), int(rows[-1] + 1)
+        return 0, 0, 2, 2  # No change ... make it minimal
+
+    def quantize(self, im):
+        """ quantize(im)
+
+        Convert an RGB or grayscale numpy array to a paletted PIL image.
+
+        """
+        pim = Image.fromarray(im, 'L' if im.ndim == 2 else 'RGB')
+        if self.quantizer is None:
+            return pim.convert('RGB').convert(
+                'P', palette=Image.ADAPTIVE, dither=self.dither, colors=255)
+        if self.dither:
+            return pim.convert('RGB').quantize(
+                palette=self.quantizer.paletteImage(), colors=255)
+        return self.quantizer.quantize(im)
+
+    def append(self, frame):
+        """ append(frame)
+
+        Add a frame (PIL image or numpy array, see writeGif) and write it.
+
+        """
+        if isinstance(frame, Image.Image):
+            im = np.asarray(frame.convert('RGB'))
+        else:
+            im = checkImages([frame])[0]
+            if im.ndim == 3:
+                im = im[:, :, :3]  # No transparency when streaming
+
+        xy = (0, 0)
+        crop = im
+        if self.prev is not None and self.subRectangles:
+            x0, y0, x1, y1 = self.getChangedBox(im)
+            crop, xy = im[y0:y1, x0:x1], (x0, y0)
+        self.prev = im
+
+        pim = self.quantize(np.ascontiguousarray(crop))
+        palette = self.getPalette(pim)
+        if self.frames == 0:
+            self.globalPalette = palette
+            self.writeHeader(self.fp, pim, palette, self.loops)
+        self.writeFrame(self.fp, pim, palette, self.globalPalette,
+                        self.duration, xy, self.dispose)
+        self.frames += 1
+
+    def close(self):
+        """ close()
+
+        Write the trailer and close the file.
+
+        """
+        if self.fp is not None:
+            self.fp.write(b';')  # end gif
+            self.fp.close()
+            self.fp = None
+            self.prev = None
 
 
 # Exposed functions
 
 def writeGif(filename, images, duration=0.1, repeat=True, dither=False,
-             nq=0, subRectangles=True, dispose=None):
+             nq=0, subRectangles=True, dispose=None, sharedPalette=False):
     """ writeGif(filename, images, duration=0.1, repeat=True, dither=False,
-                    nq=0, subRectangles=True, dispose=None)
+                    nq=0, subRectangles=True, dispose=None, sharedPalette=False)
 
     Write an animated gif from the specified images.
 
@@ -527,6 +690,11 @@ def writeGif(filename, images, duration=0.1, repeat=True, dither=False,
         in place. 2 means the background color should be restored after
         each frame. 3 means the decoder should restore the previous frame.
         If subRectangles==False, the default is 2, otherwise it is 1.
+    sharedPalette : bool
+        If True, one palette is learned from a sample of all frames
+        (see BatchNeuQuant, with nq as the sample factor) and reused for
+        every frame. This is the fastest option for long animations, and
+        all frames can use the global color table.
 
     """
 
@@ -578,7 +746,8 @@ def writeGif(filename, images, duration=0.1, repeat=True, dither=False,
         dispose = [dispose for im in images]
 
     # Make images in a format that we can write easy
-    images = gifWriter.convertImagesToPIL(images, dither, nq)
+    images = gifWriter.convertImagesToPIL(images, dither, nq,
+                                          sharedPalette=sharedPalette)
 
     # Write
     fp = open(filename, 'wb')
@@ -588,6 +757,24 @@ def writeGif(filename, images, duration=0.1, repeat=True, dither=False,
         fp.close()
 
 
+def writeGifStream(filename, frames, duration=0.1, repeat=True, dither=False,
+                   subRectangles=True, quantizer=None):
+    """ writeGifStream(filename, frames, duration=0.1, repeat=True,
+                    dither=False, subRectangles=True, quantizer=None)
+
+    Write an animated gif from an iterable (e.g. a generator) of frames,
+    holding at most two frames in memory. See GifStreamWriter.
+
+    Returns the number of frames written.
+
+    """
+    with GifStreamWriter(filename, duration, repeat, dither,
+                         subRectangles, quantizer) as writer:
+        for frame in frames:
+            writer.append(frame)
+    return writer.frames
+
+
 def readGif(filename, asNumpy=True):
     """ readGif(filename, asNumpy=True)
 
@@ -1062,6 +1249,182 @@ class NeuQuant:
         return a
 
 
+def _asRGBArray(im):
+    """ Return the pixels of a PIL image or numpy array as (N, 3) uint8 """
+    a = np.asarray(im.convert("RGB") if isinstance(im, Image.Image) else im)
+    if a.ndim == 2:
+        a = np.repeat(a[:, :, None], 3, axis=2)
+    return a[:, :, :3].reshape(-1, 3)
+
+
+def _packRGB(px):
+    """ Pack (N, 3) uint8 colors into uint32 keys """
+    px = px.astype(np.uint32)
+    return (px[:, 0] << 16) | (px[:, 1] << 8) | px[:, 2]
+
+
+def _nearestNumpy(points, palette, chunk=1 << 16):
+    """ Index of the closest palette color (squared distance), in chunks """
+    palette = palette.astype(np.float64)
+    p2 = (palette * palette).sum(1)
+    out = np.empty(len(points), dtype=np.intp)
+    for i in range(0, len(points), chunk):
+        x = points[i:i + chunk].astype(np.float64)
+        out[i:i + chunk] = np.argmin(p2 - 2 * x.dot(palette.T), axis=1)
+    return out
+
+
+if numba is not None:
+    @numba.njit(cache=True)
+    def _nearestNumba(points, palette):
+        out = np.empty(points.shape[0], dtype=np.intp)
+        for i in range(points.shape[0]):
+            best, bestd = 0, np.inf
+            for j in range(palette.shape[0]):
+                d = 0.0
+                for c in range(3):
+                    t = points[i, c] - palette[j, c]
+                    d += t * t
+                if d < bestd:
+                    best, bestd = j, d
+            out[i] = best
+        return out
+
+
+class BatchNeuQuant:
+    """ BatchNeuQuant(images, samplefac=10, colors=256, ncycles=20)
+
+    Vectorized variant of the NeuQuant algorithm (see NeuQuant).
+    Instead of presenting the sampled pixels one by one to the 1D
+    Kohonen network, each learning cycle presents all of them at once
+    (batch SOM): every pixel is assigned to its closest neuron, and each
+    neuron moves to the mean of the pixels of its neighbourhood, weighted
+    like in NeuQuant.alterneigh. The radius shrinks to zero, so the last
+    cycles are a plain k-means refinement.
+
+    images can be one image or a list of frames (PIL images or numpy
+    arrays); in the latter case one palette is learned from a sample of
+    all frames, which can then be used to quantize every frame.
+
+    Nearest-color lookups use scipy's cKDTree if available, then Numba,
+    then plain numpy.
+
+    """
+
+    MAXSAMPLES = 1 << 17  # Upper bound on the number of learning pixels
+
+    def __init__(self, images, samplefac=10, colors=256, ncycles=20):
+
+        # Check Numpy
+        if np is None:
+            raise RuntimeError("Need Numpy for the NeuQuant algorithm.")
+
+        if not isinstance(images, (list, tuple)):
+            images = [images]
+        self.NETSIZE = colors
+        self.NCYCLES = ncycles
+        self.samplefac = samplefac
+        self.pimage = None
+        self._tree = None
+
+        self.pixels = self.samplePixels(images)
+        self.learn()
+        self.fix()
+
+    def samplePixels(self, images):
+        """ Every samplefac-th pixel of evenly spaced frames, at most
+        MAXSAMPLES in total """
+        npix = _asRGBArray(images[0]).shape[0]
+        perframe = max(1, npix // self.samplefac)
+        nframes = max(1, min(len(images), self.MAXSAMPLES // perframe))
+        frames = np.linspace(0, len(images) - 1, nframes).astype(int)
+        return np.concatenate([_asRGBArray(images[i])[::self.samplefac]
+                               for i in np.unique(frames)])
+
+    def learn(self):
+        unique, weights = np.unique(_packRGB(self.pixels), return_counts=True)
+        if len(unique) <= self.NETSIZE:
+            # Few colors: use them exactly
+            self.network = np.zeros((self.NETSIZE, 3))
+            self.network[:len(unique), 0] = (unique >> 16) & 0xff
+            self.network[:len(unique), 1] = (unique >> 8) & 0xff
+            self.network[:len(unique), 2] = unique & 0xff
+            self.network[len(unique):] = self.network[len(unique) - 1]
+            return
+
+        # Learn on distinct colors, weighted by how often they occur
+        pixels = np.stack([(unique >> 16) & 0xff, (unique >> 8) & 0xff,
+                           unique & 0xff], axis=1).astype(np.float64)
+        weights = weights.astype(np.float64)
+
+        # Grey ramp, like NeuQuant.setUpArrays
+        self.network = np.repeat(
+            np.linspace(0, 255, self.NETSIZE)[:, None], 3, axis=1)
+        d = np.arange(self.NETSIZE)
+        initrad = self.NETSIZE / 8
+        for cycle in range(self.NCYCLES):
+            idx = self.nearest(pixels, self.network)
+            counts = np.bincount(idx, weights, self.NETSIZE)
+            sums = np.stack([np.bincount(idx, weights * pixels[:, c], self.NETSIZE)
+                             for c in range(3)], axis=1)
+            rad = initrad * (1 - cycle / (0.75 * self.NCYCLES))
+            if rad > 1:
+                h = 1 - ((d[:, None] - d[None, :]) / rad)**2
+                h[h < 0] = 0
+                counts, sums = h.dot(counts), h.dot(sums)
+            hit = counts > 0
+            self.network[hit] = sums[hit] / counts[hit, None]
+
+    def fix(self):
+        self.colormap = np.clip(np.round(self.network), 0, 255).astype(np.uint8)
+
+    @staticmethod
+    def nearest(points, palette):
+        """ Index of the closest palette color for each of the points """
+        cKDTree = get_cKDTree()
+        if cKDTree:
+            return cKDTree(palette).query(points)[1]
+        if numba is not None:
+            return _nearestNumba(points.astype(np.float64),
+                                 palette.astype(np.float64))
+        return _nearestNumpy(points, palette)
+
+    def paletteImage(self):
+        """ Palette image to use with Image.quantize (see NeuQuant) """
+        if self.pimage is None:
+            palette = self.colormap.ravel().tolist()
+            palette.extend([0] * (256 - self.NETSIZE) * 3)
+            self.pimage = Image.new("P", (1, 1), 0)
+            self.pimage.putpalette(palette)
+        return self.pimage
+
+    def inxsearch(self, px):
+        """ Palette indices for (N, 3) pixels. Distinct colors are looked
+        up only once, with a KD-tree built once per palette. """
+        keys, inverse = np.unique(_packRGB(px), return_inverse=True)
+        colors = np.stack([(keys >> 16) & 0xff, (keys >> 8) & 0xff,
+                           keys & 0xff], axis=1)
+        cKDTree = get_cKDTree()
+        if cKDTree:
+            if self._tree is None:
+                self._tree = cKDTree(self.colormap.astype(np.float64))
+            idx = self._tree.query(colors)[1]
+        else:
+            idx = self.nearest(colors, self.colormap)
+        return idx[inverse.ravel()]
+
+    def quantize(self, image):
+        """ Quantize a PIL image or numpy array to a paletted PIL image """
+        if isinstance(image, Image.Image):
+            w, h = image.size
+        else:
+            h, w = image.shape[:2]
+        idx = self.inxsearch(_asRGBArray(image))
+        im = Image.fromarray(idx.reshape(h, w).astype(np.uint8), 'P')
+        im.putpalette(self.paletteImage().getpalette())
+        return im
+
+
 if __name__ == '__main__':
     im = np.zeros((200, 200), dtype=np.uint8)
     im[10:30, :] = 100
@@ -10,9 +10,17 @@ import glob
 import shutil
 import datetime
 import platform
-from scipy.spatial import ConvexHull, Delaunay
+import hashlib
+import io
+import atexit
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+from scipy.spatial import ConvexHull
 import argparse
 from matplotlib import animation
+from matplotlib.collections import LineCollection
+import matplotlib.image as mimage
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 from mpl_toolkits.mplot3d import Axes3D
 
@@ -50,12 +58,13 @@ from OCC.Core.GeomAPI import GeomAPI_PointsToBSplineSurface
 from OCC.Core.GeomAPI import GeomAPI_PointsToBSpline
 from OCC.Core.GeomAPI import GeomAPI_Interpolate
 from OCC.Core.GeomAbs import GeomAbs_C0, GeomAbs_C1, GeomAbs_C2
-from OCC.Core.GeomAbs import GeomAbs_G1, GeomAbs_G2
+from OCC.Core.GeomAbs import GeomAbs_G1
 from OCC.Core.GeomAbs import GeomAbs_Intersection, GeomAbs_Arc
 from OCC.Core.GeomFill import GeomFill_BoundWithSurf
 from OCC.Core.GeomFill import GeomFill_BSplineCurves
 from OCC.Core.GeomFill import GeomFill_StretchStyle, GeomFill_CoonsStyle, GeomFill_CurvedStyle
-from OCC.Core.AIS import AIS_Manipulator
+from OCC.Core.AIS import AIS_Manipulator, AIS_PointCloud
+from OCC.Core.Graphic3d import Graphic3d_ArrayOfPoints
 from OCC.Extend.DataExchange import write_step_file, read_step_file
 from OCCUtils.Topology import Topo
 from OCCUtils.Topology import shapeTypeString, dumpTopology
@@ -85,6 +94,31 @@ def create_tempdir(name="temp", flag=1):
     return tmpdir
 
 
+def triangulation_edges(triangles):
+    """Unique edges (n, 2) of a triangulation.
+
+    Each triangle edge is sorted so that (i, j) and (j, i) coincide,
+    then the pairs are deduplicated on a packed int64 key.
+    """
+    t = np.asarray(triangles, dtype=np.int64)
+    edges = np.concatenate([t[:, [0, 1]], t[:, [1, 2]], t[:, [2, 0]]])
+    edges.sort(axis=1)
+    n = edges.max() + 1
+    key = np.unique(edges[:, 0] * n + edges[:, 1])
+    return np.stack([key // n, key % n], axis=1)
+
+
+def triangulation_boundary(triangles, neighbors):
+    """Boundary edges (n, 2) of a matplotlib Triangulation.
+
+    neighbors[i, j] is -1 when the edge from vertex j to vertex j+1 of
+    triangle i has no neighbour (for Delaunay, the convex hull).
+    """
+    t = np.asarray(triangles)
+    i, j = np.nonzero(np.asarray(neighbors) == -1)
+    return np.stack([t[i, j], t[i, (j + 1) % 3]], axis=1)
+
+
 def create_tempnum(name, tmpdir="./", ext=".tar.gz"):
     num = len(glob.glob(tmpdir + name + "*" + ext)) + 1
     filename = '{}{}_{:03}{}'.format(tmpdir, name, num, ext)
@@ -92,6 +126,103 @@ def create_tempnum(name, tmpdir="./", ext=".tar.gz"):
     return filename
 
 
+_serial_lock = threading.Lock()
+_serial_count = {}
+
+
+def create_serialname(name, tmpdir="./", ext=".png"):
+    """Next serial filename, same naming as create_tempnum.
+
+    The directory is scanned only on the first call for (tmpdir, name, ext),
+    later numbers come from an in-memory counter. The file is reserved with
+    O_EXCL so that processes sharing tmpdir never get the same name.
+    """
+    key = (tmpdir, name, ext)
+    with _serial_lock:
+        if key not in _serial_count:
+            _serial_count[key] = len(glob.glob(tmpdir + name + "*" + ext))
+        while True:
+            _serial_count[key] += 1
+            filename = '{}{}_{:03}{}'.format(
+                tmpdir, name, _serial_count[key], ext)
+            try:
+                os.close(os.open(filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return filename
+            except FileExistsError:
+                continue
+
+
+class PngWriter (object):
+    """Background PNG writer for matplotlib figures.
+
+    The figure is rasterized to an RGBA buffer on the calling thread (the
+    figure may change right after), encoding and writing the PNG is done by
+    a thread pool. At most max_inflight images are held in memory, submit()
+    blocks when the limit is reached.
+    """
+
+    def __init__(self, workers=2, max_inflight=8):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.slots = threading.BoundedSemaphore(max_inflight)
+        self.lock = threading.Lock()
+        self.futures = []
+        self.closed = False
+        atexit.register(self.close)
+
+    def submit(self, fig, pngname, *args, **kwargs):
+        if self.closed:
+            raise RuntimeError("PngWriter is closed")
+        dpi = kwargs.pop("dpi", plt.rcParams["savefig.dpi"])
+        if dpi == "figure":
+            dpi = fig.dpi
+        buf = io.BytesIO()
+        if args or kwargs or plt.rcParams["savefig.bbox"] == "tight":
+            # bbox_inches etc. change the image size, encode here
+            fig.savefig(buf, *args, format="png", dpi=dpi, **kwargs)
+            data = buf.getvalue()
+        else:
+            fig.savefig(buf, format="rgba", dpi=dpi)
+            w, h = fig.get_size_inches() * dpi
+            data = np.frombuffer(buf.getbuffer(), dtype=np.uint8)
+            data = data.reshape(int(h), int(w), 4)
+        self.slots.acquire()
+        try:
+            future = self.pool.submit(self._write, data, pngname, dpi)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda f: self.slots.release())
+        with self.lock:
+            self.futures = [f for f in self.futures if not f.done()
+                            or f.exception() is not None]
+            self.futures.append(future)
+        return pngname
+
+    @staticmethod
+    def _write(data, pngname, dpi):
+        if isinstance(data, bytes):
+            with open(pngname, "wb") as fp:
+                fp.write(data)
+        else:
+            mimage.imsave(pngname, data, format="png", dpi=dpi)
+
+    def flush(self):
+        """Wait for all submitted images, raise the first write error."""
+        with self.lock:
+            futures, self.futures = self.futures, []
+        for f in futures:
+            f.result()
+
+    def close(self):
+        if self.closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self.closed = True
+            self.pool.shutdown(wait=True)
+
+
 class SetDir (object):
 
     def __init__(self):
@@ -130,10 +261,15 @@ class SetDir (object):
 
 class PlotBase(SetDir):
 
-    def __init__(self, aspect="equal", *args, **kwargs):
+    def __init__(self, aspect="equal", save_workers=0, max_inflight=8, *args, **kwargs):
         SetDir.__init__(self)
         self.dim = 2
         self.fig, self.axs = plt.subplots()
+        # save_workers > 0: SavePng returns at once, PNGs are written
+        # in the background (see SavePng_Flush / SavePng_Close)
+        self.writer = None
+        if save_workers > 0:
+            self.writer = PngWriter(save_workers, max_inflight)
 
     def new_fig(self, aspect="equal", dim=None):
         if dim == None:
@@ -170,6 +306,8 @@ class PlotBase(SetDir):
     def SavePng(self, pngname=None, *args, **kwargs):
         if pngname == None:
             pngname = self.tempname + ".png"
+        if self.writer is not None:
+            return self.writer.submit(self.fig, pngname, *args, **kwargs)
         self.fig.savefig(pngname, *args, **kwargs)
         return pngname
 
@@ -181,9 +319,17 @@ class PlotBase(SetDir):
             dirname = os.path.dirname(pngname) + "/"
             basename = os.path.basename(pngname)
             pngname, extname = os.path.splitext(basename)
-        pngname = create_tempnum(pngname, dirname, ".png")
-        self.fig.savefig(pngname, *args, **kwargs)
-        return pngname
+        pngname = create_serialname(pngname, dirname, ".png")
+        return self.SavePng(pngname, *args, **kwargs)
+
+    def SavePng_Flush(self):
+        if self.writer is not None:
+            self.writer.flush()
+
+    def SavePng_Close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
 
     def Show(self):
         try:
@@ -292,9 +438,11 @@ class plot2d (PlotBase):
         else:
             self.SavePng(pngname)
 
-    def contourf_tri(self, x, y, z, lim=[-1, 1, -1, 1], pngname=None):
+    def contourf_tri(self, x, y, z, lim=[-1, 1, -1, 1], pngname=None, collection=True):
+        # one triangulation is shared by the contour and both mesh images
+        triang = tri.Triangulation(x, y)
         self.new_2Dfig()
-        self.axs.tricontourf(x, y, z, cmap="jet")
+        self.axs.tricontourf(triang, z, cmap="jet")
         self.axs.set_xlim(lim[0], lim[1])
         self.axs.set_ylim(lim[2], lim[3])
 
@@ -306,28 +454,36 @@ class plot2d (PlotBase):
         self.axs.scatter(x, y, 5.0)
         self.SavePng(png_root + "_dot.png")
 
-        pnt = np.array([x, y]).T
-        cov = ConvexHull(pnt)
-        tri = Delaunay(pnt)
-        for idx in tri.simplices:
-            xi = pnt[idx, 0]
-            yi = pnt[idx, 1]
-            self.axs.plot(xi, yi, "k", lw=0.5)
-        self.axs.plot(pnt[cov.vertices, 0],
-                      pnt[cov.vertices, 1], "k", lw=1.0)
+        self.plot_tri_mesh(triang, lw=0.5, hull_lw=1.0, collection=collection)
         self.SavePng(png_root + "_grd.png")
 
         self.new_2Dfig()
         self.axs.scatter(x, y, 5.0)
         self.axs.set_xlim(lim[0], lim[1])
         self.axs.set_ylim(lim[2], lim[3])
-        for idx in tri.simplices:
-            xi = pnt[idx, 0]
-            yi = pnt[idx, 1]
-            self.axs.plot(xi, yi, "k", lw=0.75)
-        self.axs.plot(pnt[cov.vertices, 0],
-                      pnt[cov.vertices, 1], "k", lw=1.5)
+        self.plot_tri_mesh(triang, lw=0.75, hull_lw=1.5, collection=collection)
         self.SavePng(png_root + "_grid.png")
+        return triang
+
+    def plot_tri_mesh(self, triang, lw=0.5, hull_lw=1.0, collection=True):
+        pnt = np.array([triang.x, triang.y]).T
+        if collection:
+            # unique edges and the hull as two LineCollection artists
+            edges = triangulation_edges(triang.triangles)
+            self.axs.add_collection(
+                LineCollection(pnt[edges], colors="k", linewidths=lw))
+            hull = triangulation_boundary(triang.triangles, triang.neighbors)
+            self.axs.add_collection(
+                LineCollection(pnt[hull], colors="k", linewidths=hull_lw))
+        else:
+            # one Line2D per triangle
+            cov = ConvexHull(pnt)
+            for idx in triang.triangles:
+                xi = pnt[idx, 0]
+                yi = pnt[idx, 1]
+                self.axs.plot(xi, yi, "k", lw=lw)
+            self.axs.plot(pnt[cov.vertices, 0],
+                          pnt[cov.vertices, 1], "k", lw=hull_lw)
 
     def contourf_div(self, mesh, func, loc=[0, 0], txt="", title="name", pngname=None, level=None):
         sx, sy = loc
@@ -524,36 +680,276 @@ def gen_ellipsoid(axs=gp_Ax3(), rxyz=[10, 20, 30]):
     return ellips
 
 
-def spl_face(px, py, pz, axs=gp_Ax3()):
-    nx, ny = px.shape
+def np_to_pnts(pts):
+    """(N, 3) array -> list of gp_Pnt"""
+    pts = np.asarray(pts, dtype=float).reshape(-1, 3)
+    return [gp_Pnt(x, y, z) for x, y, z in pts.tolist()]
+
+
+def np_to_array1(pts):
+    """(N, 3) array -> TColgp_Array1OfPnt(1, N)
+
+    pythonocc has no buffer access to TColgp arrays, so the points are
+    still set one by one, but from plain floats (.tolist()) instead of
+    numpy scalars, which is several times faster.
+    """
+    pts = np.asarray(pts, dtype=float).reshape(-1, 3)
+    p_array = TColgp_Array1OfPnt(1, len(pts))
+    set_value = p_array.SetValue
+    for idx, (x, y, z) in enumerate(pts.tolist(), 1):
+        set_value(idx, gp_Pnt(x, y, z))
+    return p_array
+
+
+def np_to_array2(pts):
+    """(Nx, Ny, 3) array -> TColgp_Array2OfPnt(1, Nx, 1, Ny)"""
+    pts = np.asarray(pts, dtype=float)
+    nx, ny, _ = pts.shape
     pnt_2d = TColgp_Array2OfPnt(1, nx, 1, ny)
-    for row in range(pnt_2d.LowerRow(), pnt_2d.UpperRow() + 1):
-        for col in range(pnt_2d.LowerCol(), pnt_2d.UpperCol() + 1):
-            i, j = row - 1, col - 1
-            pnt = gp_Pnt(px[i, j], py[i, j], pz[i, j])
-            pnt_2d.SetValue(row, col, pnt)
-            #print (i, j, px[i, j], py[i, j], pz[i, j])
-
-    api = GeomAPI_PointsToBSplineSurface(pnt_2d, 3, 8, GeomAbs_G2, 0.001)
+    set_value = pnt_2d.SetValue
+    for row, line in enumerate(pts.tolist(), 1):
+        for col, (x, y, z) in enumerate(line, 1):
+            set_value(row, col, gp_Pnt(x, y, z))
+    return pnt_2d
+
+
+def array1_to_np(p_array):
+    """TColgp_Array1OfPnt -> (N, 3) array"""
+    value = p_array.Value
+    return np.array([value(i).Coord()
+                     for i in range(p_array.Lower(), p_array.Upper() + 1)])
+
+
+def array2_to_np(pnt_2d):
+    """TColgp_Array2OfPnt -> (Nx, Ny, 3) array"""
+    value = pnt_2d.Value
+    cols = range(pnt_2d.LowerCol(), pnt_2d.UpperCol() + 1)
+    return np.array([[value(row, col).Coord() for col in cols]
+                     for row in range(pnt_2d.LowerRow(), pnt_2d.UpperRow() + 1)])
+
+
+_pcd_types = {("F", 4): "f4", ("F", 8): "f8",
+              ("U", 1): "u1", ("U", 2): "u2", ("U", 4): "u4", ("U", 8): "u8",
+              ("I", 1): "i1", ("I", 2): "i2", ("I", 4): "i4", ("I", 8): "i8"}
+
+_ply_types = {"char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+              "short": "i2", "int16": "i2", "ushort": "u2", "uint16": "u2",
+              "int": "i4", "int32": "i4", "uint": "u4", "uint32": "u4",
+              "float": "f4", "float32": "f4", "double": "f8", "float64": "f8"}
+
+
+def _cloud_fields(data, names):
+    """(N, 3) points and (N, 3) uint8 colors (or None) of a structured array"""
+    pts = np.stack([data["x"], data["y"], data["z"]], axis=1).astype(float)
+    if "rgb" in names or "rgba" in names:
+        # PCL packs 0x00RRGGBB into the bits of a float (or uint32)
+        rgb = np.ascontiguousarray(
+            data["rgb" if "rgb" in names else "rgba"]).view(np.uint32)
+        colors = np.stack([rgb >> 16, rgb >> 8, rgb], axis=1) & 0xFF
+        return pts, colors.astype(np.uint8)
+    if "red" in names and "green" in names and "blue" in names:
+        colors = np.stack([data["red"], data["green"], data["blue"]], axis=1)
+        return pts, colors.astype(np.uint8)
+    return pts, None
+
+
+def read_pcd(filename):
+    """Points (N, 3) and colors (N, 3) uint8 or None of a PCD file.
+
+    DATA ascii and binary are read in one call (np.loadtxt / np.fromfile),
+    binary_compressed is not supported.
+    """
+    header = {}
+    with open(filename, "rb") as fp:
+        while True:
+            line = fp.readline()
+            if not line:
+                raise ValueError("{}: no DATA line".format(filename))
+            words = line.decode("ascii", "replace").split()
+            if not words or words[0].startswith("#"):
+                continue
+            header[words[0].upper()] = words[1:]
+            if words[0].upper() == "DATA":
+                break
+        offset = fp.tell()
+    names = header["FIELDS"]
+    count = [int(c) for c in header.get("COUNT", ["1"] * len(names))]
+    dtype = []
+    for name, size, kind, cnt in zip(names, header["SIZE"], header["TYPE"], count):
+        fmt = _pcd_types[(kind.upper(), int(size))]
+        dtype.append((name, fmt) if cnt == 1 else (name, fmt, (cnt,)))
+    num = int(header["POINTS"][0])
+    data_type = header["DATA"][0].lower()
+    if data_type == "ascii":
+        with open(filename, "r") as fp:
+            fp.seek(offset)
+            data = np.loadtxt(fp, dtype=np.dtype(dtype), max_rows=num, ndmin=1)
+    elif data_type == "binary":
+        data = np.fromfile(filename, dtype=np.dtype(dtype), count=num,
+                           offset=offset)
+    else:
+        raise ValueError("{}: DATA {} is not supported".format(
+            filename, data_type))
+    return _cloud_fields(data, names)
+
+
+def read_ply(filename):
+    """Points (N, 3) and colors (N, 3) uint8 or None of a PLY file.
+
+    Only the vertex element is read (ascii, binary_little_endian or
+    binary_big_endian), it has to be the first element of the file.
+    """
+    elements = []
+    with open(filename, "rb") as fp:
+        if fp.readline().strip() != b"ply":
+            raise ValueError("{}: not a PLY file".format(filename))
+        while True:
+            line = fp.readline()
+            if not line:
+                raise ValueError("{}: no end_header".format(filename))
+            words = line.decode("ascii", "replace").split()
+            if not words or words[0] in ("comment", "obj_info"):
+                continue
+            if words[0] == "format":
+                data_type = words[1]
+            elif words[0] == "element":
+                elements.append((words[1], int(words[2]), []))
+            elif words[0] == "property":
+                elements[-1][2].append(words[1:])
+            elif words[0] == "end_header":
+                break
+        offset = fp.tell()
+    if not elements or elements[0][0] != "vertex":
+        raise ValueError("{}: vertex is not the first element".format(filename))
+    _, num, props = elements[0]
+    if any(p[0] == "list" for p in props):
+        raise ValueError("{}: list property in vertex".format(filename))
+    names = [p[1] for p in props]
+    if data_type == "ascii":
+        dtype = np.dtype([(name, "f8") for name in names])
+        with open(filename, "r") as fp:
+            fp.seek(offset)
+            data = np.loadtxt(fp, dtype=dtype, max_rows=num, ndmin=1)
+    else:
+        order = ">" if data_type == "binary_big_endian" else "<"
+        dtype = np.dtype([(name, order + _ply_types[kind])
+                          for kind, name in props])
+        data = np.fromfile(filename, dtype=dtype, count=num, offset=offset)
+    return _cloud_fields(data, names)
+
+
+def read_point_cloud(filename):
+    """read_pcd or read_ply by extension"""
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".pcd":
+        return read_pcd(filename)
+    if ext == ".ply":
+        return read_ply(filename)
+    raise ValueError("{}: unknown point cloud format".format(filename))
+
+
+def voxel_downsample(pts, voxel, colors=None):
+    """Mean point (and color) of every occupied voxel of size voxel."""
+    pts = np.asarray(pts, dtype=float).reshape(-1, 3)
+    ijk = np.floor((pts - pts.min(axis=0)) / voxel).astype(np.int64)
+    dims = ijk.max(axis=0) + 1
+    _, inverse, counts = np.unique(
+        np.ravel_multi_index(ijk.T, dims), return_inverse=True,
+        return_counts=True)
+    inverse = inverse.ravel()
+
+    def mean(values):
+        return np.stack([np.bincount(inverse, values[:, i]) / counts
+                         for i in range(values.shape[1])], axis=1)
+
+    if colors is None:
+        return mean(pts), None
+    colors = np.asarray(colors)
+    color = mean(colors.astype(float))
+    if colors.dtype.kind in "ui":
+        color = np.rint(color)
+    return mean(pts), color.astype(colors.dtype)
+
+
+def np_to_points(pts, colors=None):
+    """(N, 3) array -> Graphic3d_ArrayOfPoints
+
+    colors: (N, 3) per-point colors, uint8 (0-255) or float (0-1).
+    As with np_to_array1 the vertices are set one by one from plain floats,
+    without gp_Pnt / Quantity_Color objects.
+    """
+    pts = np.asarray(pts, dtype=float).reshape(-1, 3)
+    array = Graphic3d_ArrayOfPoints(len(pts), colors is not None)
+    add_vertex = array.AddVertex
+    if colors is None:
+        for x, y, z in pts.tolist():
+            add_vertex(x, y, z)
+        return array
+    colors = np.asarray(colors).reshape(-1, 3)
+    if colors.dtype == np.uint8:
+        colors = colors / 255.0
+    set_color = array.SetVertexColor
+    for idx, ((x, y, z), (r, g, b)) in enumerate(
+            zip(pts.tolist(), colors.tolist()), 1):
+        add_vertex(x, y, z)
+        set_color(idx, r, g, b)
+    return array
+
+
+def make_point_cloud(pts, colors=None, voxel=None):
+    """AIS_PointCloud of (N, 3) points, optionally voxel down-sampled"""
+    if voxel is not None:
+        pts, colors = voxel_downsample(pts, voxel, colors)
+    cloud = AIS_PointCloud()
+    cloud.SetPoints(np_to_points(pts, colors))
+    return cloud
+
+
+def grid_hash(*arrays):
+    """Hash of the shapes and contents of numpy arrays"""
+    h = hashlib.sha1()
+    for a in arrays:
+        a = np.ascontiguousarray(a, dtype=float)
+        h.update(str(a.shape).encode())
+        h.update(a.tobytes())
+    return h.hexdigest()
+
+
+# fitted B-spline surfaces, keyed on grid_hash of the points (LRU)
+spl_surf_cache = OrderedDict()
+spl_surf_cache_size = 16
+
+
+def spl_surf(px, py, pz):
+    """Interpolating B-spline surface through the grid (px, py, pz).
+
+    Surfaces are cached on the hash of the grid, so repeated fits of the
+    same grid skip the array construction and the interpolation.
+    """
+    key = grid_hash(px, py, pz)
+    if key in spl_surf_cache:
+        spl_surf_cache.move_to_end(key)
+        return spl_surf_cache[key]
+
+    pnt_2d = np_to_array2(np.stack([px, py, pz], axis=-1))
+    api = GeomAPI_PointsToBSplineSurface()
     api.Interpolate(pnt_2d)
-    #surface = BRepBuilderAPI_MakeFace(curve, 1e-6)
-    # return surface.Face()
-    face = BRepBuilderAPI_MakeFace(api.Surface(), 1e-6).Face()
+    surf = api.Surface()
+
+    spl_surf_cache[key] = surf
+    if len(spl_surf_cache) > spl_surf_cache_size:
+        spl_surf_cache.popitem(last=False)
+    return surf
+
+
+def spl_face(px, py, pz, axs=gp_Ax3()):
+    face = BRepBuilderAPI_MakeFace(spl_surf(px, py, pz), 1e-6).Face()
     face.Location(set_loc(gp_Ax3(), axs))
     return face
 
 
 def spl_curv(px, py, pz):
-    num = px.size
-    pts = []
-    p_array = TColgp_Array1OfPnt(1, num)
-    for idx, t in enumerate(px):
-        x = px[idx]
-        y = py[idx]
-        z = pz[idx]
-        pnt = gp_Pnt(x, y, z)
-        pts.append(pnt)
-        p_array.SetValue(idx + 1, pnt)
+    p_array = np_to_array1(np.stack([px, py, pz], axis=-1))
     api = GeomAPI_PointsToBSpline(p_array)
     return p_array, api.Curve()
 
@@ -669,10 +1065,17 @@ class plotocc (SetDir, Viewer):
         self.display.DisplayShape(gp_Pnt(*xyz))
 
     def show_pts(self, pts=[gp_Pnt()], num=1):
-        for p in pts[::num]:
-            self.display.DisplayShape(p)
+        self.show_cloud([p.Coord() for p in pts[::num]], update=False)
         self.display.DisplayShape(make_polygon(pts))
 
+    def show_cloud(self, pts, colors=None, voxel=None, update=True):
+        # pts: (N, 3) array, or a .pcd / .ply file name
+        if isinstance(pts, str):
+            pts, colors = read_point_cloud(pts)
+        cloud = make_point_cloud(pts, colors, voxel)
+        self.display.Context.Display(cloud, update)
+        return cloud
+
     def show_ball(self, scale=100, trans=0.5):
         shape = BRepPrimAPI_MakeSphere(scale).Shape()
         self.display.DisplayShape(shape, transparency=trans)
@@ -743,13 +1146,10 @@ class plotocc (SetDir, Viewer):
                 return solid.Shape()
 
     def make_PolyWire(self, num=6, radi=1.0, shft=0.0, axs=gp_Ax3(), skin=None):
-        lxy = radi
-        pnts = []
         angl = 360 / num
-        for i in range(num):
-            thet = np.deg2rad(i * angl) + np.deg2rad(shft)
-            x, y = radi * np.sin(thet), radi * np.cos(thet)
-            pnts.append(gp_Pnt(x, y, 0))
+        thet = np.deg2rad(np.arange(num) * angl) + np.deg2rad(shft)
+        pnts = np_to_pnts(np.stack(
+            [radi * np.sin(thet), radi * np.cos(thet), np.zeros(num)], axis=-1))
         pnts.append(pnts[0])
         poly = make_polygon(pnts)
         poly.Location(set_loc(gp_Ax3(), axs))
@@ -769,16 +1169,14 @@ class plotocc (SetDir, Viewer):
             return solid.Shape()
 
     def make_StarWire(self, num=5, radi=[2.0, 1.0], shft=0.0, axs=gp_Ax3(), skin=None):
-        lxy = radi
-        pnts = []
         angl = 360 / num
-        for i in range(num):
-            a_thet = np.deg2rad(i * angl) + np.deg2rad(shft)
-            ax, ay = radi[0] * np.sin(a_thet), radi[0] * np.cos(a_thet)
-            pnts.append(gp_Pnt(ax, ay, 0))
-            b_thet = a_thet + np.deg2rad(angl) / 2
-            bx, by = radi[1] * np.sin(b_thet), radi[1] * np.cos(b_thet)
-            pnts.append(gp_Pnt(bx, by, 0))
+        a_thet = np.deg2rad(np.arange(num) * angl) + np.deg2rad(shft)
+        b_thet = a_thet + np.deg2rad(angl) / 2
+        # outer and inner corners alternate
+        thet = np.stack([a_thet, b_thet], axis=-1).ravel()
+        rad = np.tile(radi[:2], num)
+        pnts = np_to_pnts(np.stack(
+            [rad * np.sin(thet), rad * np.cos(thet), np.zeros(2 * num)], axis=-1))
         pnts.append(pnts[0])
         poly = make_polygon(pnts)
         poly.Location(set_loc(gp_Ax3(), axs))
@@ -26,6 +26,7 @@ from PyQt5.QtWidgets import QDialog, QCheckBox
 
 from base import SetDir
 from base import gen_ellipsoid, pnt_from_axs, pnt_trf_vec, set_loc, set_trf, create_tempdir, create_tempnum
+from base import np_to_pnts, read_point_cloud, make_point_cloud
 from src.OCCGui import init_qtdisplay
 
 from OCC.Display.SimpleGui import init_display
@@ -159,10 +160,17 @@ class dispocc (SetDir, OCCViewer):
         self.display.DisplayShape(gp_Pnt(*xyz))
 
     def show_pts(self, pts=[gp_Pnt()], num=1):
-        for p in pts[::num]:
-            self.display.DisplayShape(p)
+        self.show_cloud([p.Coord() for p in pts[::num]], update=False)
         self.display.DisplayShape(make_polygon(pts))
 
+    def show_cloud(self, pts, colors=None, voxel=None, update=True):
+        # pts: (N, 3) array, or a .pcd / .ply file name
+        if isinstance(pts, str):
+            pts, colors = read_point_cloud(pts)
+        cloud = make_point_cloud(pts, colors, voxel)
+        self.display.Context.Display(cloud, update)
+        return cloud
+
     def show_ball(self, scale=100, trans=0.5):
         shape = BRepPrimAPI_MakeSphere(scale).Shape()
         self.display.DisplayShape(shape, transparency=trans)
@@ -233,13 +241,10 @@ class dispocc (SetDir, OCCViewer):
                 return solid.Shape()
 
     def make_PolyWire(self, num=6, radi=1.0, shft=0.0, axs=gp_Ax3(), skin=None):
-        lxy = radi
-        pnts = []
         angl = 360 / num
-        for i in range(num):
-            thet = np.deg2rad(i * angl) + np.deg2rad(shft)
-            x, y = radi * np.sin(thet), radi * np.cos(thet)
-            pnts.append(gp_Pnt(x, y, 0))
+        thet = np.deg2rad(np.arange(num) * angl) + np.deg2rad(shft)
+        pnts = np_to_pnts(np.stack(
+            [radi * np.sin(thet), radi * np.cos(thet), np.zeros(num)], axis=-1))
         pnts.append(pnts[0])
         poly = make_polygon(pnts)
         poly.Location(set_loc(gp_Ax3(), axs))
@@ -259,16 +264,14 @@ class dispocc (SetDir, OCCViewer):
             return solid.Shape()
 
     def make_StarWire(self, num=5, radi=[2.0, 1.0], shft=0.0, axs=gp_Ax3(), skin=None):
-        lxy = radi
-        pnts = []
         angl = 360 / num
-        for i in range(num):
-            a_thet = np.deg2rad(i * angl) + np.deg2rad(shft)
-            ax, ay = radi[0] * np.sin(a_thet), radi[0] * np.cos(a_thet)
-            pnts.append(gp_Pnt(ax, ay, 0))
-            b_thet = a_thet + np.deg2rad(angl) / 2
-            bx, by = radi[1] * np.sin(b_thet), radi[1] * np.cos(b_thet)
-            pnts.append(gp_Pnt(bx, by, 0))
+        a_thet = np.deg2rad(np.arange(num) * angl) + np.deg2rad(shft)
+        b_thet = a_thet + np.deg2rad(angl) / 2
+        # outer and inner corners alternate
+        thet = np.stack([a_thet, b_thet], axis=-1).ravel()
+        rad = np.tile(radi[:2], num)
+        pnts = np_to_pnts(np.stack(
+            [rad * np.sin(thet), rad * np.cos(thet), np.zeros(2 * num)], axis=-1))
         pnts.append(pnts[0])
         poly = make_polygon(pnts)
         poly.Location(set_loc(gp_Ax3(), axs))
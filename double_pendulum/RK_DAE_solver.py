@@ -1,6 +1,10 @@
+from collections import namedtuple
 import numpy as np
 
 
+BatchMember = namedtuple('BatchMember', 'name h ts ys zs')
+
+
 class RK_DAE:
     """Base class for Runge-Kutta family of methods for DAE systems.
 
@@ -61,7 +65,7 @@ class RK_DAE:
 
     @staticmethod
     def _initialize_array(initial_value, length):
-        x = np.zeros((length, len(initial_value)))
+        x = np.zeros((length,) + np.shape(initial_value))
         x[0] = initial_value
         return x
 
@@ -96,14 +100,211 @@ class ERK_DAE1(RK_DAE):
         Y[0] = y
         for i in range(1, self.s):
             k[i - 1] = self.ex.get_dy(Y[i - 1])
-            Y[i] = y + self.h * np.sum(self.A[i, j] * k[j] for j in range(i))
+            Y[i] = y + self.h * sum(self.A[i, j] * k[j] for j in range(i))
 
         k[-1] = self.ex.get_dy(Y[-1])
-        new_y = y + self.h * \
-            np.sum((self.b[i] * k[i] for i in range(self.s)), axis=0)
+        new_y = y + self.h * sum(self.b[i] * k[i] for i in range(self.s))
+        new_z = self.ex.get_z(new_y)
+        return new_y, new_z
+
+
+class BatchERK_DAE1(RK_DAE):
+    """Class for explicit RK family of methods for DAE of index 1, which
+    advances a whole ensemble of examples at once.
+
+    The example should be an ensemble (e.g. `DoublePendulumEnsemble`) whose
+    `get_dy` and `get_z` work on stacked states of shape (N, n).
+    Results are stored time-major: `ys` has shape (len(ts), N, n) and
+    `zs` has shape (len(ts), N, m). Use `members` to get the results
+    of each example in the same layout as `ERK_DAE1`.
+    """
+
+    def find_next_y_z(self, y, z):
+        """Calculates the next values of `y` and `z` for all members.
+
+        Stage sums are evaluated as a single `np.tensordot` over the stored
+        stage derivatives instead of Python-level sums.
+
+        Args:
+            y (np.array, (N, n)): positions and velocities of all members
+            z (np.array, (N, m)): Lagrange multipliers of all members
+
+        Returns
+            tuple (y, z): values of `y` and `z` at the end of a time-step
+        """
+        k = np.zeros((self.s,) + y.shape)
+        for i in range(self.s):
+            Y = y + self.h * np.tensordot(self.A[i, :i], k[:i], axes=1)
+            k[i] = self.ex.get_dy(Y)
+
+        new_y = y + self.h * np.tensordot(self.b, k, axes=1)
         new_z = self.ex.get_z(new_y)
         return new_y, new_z
 
+    def members(self):
+        """Splits the results into one record per member of the ensemble.
+
+        Returns:
+            list of `BatchMember` namedtuples with `name`, `h`, `ts`,
+            `ys` (len(ts), n) and `zs` (len(ts), m) fields
+        """
+        return [BatchMember(self.name, self.h, self.ts,
+                            np.ascontiguousarray(self.ys[:, i]),
+                            np.ascontiguousarray(self.zs[:, i]))
+                for i in range(self.ys.shape[1])]
+
+
+class AdaptiveERK_DAE1(RK_DAE):
+    """Class for embedded explicit RK pairs for DAE of index 1, with
+    adaptive step-size control and dense output.
+
+    Only accepted steps are stored, together with `y'` at each of them,
+    which is used for cubic Hermite interpolation between the steps.
+
+    Attributes:
+        b_hat (np.array, (s,)): lower order weights of the embedded pair
+        order (int): order of the propagated solution
+        rtol, atol (float): relative and absolute error tolerances
+        max_step (float): largest allowed time-step
+        h (float): size of the last attempted time-step
+        ts (np.array): accepted time steps (after running `solve`)
+        ys, zs (np.array): results for `y` and `z` at `ts`
+        dys (np.array): values of `y'` at `ts`
+        nr_rejected (int): number of rejected steps
+    """
+
+    def __init__(self, example, method, simulation_duration, rtol=1e-6,
+                 atol=1e-9, first_step=0.01, max_step=np.inf):
+        """Initializes adaptive RK method instance.
+
+        Args:
+            example (class instance): defined in `pendulum.py` module.
+            method (namedtuple): embedded pair defined in `methods.py`
+                module, with `b_hat` and `order` fields (e.g. `DOPRI54`).
+            simulation_duration (float): total duration of a simulation
+            rtol, atol (float): relative and absolute error tolerances
+            first_step (float): size of the first attempted time-step
+            max_step (float): largest allowed time-step
+        """
+        self.name = method.name
+        self.A = method.A
+        self.b = method.b
+        self.b_hat = method.b_hat
+        self.order = method.order
+        self.s = len(method.A)
+        self.ex = example
+        self.h = first_step
+        self.t_end = simulation_duration
+        self.rtol = rtol
+        self.atol = atol
+        self.max_step = max_step
+        self.nr_rejected = 0
+        # first-same-as-last: the last stage is evaluated at the new `y`
+        self._fsal = np.allclose(self.A[-1], self.b)
+        self.ts = np.array([0.0])
+        self.ys = self._initialize_array(example.y_0, 1)
+        self.zs = self._initialize_array(example.z_0, 1)
+        self.dys = np.array([example.get_dy(example.y_0)])
+
+    def solve(self):
+        """Solves the system `ex` from 0 to `t_end`, choosing the step sizes
+        so that the local error estimate stays within `rtol` and `atol`.
+
+        Returns:
+            class instance
+        """
+        t, y, dy = 0.0, self.ys[0], self.dys[0]
+        ts, ys, zs, dys = [t], [y], [self.zs[0]], [dy]
+        h = self.h
+        while t < self.t_end:
+            last = t + min(h, self.max_step) >= self.t_end
+            h = self.t_end - t if last else min(h, self.max_step)
+            if t + h == t:
+                raise FloatingPointError("step size too small at t={}".format(t))
+
+            new_y, error, new_dy = self.find_next_y_error(y, dy, h)
+            scale = self.atol + self.rtol * np.maximum(np.abs(y), np.abs(new_y))
+            err = np.sqrt(np.mean((error / scale)**2))
+
+            if err <= 1:
+                t = self.t_end if last else t + h
+                y, dy = new_y, new_dy
+                ts.append(t)
+                ys.append(y)
+                zs.append(self.ex.get_z(y))
+                dys.append(dy)
+            else:
+                self.nr_rejected += 1
+            factor = 5 if err == 0 else 0.9 * err**(-1 / self.order)
+            self.h = h
+            h *= min(5, max(0.2, factor))
+
+        self.ts = np.array(ts)
+        self.ys = np.array(ys)
+        self.zs = np.array(zs)
+        self.dys = np.array(dys)
+        return self
+
+    def find_next_y_error(self, y, dy, h):
+        """Performs one step of the embedded pair.
+
+        Args:
+            y (np.array, (n,)): positions and velocities vector
+            dy (np.array, (n,)): `y'` at `y`, reused as the first stage
+            h (float): time-step size
+
+        Returns:
+            tuple (y, error, dy): `y` at the end of a time-step, estimate
+            of its local error, and `y'` at the new `y`
+        """
+        k = np.zeros((self.s, len(y)))
+        k[0] = dy
+        for i in range(1, self.s):
+            k[i] = self.ex.get_dy(y + h * self.A[i, :i].dot(k[:i]))
+
+        new_y = y + h * self.b.dot(k)
+        error = h * (self.b - self.b_hat).dot(k)
+        new_dy = k[-1] if self._fsal else self.ex.get_dy(new_y)
+        return new_y, error, new_dy
+
+    def dense_output(self, ts):
+        """Evaluates the solution at arbitrary times by cubic Hermite
+        interpolation between the accepted steps.
+
+        Args:
+            ts (np.array): times in [0, t_end]
+
+        Returns:
+            tuple (ys, zs): arrays of `y` and `z` at `ts`
+        """
+        ts = np.asarray(ts, dtype=float)
+        i = np.clip(np.searchsorted(self.ts, ts, side='right') - 1,
+                    0, len(self.ts) - 2)
+        h = (self.ts[i + 1] - self.ts[i])[:, None]
+        th = ((ts - self.ts[i])[:, None]) / h
+        th2, th3 = th**2, th**3
+        ys = ((2 * th3 - 3 * th2 + 1) * self.ys[i] +
+              (th3 - 2 * th2 + th) * h * self.dys[i] +
+              (-2 * th3 + 3 * th2) * self.ys[i + 1] +
+              (th3 - th2) * h * self.dys[i + 1])
+        zs = np.array([self.ex.get_z(y) for y in ys])
+        return ys, zs
+
+    def resample(self, step_size):
+        """Samples the dense output on a uniform grid, e.g. at frame times
+        of an animation.
+
+        Args:
+            step_size (float): spacing of the uniform grid
+
+        Returns:
+            `BatchMember` namedtuple with the results in `ys` and `zs`
+            attributes and `h` equal to `step_size`
+        """
+        ts = self._get_time_steps(self.t_end, step_size)
+        ys, zs = self.dense_output(ts)
+        return BatchMember(self.name, step_size, ts, ys, zs)
+
 
 def __run_basic_example():
     from pendulum import Pendulum, DoublePendulum
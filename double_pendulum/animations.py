@@ -1,5 +1,8 @@
 from datetime import datetime
 import os
+import subprocess
+import sys
+import time
 import numpy as np
 import matplotlib
 matplotlib.use('Agg')
@@ -40,6 +43,25 @@ def create_comment(example):
     return '\n'.join(status)
 
 
+def sample_frames(system, frame_time=0.02):
+    """Returns the results of `system` at frame times.
+
+    Systems with dense output (e.g. `AdaptiveERK_DAE1`) are resampled on
+    a uniform grid of `frame_time`; fixed-step systems are returned as they
+    are, and the animation skips the steps between the frames.
+
+    Args:
+        system (`ERK_DAE1` or `AdaptiveERK_DAE1` class instance)
+        frame_time (float): time between two frames
+
+    Returns:
+        class instance with the results in `ys` attribute and step size `h`
+    """
+    if hasattr(system, 'resample'):
+        return system.resample(frame_time)
+    return system
+
+
 def single_animation(system, ex, fig_size=(8, 8), hide_axes=True, filename=None):
     """Creates and saves an animation of a single example/system.
 
@@ -50,7 +72,8 @@ def single_animation(system, ex, fig_size=(8, 8), hide_axes=True, filename=None)
 
     Args:
         system (`ERK_DAE1` class instance): DAE system with the results in
-            `ys` and `zs` attributes.
+            `ys` and `zs` attributes. Adaptive systems are sampled at the
+            frame times via `sample_frames`.
         ex (`DoublePendulum` class instance)
         fig_size (tuple (float, float)): size of the figure
         hide_axes (bool): should axis label be hidden of visible. Hidden is
@@ -61,6 +84,8 @@ def single_animation(system, ex, fig_size=(8, 8), hide_axes=True, filename=None)
     Returns:
         filename (string)
     """
+    system = sample_frames(system)
+
     fig = plt.figure(figsize=fig_size)
     ax = plt.axes(
         xlim=(system.ys[:, 1].min() * 1.2, system.ys[:, 1].max() * 1.2),
@@ -139,7 +164,8 @@ def multi_animation(systems, ex, fig_size=(8, 8), hide_axes=True, filename=None)
 
     Args:
         systems (list of `ERK_DAE1` class instance): list of DAE systems with
-            the results in `ys` and `zs` attributes.
+            the results in `ys` and `zs` attributes. Adaptive systems are
+            sampled at the frame times via `sample_frames`.
         ex (`DoublePendulum` class instance)
         fig_size (tuple (float, float)): size of the figure
         hide_axes (bool): should axis label be hidden of visible. Hidden is
@@ -150,6 +176,7 @@ def multi_animation(systems, ex, fig_size=(8, 8), hide_axes=True, filename=None)
     Returns:
         filename (string)
     """
+    systems = [sample_frames(s) for s in systems]
     ys = np.array([s.ys for s in systems])
 
     fig = plt.figure(figsize=fig_size)
@@ -221,6 +248,164 @@ def multi_animation(systems, ex, fig_size=(8, 8), hide_axes=True, filename=None)
     return filename
 
 
+class FFMpegPipe:
+    """Encoder subprocess which receives raw RGB frames on its stdin.
+
+    Only the frame being written is held in memory, so the memory use does
+    not depend on the length of the animation. The output format follows
+    the extension of `filename` (e.g. `.mp4` or `.gif`).
+    """
+
+    def __init__(self, filename, size, fps=50, executable=None):
+        """Starts the encoder.
+
+        Args:
+            filename (string): output file, with an extension
+            size (tuple (int, int)): width and height of a frame in pixels
+            fps (float): frames per second
+            executable (string): path to ffmpeg. Defaults to
+                `matplotlib.rcParams['animation.ffmpeg_path']`.
+        """
+        if executable is None:
+            executable = matplotlib.rcParams['animation.ffmpeg_path']
+        cmd = [executable, '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+               '-s', '{}x{}'.format(*size), '-r', str(fps), '-i', '-']
+        if filename.endswith('.mp4'):
+            cmd += ['-vcodec', 'libx264', '-pix_fmt', 'yuv420p']
+        self.proc = subprocess.Popen(cmd + [filename], stdin=subprocess.PIPE)
+
+    def write(self, frame):
+        """Writes one frame (np.array (height, width, 3) of uint8)."""
+        self.proc.stdin.write(np.ascontiguousarray(frame).data)
+
+    def close(self):
+        self.proc.stdin.close()
+        if self.proc.wait() != 0:
+            raise RuntimeError("ffmpeg exited with code {}".format(
+                self.proc.returncode))
+
+
+class FrameCounter:
+    """Reports the progress and the throughput (frames/s) of rendering."""
+
+    def __init__(self, total, every=100, stream=sys.stderr):
+        self.total = total
+        self.every = every
+        self.stream = stream
+        self.count = 0
+        self.t0 = time.perf_counter()
+
+    @property
+    def fps(self):
+        return self.count / max(time.perf_counter() - self.t0, 1e-9)
+
+    def update(self, n=1):
+        self.count += n
+        if self.stream is not None and (self.count % self.every == 0 or
+                                        self.count == self.total):
+            self.stream.write('\rframe {}/{} ({:.1f} frames/s)'.format(
+                self.count, self.total, self.fps))
+            if self.count == self.total:
+                self.stream.write('\n')
+            self.stream.flush()
+
+
+def stream_animation(systems, ex, fig_size=(8, 8), hide_axes=True,
+                     filename=None, extension='mp4', decimate=1, trail=100,
+                     dpi=100, progress=True):
+    """Renders an animation of one or more systems frame by frame, and
+    streams the frames straight into an encoder.
+
+    Unlike `single_animation` and `multi_animation`, the static part of the
+    figure is drawn once; for each frame only the line data of the moving
+    artists is updated and blitted onto the Agg canvas, whose RGB buffer is
+    piped to ffmpeg (see `FFMpegPipe`).
+
+    Args:
+        systems (`ERK_DAE1` class instance or a list of them): DAE systems
+            with the results in `ys` attribute
+        ex (`DoublePendulum` class instance)
+        fig_size (tuple (float, float)): size of the figure
+        hide_axes (bool): should axis label be hidden of visible
+        filename (string): name of the file (without an extension) where
+            animation should be saved
+        extension (string): 'mp4' or 'gif'
+        decimate (int): render only every `decimate`-th frame of the 50 fps
+            animation (the frame rate is reduced accordingly)
+        trail (int): number of previous frames shown as trailing dots
+        dpi (float): resolution of the frames
+        progress (bool): report the progress and frames/s on stderr
+
+    Returns:
+        tuple (filename (string), frames/s (float))
+    """
+    if not isinstance(systems, (list, tuple)):
+        systems = [systems]
+    systems = [sample_frames(s) for s in systems]
+    skip = int(0.02 / systems[0].h) * decimate
+    ys = np.array([s.ys[::skip] for s in systems])
+
+    fig = plt.figure(figsize=fig_size, dpi=dpi)
+    ax = plt.axes(
+        xlim=(ys[:, :, 1].min() * 1.2, ys[:, :, 1].max() * 1.2),
+        ylim=(ys[:, :, 3].min() * 1.2, max(0.2, ys[:, :, (2, 3)].max()) * 1.2)
+    )
+    if hide_axes:
+        ax.get_xaxis().set_visible(False)
+        ax.get_yaxis().set_visible(False)
+    ax.set_aspect('equal')
+    ax.plot(0, 0, 'o', ms=8, c='k' if len(systems) > 1 else 'C0')
+
+    artists = []
+    for k in range(len(systems)):
+        c = 'C{}'.format(k)
+        artists.append((
+            ax.plot([], [], '-', lw=3, c=c, animated=True)[0],
+            ax.plot([], [], 'o', ms=4 * ex.M[0, 0], c=c, animated=True)[0],
+            ax.plot([], [], 'o', ms=4 * ex.M[1, 1], c=c, animated=True)[0],
+            ax.plot([], [], 'o', ms=1, c=c, animated=True)[0],
+        ))
+    fig.tight_layout()
+
+    canvas = fig.canvas
+    canvas.draw()
+    background = canvas.copy_from_bbox(fig.bbox)
+    width, height = canvas.get_width_height()
+
+    filename = datetime.now().strftime(
+        '%Y-%m-%d_%H-%M') if filename is None else filename
+    if not os.path.isdir(os.path.join(os.getcwd(), 'animations')):
+        os.mkdir('animations')
+    path = './animations/{}.{}'.format(filename, extension)
+
+    nr_frames = ys.shape[1]
+    trail = max(1, trail // decimate)
+    counter = FrameCounter(nr_frames, stream=sys.stderr if progress else None)
+    pipe = None
+    try:
+        pipe = FFMpegPipe(path, (width, height), fps=50 / decimate)
+        for i in range(nr_frames):
+            canvas.restore_region(background)
+            for k, (line, m1, m2, tr) in enumerate(artists):
+                x1, x2, y1, y2 = ys[k, i, :4]
+                line.set_data([0, x1, x2], [0, y1, y2])
+                m1.set_data([x1], [y1])
+                m2.set_data([x2], [y2])
+                tr.set_data(ys[k, max(0, i - trail):i, 1],
+                            ys[k, max(0, i - trail):i, 3])
+                for artist in (line, m1, m2, tr):
+                    ax.draw_artist(artist)
+            pipe.write(np.asarray(canvas.buffer_rgba())[:, :, :3])
+            counter.update()
+    finally:
+        if pipe is not None:
+            pipe.close()
+        plt.close(fig)
+
+    return filename, counter.fps
+
+
 def __run_basic_example():
     import simulation
     while True:
@@ -0,0 +1,136 @@
+"""Timing comparisons of the different simulation paths.
+
+Run as a script: `python benchmark.py`.
+"""
+
+import multiprocessing
+import random
+import time
+
+import numpy as np
+
+from pendulum import FastDoublePendulum, HAVE_NUMBA
+from simulation import (create_random_example, create_perturbations,
+                        simulate, simulate_adaptive,
+                        simulate_multiple_examples, simulate_batch)
+from animations import sample_frames
+from methods import RK4, BS32, DOPRI54
+
+
+def timed(func, *args, **kwargs):
+    """Calls `func` and returns tuple (result, elapsed seconds)."""
+    t0 = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def compare_batch(number, duration=2, step_size=0.001, method=RK4, seed=0):
+    """Compares `simulate_multiple_examples` with `simulate_batch` for an
+    ensemble of `number` perturbations.
+
+    Returns:
+        tuple (scalar seconds, batch seconds, max abs difference of `ys`)
+    """
+    random.seed(seed)
+    exes = create_perturbations(number, create_random_example(), amount=1e-6)
+    scalar, t_scalar = timed(simulate_multiple_examples,
+                             exes, method, duration, step_size)
+    batch, t_batch = timed(simulate_batch, exes, method, duration, step_size)
+    diff = max(np.abs(s.ys - b.ys).max() for s, b in zip(scalar, batch))
+    return t_scalar, t_batch, diff
+
+
+def compare_fast_rhs(duration=5, step_size=0.001, method=RK4, seed=0):
+    """Compares `DoublePendulum` with `FastDoublePendulum` (pure Python and,
+    if available, Numba kernels) on one simulation.
+
+    Returns:
+        list of tuples (label, seconds, max abs difference of `ys`)
+    """
+    random.seed(seed)
+    ex = create_random_example()
+    ref, t_ref = timed(simulate, ex, method, duration, step_size)
+    results = [('dense solve', t_ref, 0.0)]
+    for use_numba in ([False, True] if HAVE_NUMBA else [False]):
+        fast = FastDoublePendulum(ex._b1, ex._b2, use_numba=use_numba)
+        res, t = timed(simulate, fast, method, duration, step_size)
+        label = 'closed form' + (' (numba)' if use_numba else '')
+        results.append((label, t, np.abs(res.ys - ref.ys).max()))
+    return results
+
+
+def __run_fast_rhs_benchmark():
+    print('{:>22} {:>10} {:>10}'.format('right-hand side', 'time', 'max diff'))
+    for label, t, diff in compare_fast_rhs():
+        print('{:>22} {:>9.2f}s {:>10.1e}'.format(label, t, diff))
+
+
+def compare_adaptive(duration=30, step_size=0.001, tols=(1e-6, 1e-8), seed=0):
+    """Compares fixed-step RK4 with the adaptive embedded pairs, sampled
+    at 50 fps frame times.
+
+    Returns:
+        list of tuples (label, seconds, stored bytes, max abs difference of
+        frame `ys` from RK4)
+    """
+    random.seed(seed)
+    ex = create_random_example()
+    ref, t_ref = timed(simulate, ex, RK4, duration, step_size)
+    ref_frames = ref.ys[::int(round(0.02 / step_size))]
+    results = [('RK4 h={}'.format(step_size), t_ref, ref.ys.nbytes, 0.0)]
+    for method in (BS32, DOPRI54):
+        for tol in tols:
+            res, t = timed(simulate_adaptive, ex, method, duration,
+                           rtol=tol, atol=tol * 1e-3)
+            frames = sample_frames(res).ys
+            label = '{} rtol={:.0e}'.format(method.name, tol)
+            stored = res.ys.nbytes + res.dys.nbytes
+            results.append((label, t, stored, np.abs(frames - ref_frames).max()))
+    return results
+
+
+def __run_adaptive_benchmark():
+    print('{:>36} {:>10} {:>10} {:>10}'.format('method', 'time', 'memory', 'max diff'))
+    for label, t, stored, diff in compare_adaptive(duration=10):
+        print('{:>36} {:>9.2f}s {:>8.0f}kB {:>10.1e}'.format(
+            label, t, stored / 1024, diff))
+
+
+def compare_parallel(number, workers, duration=2, step_size=0.001, method=RK4, seed=0):
+    """Compares serial `simulate_multiple_examples` with its process-pool
+    mode for an ensemble of `number` perturbations.
+
+    Returns:
+        tuple (serial seconds, parallel seconds, max abs difference of `ys`)
+    """
+    random.seed(seed)
+    exes = create_perturbations(number, create_random_example(), amount=1e-6)
+    serial, t_serial = timed(simulate_multiple_examples,
+                             exes, method, duration, step_size)
+    parallel, t_parallel = timed(simulate_multiple_examples,
+                                 exes, method, duration, step_size, workers)
+    diff = max(np.abs(s.ys - p.ys).max() for s, p in zip(serial, parallel))
+    return t_serial, t_parallel, diff
+
+
+def __run_parallel_benchmark():
+    workers = multiprocessing.cpu_count()
+    t_serial, t_parallel, diff = compare_parallel(4 * workers, workers)
+    print('{} workers: serial {:.2f}s, parallel {:.2f}s, max diff {:.1e}'.format(
+        workers, t_serial, t_parallel, diff))
+
+
+def __run_batch_benchmark():
+    print('{:>8} {:>10} {:>10} {:>8} {:>10}'.format(
+        'members', 'scalar', 'batch', 'speedup', 'max diff'))
+    for number in (1, 10, 100):
+        t_scalar, t_batch, diff = compare_batch(number)
+        print('{:>8} {:>9.2f}s {:>9.2f}s {:>7.1f}x {:>10.1e}'.format(
+            number, t_scalar, t_batch, t_scalar / t_batch, diff))
+
+
+if __name__ == '__main__':
+    __run_fast_rhs_benchmark()
+    __run_adaptive_benchmark()
+    __run_batch_benchmark()
+    __run_parallel_benchmark()
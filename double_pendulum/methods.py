@@ -13,6 +13,10 @@ butcher = namedtuple('Butcher', 'name A b c')
 # partitioned half-explicit methods
 butcher_phem = namedtuple('Butcher', 'name A b c A_hat')
 
+# embedded pairs: `b` gives a solution of order `order`,
+# `b_hat` a lower order one used for error estimation
+butcher_emb = namedtuple('Butcher', 'name A b c b_hat order')
+
 r3 = 3**0.5
 r6 = 6**0.5
 r15 = 15**0.5
@@ -129,6 +133,29 @@ dopri_a_hat[6] = [-18611506045861 / 19738176307200,
 DOPRI5 = butcher_phem('DOPRI5', dopri_a, dopri_b, dopri_c, dopri_a_hat)
 
 
+##################
+# EMBEDDED PAIRS #
+##################
+
+bs32_a = np.zeros((4, 4))
+bs32_a[1, 0] = 1 / 2
+bs32_a[2, :2] = [0, 3 / 4]
+bs32_a[3, :3] = [2 / 9, 1 / 3, 4 / 9]
+bs32_b = bs32_a[-1]
+bs32_c = np.array([0, 1 / 2, 3 / 4, 1])
+bs32_b_hat = np.array([7 / 24, 1 / 4, 1 / 3, 1 / 8])
+
+BS32 = butcher_emb('Bogacki-Shampine (3/2)', bs32_a, bs32_b, bs32_c,
+                   bs32_b_hat, 3)
+
+
+dopri54_b_hat = np.array([5179 / 57600, 0, 7571 / 16695, 393 / 640,
+                          -92097 / 339200, 187 / 2100, 1 / 40])
+
+DOPRI54 = butcher_emb('Dormand-Prince (5/4)', dopri_a, dopri_b, dopri_c,
+                      dopri54_b_hat, 5)
+
+
 ####################
 # IMPLICIT METHODS #
 ####################
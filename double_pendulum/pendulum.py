@@ -1,6 +1,13 @@
 from collections import namedtuple
 import numpy as np
 
+try:
+    import numba
+
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
 
 np.seterr(over='raise')
 
@@ -131,6 +138,259 @@ class DoublePendulum:
                                             "initial values. Try setting velocities to zero.")
 
 
+def _schur_z(y, m_inv, f):
+    """Lagrange multipliers `(z0, z1)` of a double pendulum.
+
+    The 6x6 saddle-point system of `DoublePendulum.get_dy` is reduced to
+    its 2x2 Schur complement `S = G @ M_inv @ G.T` (M is diagonal), solved
+    in closed form. Shared by `_fast_dy` and `_fast_z`.
+
+    Args:
+        y (sequence, (8,)): <x1, x2, y1, y2, u1, u2, v1, v2>
+        m_inv (sequence, (4,)): diagonal of inverse mass matrix
+        f (sequence, (4,)): vector of gravitational forces
+    """
+    x1, x2, y1, y2, u1, u2, v1, v2 = y[0], y[1], y[2], y[3], y[4], y[5], y[6], y[7]
+    dx, dy, du, dv = x2 - x1, y2 - y1, u2 - u1, v2 - v1
+    a0, a1, a2, a3 = m_inv[0] * f[0], m_inv[1] * f[1], m_inv[2] * f[2], m_inv[3] * f[3]
+
+    s00 = m_inv[0] * x1 * x1 + m_inv[2] * y1 * y1
+    s01 = -m_inv[0] * x1 * dx - m_inv[2] * y1 * dy
+    s11 = (m_inv[0] + m_inv[1]) * dx * dx + (m_inv[2] + m_inv[3]) * dy * dy
+    r0 = x1 * a0 + y1 * a2 + u1 * u1 + v1 * v1
+    r1 = dx * (a1 - a0) + dy * (a3 - a2) + du * du + dv * dv
+
+    det = s00 * s11 - s01 * s01
+    return (s11 * r0 - s01 * r1) / det, (s00 * r1 - s01 * r0) / det
+
+
+if HAVE_NUMBA:
+    # plain Python when called from Python, inlined into the jitted kernels
+    _schur_z = numba.extending.register_jitable(_schur_z)
+
+
+def _fast_dy(y, m_inv, f, out):
+    """Closed-form `y' = dy/dt` of a double pendulum, written into `out`.
+
+    The multipliers `z` come from `_schur_z`; then
+    `du = M_inv @ (f - G.T @ z)`.
+
+    Args:
+        y (sequence, (8,)): <x1, x2, y1, y2, u1, u2, v1, v2>
+        m_inv (sequence, (4,)): diagonal of inverse mass matrix
+        f (sequence, (4,)): vector of gravitational forces
+        out (np.array, (8,)): output buffer
+    """
+    x1, x2, y1, y2, u1, u2, v1, v2 = y[0], y[1], y[2], y[3], y[4], y[5], y[6], y[7]
+    dx, dy = x2 - x1, y2 - y1
+    z0, z1 = _schur_z(y, m_inv, f)
+
+    out[0], out[1], out[2], out[3] = u1, u2, v1, v2
+    out[4] = m_inv[0] * (f[0] - x1 * z0 + dx * z1)
+    out[5] = m_inv[1] * (f[1] - dx * z1)
+    out[6] = m_inv[2] * (f[2] - y1 * z0 + dy * z1)
+    out[7] = m_inv[3] * (f[3] - dy * z1)
+
+
+def _fast_z(y, m_inv, f, out):
+    """Closed-form Lagrange multipliers of a double pendulum, written into
+    `out` (see `_schur_z`).
+
+    Args:
+        y (sequence, (8,)): <x1, x2, y1, y2, u1, u2, v1, v2>
+        m_inv (sequence, (4,)): diagonal of inverse mass matrix
+        f (sequence, (4,)): vector of gravitational forces
+        out (np.array, (2,)): output buffer
+    """
+    out[0], out[1] = _schur_z(y, m_inv, f)
+
+
+if HAVE_NUMBA:
+    _fast_dy_jit = numba.njit(cache=True)(_fast_dy)
+    _fast_z_jit = numba.njit(cache=True)(_fast_z)
+
+
+class FastDoublePendulum(DoublePendulum):
+    """Double pendulum with a fast evaluation of `get_dy` and `get_z`.
+
+    Instead of assembling and solving the dense 6x6 system on every call,
+    the 2x2 multiplier system is eliminated in closed form (see `_fast_dy`).
+    The diagonal of `M_inv` and the forces `f` are kept as flat arrays
+    across calls, and when Numba is installed the kernels are compiled.
+    Results match `DoublePendulum` to round-off (~1e-12).
+    """
+
+    def __init__(self, body_1, body_2, use_numba=HAVE_NUMBA):
+        """Initializes fast double pendulum instance.
+
+        Args:
+            body_1, body_2 (namedtuple): see `DoublePendulum`
+            use_numba (bool): use Numba-compiled kernels. Defaults to True
+                if Numba is installed.
+        """
+        if use_numba and not HAVE_NUMBA:
+            raise ImportError("use_numba=True requires numba to be installed")
+        m_inv = 1 / np.array([body_1.m, body_2.m, body_1.m, body_2.m], dtype=float)
+        f = -g * np.array([0, 0, body_1.m, body_2.m], dtype=float)
+        self._use_numba = use_numba
+        if use_numba:
+            self._m_inv, self._f = m_inv, f
+            self._dy_kernel, self._z_kernel = _fast_dy_jit, _fast_z_jit
+        else:
+            # plain floats are much faster than numpy scalars in Python code
+            self._m_inv, self._f = m_inv.tolist(), f.tolist()
+            self._dy_kernel, self._z_kernel = _fast_dy, _fast_z
+        super().__init__(body_1, body_2)
+
+    def get_z(self, y):
+        """Calculate Lagrange multipliers for `y`. See `DoublePendulum.get_z`.
+
+        Args:
+            y (np.array, (8,)): <x1, x2, y1, y2, u1, u2, v1, v2>
+
+        Returns:
+            np.array, (2,)
+        """
+        out = np.empty(2)
+        self._z_kernel(self._as_input(y), self._m_inv, self._f, out)
+        return self._check_finite(out)
+
+    def get_dy(self, y):
+        """Calculate `y' = dy/dt`. See `DoublePendulum.get_dy`.
+
+        Args:
+            y (np.array, (8,)): <x1, x2, y1, y2, u1, u2, v1, v2>
+
+        Returns:
+            np.array, (8,): <dx1, dx2, dy1, dy2, du1, du2, dv1, dv2>
+        """
+        out = np.empty(8)
+        self._dy_kernel(self._as_input(y), self._m_inv, self._f, out)
+        return self._check_finite(out)
+
+    def _as_input(self, y):
+        y = np.asarray(y, dtype=float)
+        return y if self._use_numba else y.tolist()
+
+    @staticmethod
+    def _check_finite(x):
+        """Raises `FloatingPointError` like the dense path does under
+        `np.seterr(over='raise')`, so unstable simulations can be detected."""
+        if not np.isfinite(x).all():
+            raise FloatingPointError("non-finite value encountered")
+        return x
+
+
+class DoublePendulumEnsemble:
+    """Ensemble of double pendulums which are evaluated together.
+
+    Has the same `get_dy`/`get_z` interface as `DoublePendulum`, but works
+    on stacked states `y` of shape (N, 8). The N saddle-point systems are
+    solved with a single stacked `np.linalg.solve` call.
+
+    Attributes:
+        examples (list of `DoublePendulum` class instances)
+        M     (np.array, (N, 4, 4)): mass matrices
+        M_inv (np.array, (N, 4, 4)): inverses of mass matrices
+        f     (np.array, (N, 4)):    vectors of gravitational forces
+        y_0   (np.array, (N, 8)):    initial positions and velocities
+        z_0   (np.array, (N, 2)):    initial Lagrange multipliers
+    """
+
+    def __init__(self, examples):
+        """Initializes double pendulum ensemble instance.
+
+        Args:
+            examples (list of `DoublePendulum` class instances)
+        """
+        self.examples = list(examples)
+        self.M = np.array([ex.M for ex in self.examples])
+        self.M_inv = np.array([ex.M_inv for ex in self.examples])
+        self.f = np.array([ex.f[:, 0] for ex in self.examples])
+        self.y_0 = np.array([ex.y_0 for ex in self.examples])
+        self.z_0 = self.get_z(self.y_0)
+
+    def __len__(self):
+        return len(self.examples)
+
+    def get_z(self, y):
+        """Calculate Lagrange multipliers for all members of the ensemble.
+
+        Args:
+            y (np.array, (N, 8)): rows of <x1, x2, y1, y2, u1, u2, v1, v2>
+
+        Returns:
+            np.array, (N, 2)
+        """
+        G = self.get_G(y)
+        g_uu = self.get_g_uu(y)
+        G_Mi = G @ self.M_inv
+
+        A = G_Mi @ G.transpose(0, 2, 1)
+        b = G_Mi @ self.f[:, :, None] + g_uu[:, :, None]
+        return np.linalg.solve(A, b)[:, :, 0]
+
+    def get_dy(self, y):
+        """Calculate `y' = dy/dt` for all members of the ensemble.
+        See `DoublePendulum.get_dy`.
+
+        Args:
+            y (np.array, (N, 8)): rows of <x1, x2, y1, y2, u1, u2, v1, v2>
+
+        Returns:
+            np.array, (N, 8): rows of <dx1, dx2, dy1, dy2, du1, du2, dv1, dv2>
+        """
+        n = len(y)
+        G = self.get_G(y)
+
+        A = np.zeros((n, 6, 6))
+        b = np.empty((n, 6, 1))
+
+        A[:, :4, :4] = self.M
+        A[:, :4, -2:] = G.transpose(0, 2, 1)
+        A[:, -2:, :4] = G
+
+        b[:, :4, 0] = self.f
+        b[:, -2:, 0] = -1 * self.get_g_uu(y)
+
+        x = np.linalg.solve(A, b)
+        return np.concatenate((y[:, -4:], x[:, :4, 0]), axis=1)
+
+    @staticmethod
+    def get_G(y):
+        """Calculate matrices `G = grad(g)` for stacked states.
+
+        Args:
+            y (np.array, (N, 8))
+
+        Returns:
+            np.array, (N, 2, 4)
+        """
+        x1, x2, y1, y2 = y[:, :4].T
+        G = np.zeros((len(y), 2, 4))
+        G[:, 0, 0] = x1
+        G[:, 0, 2] = y1
+        G[:, 1, 0] = -(x2 - x1)
+        G[:, 1, 1] = x2 - x1
+        G[:, 1, 2] = -(y2 - y1)
+        G[:, 1, 3] = y2 - y1
+        return G
+
+    @staticmethod
+    def get_g_uu(y):
+        """Calculate vectors `g_uu = G' @ u` for stacked states.
+
+        Args:
+            y (np.array, (N, 8))
+
+        Returns:
+            np.array, (N, 2)
+        """
+        u1, u2, v1, v2 = y[:, -4:].T
+        return np.stack((u1**2 + v1**2,
+                         (u2 - u1)**2 + (v2 - v1)**2), axis=1)
+
+
 class InconsistentInitialValues(Exception):
     pass
 
@@ -1,8 +1,13 @@
+import multiprocessing
+from multiprocessing import shared_memory
 import random
 
-from pendulum import Pendulum, DoublePendulum
-from RK_DAE_solver import ERK_DAE1
-from methods import Euler, ExplicitMidpoint, RK4, DOPRI5
+import numpy as np
+
+from pendulum import (Pendulum, DoublePendulum, FastDoublePendulum,
+                      DoublePendulumEnsemble)
+from RK_DAE_solver import ERK_DAE1, BatchERK_DAE1, AdaptiveERK_DAE1, BatchMember
+from methods import butcher, Euler, ExplicitMidpoint, RK4, DOPRI5, DOPRI54
 
 
 def random_initial_values(p_mag, m_mag=5):
@@ -25,7 +30,7 @@ def random_initial_values(p_mag, m_mag=5):
     return (m, x, y)
 
 
-def create_random_example(p1_mag=4, p2_mag=6, m1_mag=5, m2_mag=5):
+def create_random_example(p1_mag=4, p2_mag=6, m1_mag=5, m2_mag=5, fast=False):
     """Creates a random double pendulum example.
 
     Positions and masses are chosen via `random_initial_values` function,
@@ -35,6 +40,8 @@ def create_random_example(p1_mag=4, p2_mag=6, m1_mag=5, m2_mag=5):
         p1_mag, p2_mag (float): magnitudes of the maximum allowed position
             coordinate for each pendulum
         m1_mag, m2_mag (float): magnitude of the highest allowed mass
+        fast (bool): create `FastDoublePendulum`, which evaluates `get_dy`
+            and `get_z` in closed form
 
     Returns:
         `DoublePendulum` class instance
@@ -44,7 +51,7 @@ def create_random_example(p1_mag=4, p2_mag=6, m1_mag=5, m2_mag=5):
 
     p1 = Pendulum(*p1_0, u=0, v=0)
     p2 = Pendulum(*p2_0, u=0, v=0)
-    dp = DoublePendulum(p1, p2)
+    dp = FastDoublePendulum(p1, p2) if fast else DoublePendulum(p1, p2)
     return dp
 
 
@@ -60,7 +67,7 @@ def create_perturbations(number, ex=None, amount=1e-6):
             coordinate of the second pendulum.
 
     Returns:
-        list of `DoublePendulum` class instances
+        list of class instances of the same type as `ex`
     """
     if ex is None:
         ex = create_random_example()
@@ -73,7 +80,7 @@ def create_perturbations(number, ex=None, amount=1e-6):
                           (p1.y + n * amount), p1.u, p1.v)
         p2_per = Pendulum(p2.m, (p2.x + n * amount),
                           (p2.y - n * amount), p2.u, p2.v)
-        examples.append(DoublePendulum(p1_per, p2_per))
+        examples.append(type(ex)(p1_per, p2_per))
     return examples
 
 
@@ -93,7 +100,28 @@ def simulate(example, method=RK4, duration=30, step_size=0.001):
     return ERK_DAE1(example, method, duration, step_size).solve()
 
 
-def simulate_multiple_methods(example, methods, duration=30, step_size=0.001):
+def simulate_adaptive(example, method=DOPRI54, duration=30, rtol=1e-6, atol=1e-9):
+    """Solves `example` with an embedded Runge-Kutta pair and adaptive
+    time-steps.
+
+    Only the accepted steps are stored; use `resample` on the result to get
+    the solution on a uniform grid (e.g. animation frames).
+
+    Args:
+        example (class instance): the example we want to solve, e.g. `DoublePendulum`
+        method (namedtuple): embedded Runge-Kutta pair defined in `methods.py`
+        duration (int): total duration of the simulation
+        rtol, atol (float): relative and absolute error tolerances
+
+    Returns:
+        `AdaptiveERK_DAE1` class instance with the results in `ys` and `zs`
+        attributes.
+    """
+    return AdaptiveERK_DAE1(example, method, duration, rtol, atol).solve()
+
+
+def simulate_multiple_methods(example, methods, duration=30, step_size=0.001,
+                              workers=None):
     """Solve one example with different methods.
 
     Args:
@@ -103,14 +131,21 @@ def simulate_multiple_methods(example, methods, duration=30, step_size=0.001):
         duration (int): total duration of the simulation
         step_size (float): size of a time-step. Too high value might produce
             unstable results.
+        workers (int): if given (and > 1), methods are solved in a pool of
+            `workers` processes, see `simulate_parallel`
 
     Returns:
-        list of `ERK_DAE1` class instances
+        list of `ERK_DAE1` class instances (`BatchMember` namedtuples
+        if `workers` is used)
     """
+    if workers is not None and workers > 1:
+        return simulate_parallel([(example, method) for method in methods],
+                                 duration, step_size, workers)
     return [simulate(example, method, duration, step_size) for method in methods]
 
 
-def simulate_multiple_examples(examples, method=RK4, duration=30, step_size=0.001):
+def simulate_multiple_examples(examples, method=RK4, duration=30, step_size=0.001,
+                               workers=None):
     """Solve multiple examples. Usually used in conjunction with
     `create_perturbations` function.
 
@@ -121,13 +156,106 @@ def simulate_multiple_examples(examples, method=RK4, duration=30, step_size=0.00
         duration (int): total duration of the simulation
         step_size (float): size of a time-step. Too high value might produce
             unstable results.
+        workers (int): if given (and > 1), examples are solved in a pool of
+            `workers` processes, see `simulate_parallel`
 
     Returns:
-        list of `ERK_DAE1` class instances
+        list of `ERK_DAE1` class instances (`BatchMember` namedtuples
+        if `workers` is used)
     """
+    if workers is not None and workers > 1:
+        return simulate_parallel([(ex, method) for ex in examples],
+                                 duration, step_size, workers)
     return [simulate(ex, method, duration, step_size) for ex in examples]
 
 
+def _simulate_into_shared(task):
+    """Worker of `simulate_parallel`: solves one (example, method) pair and
+    writes its results into slot `i` of the shared `ys` and `zs` buffers."""
+    i, ex_type, bodies, method, duration, step_size, ys_spec, zs_spec = task
+    ex = ex_type(*bodies)
+    method = butcher(*method)
+    r = ERK_DAE1(ex, method, duration, step_size).solve()
+    for (name, shape), result in ((ys_spec, r.ys), (zs_spec, r.zs)):
+        shm = shared_memory.SharedMemory(name=name)
+        try:
+            np.ndarray(shape, dtype=float, buffer=shm.buf)[i] = result
+        finally:
+            shm.close()
+    return i
+
+
+def simulate_parallel(tasks, duration=30, step_size=0.001, workers=None):
+    """Solves (example, method) pairs in a pool of worker processes.
+
+    Each worker rebuilds its example from the initial values of the two
+    pendulums (and the method from its tableau, as the `Butcher` namedtuples
+    can't be pickled by name) and writes `ys`/`zs` into shared-memory buffers, so the
+    results are not pickled back. Examples should be created (e.g. with
+    `create_random_example`) in the calling process; that keeps the random
+    sequence, and so the results, the same as in serial runs, and the
+    results are returned in the order of `tasks`, whatever the order in
+    which workers finish.
+
+    Args:
+        tasks (list of tuples (example, method)): examples (`DoublePendulum`
+            class instances) and explicit Runge-Kutta methods to solve them with
+        duration (int): total duration of the simulation
+        step_size (float): size of a time-step. Too high value might produce
+            unstable results.
+        workers (int): number of processes, defaults to the number of CPUs
+
+    Returns:
+        list of `BatchMember` namedtuples with the results in `ys` and `zs`
+        attributes
+    """
+    ts = ERK_DAE1._get_time_steps(duration, step_size)
+    ys_shape = (len(tasks), len(ts), len(tasks[0][0].y_0))
+    zs_shape = (len(tasks), len(ts), len(tasks[0][0].z_0))
+    ys_shm = shared_memory.SharedMemory(create=True, size=8 * int(np.prod(ys_shape)))
+    zs_shm = shared_memory.SharedMemory(create=True, size=8 * int(np.prod(zs_shape)))
+    try:
+        jobs = [(i, type(ex), (ex._b1, ex._b2),
+                 (method.name, method.A, method.b, method.c),
+                 duration, step_size,
+                 (ys_shm.name, ys_shape), (zs_shm.name, zs_shape))
+                for i, (ex, method) in enumerate(tasks)]
+        chunksize = max(1, len(jobs) // (4 * (workers or multiprocessing.cpu_count())))
+        with multiprocessing.Pool(workers) as pool:
+            for _ in pool.imap_unordered(_simulate_into_shared, jobs, chunksize):
+                pass
+        ys = np.ndarray(ys_shape, dtype=float, buffer=ys_shm.buf).copy()
+        zs = np.ndarray(zs_shape, dtype=float, buffer=zs_shm.buf).copy()
+    finally:
+        for shm in (ys_shm, zs_shm):
+            shm.close()
+            shm.unlink()
+    return [BatchMember(method.name, step_size, ts, ys[i], zs[i])
+            for i, (_, method) in enumerate(tasks)]
+
+
+def simulate_batch(examples, method=RK4, duration=30, step_size=0.001):
+    """Solve multiple examples together, advancing all of them with one
+    stacked linear solve per Runge-Kutta stage.
+
+    Gives the same results as `simulate_multiple_examples` (up to round-off),
+    but is much faster for large ensembles, e.g. from `create_perturbations`.
+
+    Args:
+        examples (list of `DoublePendulum` class instances)
+        method (namedtuple): explicit Runge-Kutta method defined in `methods.py`
+        duration (int): total duration of the simulation
+        step_size (float): size of a time-step. Too high value might produce
+            unstable results.
+
+    Returns:
+        list of `BatchMember` namedtuples with the results in `ys` and `zs`
+        attributes
+    """
+    ensemble = DoublePendulumEnsemble(examples)
+    return BatchERK_DAE1(ensemble, method, duration, step_size).solve().members()
+
+
 def __run_basic_example():
     rsys = create_random_example()
     r1 = simulate(rsys, method=Euler, duration=15)
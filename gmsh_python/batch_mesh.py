@@ -0,0 +1,336 @@
+"""Batch meshing with a pool of warm gmsh workers.
+
+multi_process.py starts one process per model and pays for gmsh.initialize()
+and finalize() every time. For hundreds of parts it is cheaper to keep a few
+worker processes with gmsh initialized, send them jobs (a STEP file or a
+geometry function plus per-job options) and get the mesh back as numpy arrays.
+Arrays are written by the worker into a shared memory block, the parent only
+receives its name and layout, so large meshes are not pickled through a pipe.
+
+    jobs = [MeshJob("part%d" % i, step=f) for i, f in enumerate(files)]
+    with BatchMesher(processes=4) as mesher:
+        for result in mesher.imap(jobs):
+            print(result.name, result.elements_per_second)
+            ...  # use result.nodes / result.elements
+            result.release()
+        mesher.report()
+"""
+
+import os
+import sys
+import time
+import atexit
+import multiprocessing
+from multiprocessing import resource_tracker, shared_memory
+from collections import namedtuple
+
+import numpy as np
+
+# name: label of the job, also the gmsh model name
+# step: STEP (or any OCC importable) file, or None
+# geometry: picklable function geometry(gmsh) building the model, or None
+# dim: dimension of the mesh to generate and return
+# options: {"Mesh.MeshSizeMax": 0.1, ...}, numbers or strings
+MeshJob = namedtuple("MeshJob", ["name", "step", "geometry", "dim", "options"])
+MeshJob.__new__.__defaults__ = (None, None, 3, None)
+
+
+def _init_worker(options):
+    import gmsh
+
+    gmsh.initialize(readConfigFiles=False, interruptible=False)
+    gmsh.option.setNumber("General.Terminal", 0)
+    _set_options(gmsh, options or {})
+    atexit.register(gmsh.finalize)
+
+
+def _set_options(gmsh, options):
+    """Set gmsh options, return the previous values."""
+    previous = {}
+    for name, value in options.items():
+        if isinstance(value, str):
+            previous[name] = gmsh.option.getString(name)
+            gmsh.option.setString(name, value)
+        else:
+            previous[name] = gmsh.option.getNumber(name)
+            gmsh.option.setNumber(name, value)
+    return previous
+
+
+def _mesh_arrays(gmsh, dim):
+    """Nodes, node tags and {element type: connectivity} of the current mesh.
+
+    Connectivity is given as 0-based row indices into nodes.
+    """
+    node_tags, coords, _ = gmsh.model.mesh.getNodes()
+    node_tags = np.asarray(node_tags, dtype=np.int64)
+    nodes = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+    order = np.argsort(node_tags)
+    sorted_tags = node_tags[order]
+    elements = {}
+    types, _, conn = gmsh.model.mesh.getElements(dim)
+    for etype, enodes in zip(types, conn):
+        num_nodes = gmsh.model.mesh.getElementProperties(etype)[3]
+        index = order[np.searchsorted(sorted_tags, np.asarray(enodes, dtype=np.int64))]
+        elements[int(etype)] = index.reshape(-1, num_nodes)
+    return nodes, node_tags, elements
+
+
+def _create_shared(size):
+    """Shared memory block not tracked by this (worker) process.
+
+    Otherwise the worker's resource tracker would unlink or warn about the
+    block when the worker exits, although the parent still uses it.
+    """
+    try:
+        return shared_memory.SharedMemory(create=True, size=size, track=False)
+    except TypeError:  # Python < 3.13
+        shm = shared_memory.SharedMemory(create=True, size=size)
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _to_shared(arrays):
+    """Copy named arrays into one shared memory block.
+
+    Returns the block name and the layout [(key, dtype, shape, offset)].
+    """
+    layout = []
+    offset = 0
+    for key, a in arrays:
+        offset = (offset + 63) // 64 * 64
+        layout.append((key, a.dtype.str, a.shape, offset))
+        offset += a.nbytes
+    shm = _create_shared(max(offset, 1))
+    for (key, a), (_, dtype, shape, start) in zip(arrays, layout):
+        np.ndarray(shape, dtype, buffer=shm.buf, offset=start)[...] = a
+    name = shm.name
+    # The parent owns the block from now on and unlinks it in release().
+    shm.close()
+    return name, layout
+
+
+def _run_job(args):
+    index, job = args
+    import gmsh
+
+    start = time.perf_counter()
+    previous = {}
+    try:
+        gmsh.clear()
+        gmsh.model.add(job.name)
+        previous = _set_options(gmsh, job.options or {})
+        if job.step is not None:
+            gmsh.model.occ.importShapes(job.step)
+            gmsh.model.occ.synchronize()
+        if job.geometry is not None:
+            job.geometry(gmsh)
+            gmsh.model.occ.synchronize()
+        t_geometry = time.perf_counter() - start
+        gmsh.model.mesh.generate(job.dim)
+        t_mesh = time.perf_counter() - start - t_geometry
+        nodes, node_tags, elements = _mesh_arrays(gmsh, job.dim)
+        arrays = [("nodes", nodes), ("node_tags", node_tags)]
+        arrays += [("elements_%d" % etype, conn) for etype, conn in elements.items()]
+        shm_name, layout = _to_shared(arrays)
+        error = None
+    except Exception as e:
+        shm_name, layout = None, []
+        t_geometry = t_mesh = 0.0
+        error = "%s: %s" % (type(e).__name__, e)
+    finally:
+        try:
+            _set_options(gmsh, previous)
+        except Exception:
+            pass
+    timing = {
+        "geometry": t_geometry,
+        "mesh": t_mesh,
+        "total": time.perf_counter() - start,
+    }
+    return index, job.name, shm_name, layout, timing, os.getpid(), error
+
+
+class MeshResult(object):
+    """Mesh of one job, arrays are views into a shared memory block.
+
+    Call release() (or use it as a context manager) once the arrays are no
+    longer needed, or copy() them first to keep them.
+    """
+
+    def __init__(self, index, name, shm_name, layout, timing, pid, error):
+        self.index = index
+        self.name = name
+        self.timing = timing
+        self.pid = pid
+        self.error = error
+        self.nodes = None
+        self.node_tags = None
+        self.elements = {}
+        self._shm = None
+        if shm_name is not None:
+            self._shm = shared_memory.SharedMemory(name=shm_name)
+            for key, dtype, shape, offset in layout:
+                a = np.ndarray(shape, dtype, buffer=self._shm.buf, offset=offset)
+                if key.startswith("elements_"):
+                    self.elements[int(key[len("elements_"):])] = a
+                else:
+                    setattr(self, key, a)
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @property
+    def num_elements(self):
+        return sum(len(conn) for conn in self.elements.values())
+
+    @property
+    def elements_per_second(self):
+        return self.num_elements / self.timing["mesh"] if self.timing["mesh"] > 0 else 0.0
+
+    def copy(self):
+        """Copy arrays out of shared memory and release it."""
+        self.nodes = None if self.nodes is None else self.nodes.copy()
+        self.node_tags = None if self.node_tags is None else self.node_tags.copy()
+        self.elements = {k: v.copy() for k, v in self.elements.items()}
+        self.release(keep_arrays=True)
+        return self
+
+    def release(self, keep_arrays=False):
+        if not keep_arrays:
+            self.nodes = self.node_tags = None
+            self.elements = {}
+        if self._shm is not None:
+            self._shm.close()
+            self._shm.unlink()
+            self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+    def __repr__(self):
+        if not self.ok:
+            return "MeshResult(%r, error=%r)" % (self.name, self.error)
+        return "MeshResult(%r, %d nodes, %d elements, %.2fs)" % (
+            self.name,
+            0 if self.nodes is None else len(self.nodes),
+            self.num_elements,
+            self.timing["total"],
+        )
+
+
+class BatchMesher(object):
+    """Pool of gmsh worker processes, each initialized once.
+
+    processes: number of workers (default: cpu count)
+    options: gmsh options set once in every worker
+             (e.g. {"General.NumThreads": 1} to avoid oversubscription)
+    maxtasksperchild: recycle a worker after that many jobs, bounds the memory
+                      gmsh may keep between models
+    """
+
+    def __init__(self, processes=None, options=None, maxtasksperchild=None):
+        self.processes = processes or os.cpu_count() or 1
+        self.options = options
+        self.pool = multiprocessing.Pool(
+            self.processes,
+            initializer=_init_worker,
+            initargs=(options,),
+            maxtasksperchild=maxtasksperchild,
+        )
+        self.stats = []
+        self._start = None
+
+    def imap(self, jobs, ordered=False):
+        """Mesh jobs, yield MeshResult as soon as each one is done.
+
+        With ordered=True results come in job order.
+        """
+        if self._start is None:
+            self._start = time.perf_counter()
+        tasks = list(enumerate(jobs))
+        run = self.pool.imap if ordered else self.pool.imap_unordered
+        for out in run(_run_job, tasks):
+            result = MeshResult(*out)
+            self.stats.append({
+                "name": result.name,
+                "pid": result.pid,
+                "error": result.error,
+                "nodes": 0 if result.nodes is None else len(result.nodes),
+                "elements": result.num_elements,
+                "elements_per_second": result.elements_per_second,
+                "geometry_time": result.timing["geometry"],
+                "mesh_time": result.timing["mesh"],
+                "wall_time": result.timing["total"],
+            })
+            yield result
+
+    def map(self, jobs):
+        """Mesh all jobs, return results in job order with arrays copied."""
+        return [result.copy() for result in self.imap(jobs, ordered=True)]
+
+    def report(self, file=None):
+        """Print per-job wall time and throughput, return the totals."""
+        file = file or sys.stdout
+        wall = time.perf_counter() - self._start if self._start else 0.0
+        for s in self.stats:
+            if s["error"]:
+                print("%-24s FAILED %s" % (s["name"], s["error"]), file=file)
+            else:
+                print("%-24s %9d elements %8.2fs %12.0f elem/s (pid %d)" % (
+                    s["name"], s["elements"], s["wall_time"],
+                    s["elements_per_second"], s["pid"]), file=file)
+        elements = sum(s["elements"] for s in self.stats)
+        totals = {
+            "jobs": len(self.stats),
+            "failed": sum(1 for s in self.stats if s["error"]),
+            "elements": elements,
+            "wall_time": wall,
+            "elements_per_second": elements / wall if wall > 0 else 0.0,
+        }
+        print("%(jobs)d jobs (%(failed)d failed), %(elements)d elements in "
+              "%(wall_time).2fs, %(elements_per_second).0f elem/s" % totals,
+              file=file)
+        return totals
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class Box(object):
+    """Picklable box geometry, usable as MeshJob.geometry."""
+
+    def __init__(self, x, y, z, dx, dy, dz):
+        self.args = (x, y, z, dx, dy, dz)
+
+    def __call__(self, gmsh):
+        gmsh.model.occ.addBox(*self.args)
+
+
+if __name__ == "__main__":
+    # 40 boxes with different mesh sizes plus the sample STEP file
+    jobs = [MeshJob("box%02d" % i, geometry=Box(0, 0, 0, 1, 1 + 0.05 * i, 1),
+                    options={"Mesh.MeshSizeMax": 0.05 + 0.002 * i})
+            for i in range(40)]
+    step = os.path.join(os.path.dirname(os.path.abspath(__file__)), "as1-tu-203.stp")
+    if os.path.exists(step):
+        jobs.append(MeshJob("as1-tu-203", step=step, dim=2))
+
+    with BatchMesher(options={"General.NumThreads": 1}) as mesher:
+        for result in mesher.imap(jobs):
+            with result:
+                if result.ok:
+                    # e.g. save result.nodes / result.elements here
+                    pass
+        mesher.report()
@@ -61,6 +61,12 @@ class context_clean(object):
         debug("FR", ifrq_linear_step, count, start_frequency, step_size, 0, 0, 0)
         self.context.fr_card(ifrq_linear_step, count, start_frequency, step_size)
 
+    def set_frequency_steps(self, start_frequency, step_size, count):
+        """ Linear sweep of count frequencies start_frequency, start_frequency + step_size, ... (both ends included, unlike set_frequencies_linear) """
+        ifrq_linear_step = 0
+        debug("FR", ifrq_linear_step, count, start_frequency, step_size, 0, 0, 0)
+        self.context.fr_card(ifrq_linear_step, int(count), start_frequency, step_size)
+
     def set_frequency(self, frequency):
         self.set_frequencies_linear(frequency, frequency)
 
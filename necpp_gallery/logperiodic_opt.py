@@ -9,6 +9,7 @@ from antenna_util import *
 from context_clean import *
 
 import math
+import multiprocessing
 
 """ Optimize and plot the gains/VSWR of a logperiodic antenna (6 brass elements, 75 Ohm transmission lines) for both the 2.4GHz as the 5.8GHz ISM bands.
     Inspired by an excercise for a course, hence the weird constraints. """
@@ -83,59 +84,135 @@ stop  = 5900
 count = stop - start
 
 
-def get_gain_swr_range(l_1, x_1, tau, start=start, stop=stop, step=10):
-    gains_db = []
-    frequencies = []
-    vswrs = []
-    for freq in range(start, stop + 1, step):
-        nec = geometry_logperiodic(l_1, x_1, tau)
-        nec.set_frequency(freq) # TODO: ensure that we don't need to re-generate this!
-        nec.radiation_pattern(thetas=Range(90, 90, count=1), phis=Range(180,180,count=1))
-
-        rp = nec.context.get_radiation_pattern(0)
-        ipt = nec.get_input_parameters(0)
-        z = ipt.get_impedance()
+# The two ISM bands the antenna is optimized for, in MHz
+ism_bands = [ (2400, 2500), (5725, 5875) ]
 
-        # Gains are in decibels
-        gains_db.append(rp.get_gain()[0])
-        vswrs.append(vswr(z, system_impedance))
-        frequencies.append(ipt.get_frequency())
 
-    return frequencies, gains_db, vswrs
+def input_impedance(ipt):
+    """ Newer PyNEC versions return the impedance of each excitation as an array """
+    return complex(np.ravel(ipt.get_impedance())[0])
 
-def create_optimization_target():
-  def target(args):
-      l_1, x_1, tau = args
-      if l_1 <= 0 or x_1 <= 0 or tau <= 0:
-          return float('inf')
 
-      try:
-        result = 0
+def get_gain_swr_bands(l_1, x_1, tau, bands, step=10):
+    """ Sweep several frequency bands (start, stop) in MHz on a single NEC context.
+        The geometry does not depend on the frequency (the segmentation uses the design wavelength), so it is
+        built once and each band is one FR card with NEC's own linear stepping. NEC keeps appending results,
+        so band i occupies the result indices following those of band i-1.
+        Returns a list of (frequencies, gains_db, vswrs) per band. """
+    nec = geometry_logperiodic(l_1, x_1, tau)
 
-        vswr_score = 0
-        gains_score = 0
+    results = []
+    index = 0
+    for band_start, band_stop in bands:
+        count = (band_stop - band_start) // step + 1
+        nec.set_frequency_steps(band_start, step, count)
+        nec.radiation_pattern(thetas=Range(90, 90, count=1), phis=Range(180,180,count=1))
 
-        for range_low, range_high in [ (2400, 2500), (5725, 5875) ]:
-            freqs, gains, vswrs = get_gain_swr_range(l_1, x_1, tau, start=range_low, stop=range_high)
+        gains_db = []
+        frequencies = []
+        vswrs = []
+        for i in range(index, index + count):
+            rp = nec.context.get_radiation_pattern(i)
+            ipt = nec.get_input_parameters(i)
 
-            for gain in gains:
-                gains_score += gain
-            for vswr in vswrs:
-                if vswr >= 1.8:
-                    vswr = np.exp(vswr) # a penalty :)
-                vswr_score += vswr
+            # Gains are in decibels
+            gains_db.append(rp.get_gain()[0])
+            vswrs.append(vswr(input_impedance(ipt), system_impedance))
+            frequencies.append(ipt.get_frequency())
+        index += count
 
-        # VSWR should minimal in both bands, gains maximal:
-        result = vswr_score - gains_score
+        results.append((frequencies, gains_db, vswrs))
 
-      except:
-          print("Caught exception")
-          return float('inf')
+    return results
 
-      print(result)
 
-      return result
-  return target
+def get_gain_swr_range(l_1, x_1, tau, start=start, stop=stop, step=10):
+    return get_gain_swr_bands(l_1, x_1, tau, [ (start, stop) ], step=step)[0]
+
+
+def design_score(args):
+    """ Objective of a design vector (l_1, x_1, tau), lower is better. Module level so it can run in a process pool. """
+    l_1, x_1, tau = args
+    if l_1 <= 0 or x_1 <= 0 or tau <= 0:
+        return float('inf')
+
+    try:
+      result = 0
+
+      vswr_score = 0
+      gains_score = 0
+
+      for freqs, gains, vswrs in get_gain_swr_bands(l_1, x_1, tau, ism_bands):
+          for gain in gains:
+              gains_score += gain
+          for vswr in vswrs:
+              if vswr >= 1.8:
+                  vswr = np.exp(vswr) # a penalty :)
+              vswr_score += vswr
+
+      # VSWR should minimal in both bands, gains maximal:
+      result = vswr_score - gains_score
+
+    except:
+        print("Caught exception")
+        return float('inf')
+
+    print(result)
+
+    return result
+
+
+class optimization_target(object):
+    """ Memoizing objective for scipy.optimize.
+        Scores are cached per (l_1, x_1, tau), so points the optimizer probes again (Nelder-Mead restarts,
+        the polishing step, ...) are not simulated twice. map() evaluates a whole population over a process pool
+        and is meant to be passed as differential_evolution(..., workers=target.map); it always evaluates this
+        objective, whatever function the optimizer hands it. """
+    def __init__(self, processes=None):
+        self.processes = processes
+        self.pool = None
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, args):
+        key = tuple(float(a) for a in args)
+        if key in self.cache:
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.cache[key] = design_score(key)
+        return self.cache[key]
+
+    def map(self, func, iterable):
+        keys = [ tuple(float(a) for a in args) for args in iterable ]
+        todo = list(dict.fromkeys(key for key in keys if key not in self.cache))
+        self.hits += len(keys) - len(todo)
+        self.misses += len(todo)
+        if len(todo) > 1 and self.processes != 1:
+            if self.pool is None:
+                self.pool = multiprocessing.Pool(self.processes)
+            scores = self.pool.map(design_score, todo)
+        else:
+            scores = [ design_score(key) for key in todo ]
+        self.cache.update(zip(todo, scores))
+        return [ self.cache[key] for key in keys ]
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def create_optimization_target(processes=None):
+  return optimization_target(processes)
 
 
 def simulate_and_get_impedance(nec):
@@ -144,7 +221,7 @@ def simulate_and_get_impedance(nec):
   nec.xq_card(0)
 
   index = 0
-  return nec.get_input_parameters(index).get_impedance()
+  return input_impedance(nec.get_input_parameters(index))
 
 system_impedance = 50 # This makes it a bit harder to optimize, given the 75 Ohm TLs, which is good for this excercise of course...
 
@@ -233,7 +310,10 @@ if (__name__ == '__main__'):
   # Use differential evolution:
   minimizer_kwargs = dict(method='Nelder-Mead')
   bounds = [ (0.01, 0.2), (0.01, 0.2), (0.7, 0.9) ]
-  optimized_result = scipy.optimize.differential_evolution(target, bounds, seed=42, disp=True, popsize=20)
+  # Each generation is evaluated over a process pool; repeated probes come from the cache
+  with target:
+    optimized_result = scipy.optimize.differential_evolution(target, bounds, seed=42, disp=True, popsize=20, workers=target.map, updating='deferred')
+  print("%d designs simulated, %d cached evaluations" % (target.misses, target.hits))
 
   # Basin hopping isn't so good, but could also have been an option:
   #optimized_result = scipy.optimize.basinhopping(target, np.array([initial_l1, initial_x1, initial_tau]), minimizer_kwargs=minimizer_kwargs, niter=5, stepsize=0.015, T=2.0, disp=True)
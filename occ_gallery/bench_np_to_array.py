@@ -0,0 +1,52 @@
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join("../"))
+from base import np_to_array2, array2_to_np, spl_surf, spl_surf_cache
+
+from OCC.Core.gp import gp_Pnt
+from OCC.Core.TColgp import TColgp_Array2OfPnt
+
+# Compare the per-point loop (as spl_face used to do it) with np_to_array2,
+# and a cold surface fit with a cached one, over grid sizes.
+
+
+def loop_to_array2(px, py, pz):
+    nx, ny = px.shape
+    pnt_2d = TColgp_Array2OfPnt(1, nx, 1, ny)
+    for row in range(pnt_2d.LowerRow(), pnt_2d.UpperRow() + 1):
+        for col in range(pnt_2d.LowerCol(), pnt_2d.UpperCol() + 1):
+            i, j = row - 1, col - 1
+            pnt = gp_Pnt(px[i, j], py[i, j], pz[i, j])
+            pnt_2d.SetValue(row, col, pnt)
+    return pnt_2d
+
+
+print("{:>6} {:>10} {:>10} {:>10} {:>10} {:>10}".format(
+    "grid", "loop", "np_to", "back", "fit", "cached"))
+for n in [50, 100, 200, 500]:
+    px, py = np.meshgrid(np.linspace(-1, 1, n), np.linspace(-1, 1, n))
+    pz = np.sin(3 * px) * np.cos(2 * py)
+    pts = np.stack([px, py, pz], axis=-1)
+
+    t0 = time.monotonic()
+    loop_to_array2(px, py, pz)
+    t1 = time.monotonic()
+    arr = np_to_array2(pts)
+    t2 = time.monotonic()
+    back = array2_to_np(arr)
+    t3 = time.monotonic()
+    assert np.allclose(back, pts)
+
+    times = [t1 - t0, t2 - t1, t3 - t2]
+    if n <= 200:  # interpolating 500x500 takes very long
+        spl_surf_cache.clear()
+        t4 = time.monotonic()
+        spl_surf(px, py, pz)
+        t5 = time.monotonic()
+        spl_surf(px, py, pz)
+        t6 = time.monotonic()
+        times += [t5 - t4, t6 - t5]
+    print("{:>6} ".format(n) + " ".join("{:>9.3f}s".format(t) for t in times))
@@ -21,6 +21,8 @@ import numpy as np
 import os
 import tempfile
 import sys
+import hashlib
+import json
 
 # Unit scaling: currently set to meters (no scale). If you later edit
 # coordinates that are in mm, change this to 1e-3 to convert mm->m.
@@ -141,9 +143,229 @@ def write_step(shape, filename):
     return sewed_shape
 
 
+# local node numbering of the 4 triangular faces / 6 edges of a linear tetra
+TET_FACES = np.array([[0, 1, 2], [0, 1, 3], [0, 2, 3], [1, 2, 3]])
+TET_EDGES = np.array([[0, 1], [0, 2], [0, 3], [1, 2], [1, 3], [2, 3]])
+
+
+def nodes_to_arrays(node_tags, node_coords):
+    """Return (sorted node tags, (N, 3) coordinates) from gmsh getNodes() output"""
+    tags = np.asarray(node_tags, dtype=np.int64)
+    xyz = np.asarray(node_coords, dtype=float).reshape(-1, 3)
+    if tags.size > 1 and np.any(tags[1:] < tags[:-1]):
+        order = np.argsort(tags, kind="stable")
+        tags, xyz = tags[order], xyz[order]
+    return tags, xyz
+
+
+def tags_to_index(sorted_tags, tags):
+    """Map gmsh node tags onto row indices of the sorted node array"""
+    tags = np.asarray(tags, dtype=np.int64)
+    if sorted_tags.size == 0:
+        if tags.size:
+            raise KeyError("element references node tags missing from the node list")
+        return np.zeros(tags.shape, dtype=np.intp)
+    idx = np.searchsorted(sorted_tags, tags)
+    idx[idx == sorted_tags.size] = 0
+    if not np.array_equal(sorted_tags[idx], tags):
+        raise KeyError("element references node tags missing from the node list")
+    return idx
+
+
+def unique_rows(rows, return_counts=False):
+    """np.unique over rows with the node order inside each row ignored
+
+    When the node indices are small enough the sorted rows are packed into one
+    int64 key per row, which is much faster than ``np.unique(axis=0)``.
+    """
+    rows = np.sort(np.asarray(rows, dtype=np.int64), axis=1)
+    if rows.size == 0:
+        uniq = rows.reshape(0, rows.shape[1])
+        return (uniq, np.zeros(0, dtype=np.int64)) if return_counts else uniq
+    base = int(rows.max()) + 1
+    if base ** rows.shape[1] < 2**63:
+        keys = np.zeros(rows.shape[0], dtype=np.int64)
+        for col in rows.T:
+            keys = keys * base + col
+        _, first, counts = np.unique(keys, return_index=True, return_counts=True)
+        uniq = rows[first]
+    else:
+        uniq, counts = np.unique(rows, axis=0, return_counts=True)
+    if return_counts:
+        return uniq, counts
+    return uniq
+
+
+def duplicate_faces(tris):
+    """Triangles (as sorted rows) that occur more than once in ``tris``"""
+    uniq, counts = unique_rows(tris, return_counts=True)
+    return uniq[counts > 1]
+
+
+def boundary_faces(tets):
+    """Triangles (as sorted rows) owned by exactly one tetra of ``tets``"""
+    faces = np.asarray(tets)[:, TET_FACES].reshape(-1, 3)
+    uniq, counts = unique_rows(faces, return_counts=True)
+    return uniq[counts == 1]
+
+
+def unique_edges(tets):
+    """All distinct edges (as sorted rows) of the tetra array ``tets``"""
+    return unique_rows(np.asarray(tets)[:, TET_EDGES].reshape(-1, 2))
+
+
+def elements_to_arrays(gmsh, sorted_tags):
+    """Collect every gmsh element block as (etype, etags, (Ne, k) node indices)"""
+    types, elem_tags, elem_node_tags = gmsh.model.mesh.getElements()
+    elements = []
+    for etype, etags, nodes_flat in zip(types, elem_tags, elem_node_tags):
+        # props: (name, dim, order, numNodes, localCoords, numPrimaryNodes)
+        num_nodes_per_elem = gmsh.model.mesh.getElementProperties(etype)[3]
+        conn = tags_to_index(sorted_tags, nodes_flat).reshape(-1, num_nodes_per_elem)
+        elements.append((int(etype), np.asarray(etags, dtype=np.int64), conn))
+    return elements
+
+
+def elements_of_size(elements, k):
+    """Stack all element blocks with ``k`` nodes into one (Ne, k) array"""
+    blocks = [conn for _, _, conn in elements if conn.shape[1] == k]
+    if len(blocks) == 0:
+        return np.zeros((0, k), dtype=np.int64)
+    if len(blocks) == 1:
+        return blocks[0]
+    return np.concatenate(blocks)
+
+
+def step_hash(stepfile):
+    """sha1 of the STEP DATA section
+
+    The HEADER section carries the write time stamp, so hashing the whole file
+    would give a new key for every rewrite of the same geometry.
+    """
+    with open(stepfile, "rb") as f:
+        content = f.read()
+    pos = content.find(b"DATA;")
+    return hashlib.sha1(content[pos if pos >= 0 else 0 :]).hexdigest()
+
+
+def mesh_options(mesh_size=None, surface_only=False):
+    """The sizing parameters run_gmsh_on_step meshes with (incl. the globals)"""
+    return {
+        "mesh_size": mesh_size,
+        "surface_only": surface_only,
+        "local_size_min": globals().get("local_size_min", 0.05),
+        "local_dist_min": globals().get("local_dist_min", 0.05),
+        "local_dist_max": globals().get("local_dist_max", 1.0),
+    }
+
+
+class MeshCache:
+    """On-disk cache of gmsh results as compact .npz files
+
+    Entries are keyed on the STEP geometry hash plus the mesh options and are
+    evicted least-recently-used once more than ``max_entries`` files or
+    ``max_bytes`` bytes are stored. Hit/miss/eviction counts are in ``stats``.
+    """
+
+    def __init__(self, cache_dir, max_entries=16, max_bytes=512 * 1024**2):
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, stepfile, **options):
+        opts = json.dumps(options, sort_keys=True)
+        return hashlib.sha1((step_hash(stepfile) + opts).encode()).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key + ".npz")
+
+    def get(self, key):
+        """Return (sorted_tags, nodes, elements) or None on a miss"""
+        fname = self.path(key)
+        if not os.path.isfile(fname):
+            self.stats["misses"] += 1
+            return None
+        with np.load(fname) as data:
+            elements = [
+                (int(etype), data[f"etags_{i}"], data[f"conn_{i}"].astype(int))
+                for i, etype in enumerate(data["etypes"])
+            ]
+            tags, nodes = data["tags"], data["nodes"]
+        os.utime(fname)  # mark as recently used
+        self.stats["hits"] += 1
+        return tags, nodes, elements
+
+    def put(self, key, sorted_tags, nodes, elements):
+        arrays = {
+            "tags": sorted_tags,
+            "nodes": nodes,
+            "etypes": np.array([etype for etype, _, _ in elements], dtype=np.int64),
+        }
+        for i, (_, etags, conn) in enumerate(elements):
+            arrays[f"etags_{i}"] = etags
+            arrays[f"conn_{i}"] = conn.astype(np.min_scalar_type(max(len(nodes), 1)))
+        # write under a temporary name so readers never see a partial file
+        tmp = self.path(key) + ".tmp.npz"
+        np.savez_compressed(tmp, **arrays)
+        os.replace(tmp, self.path(key))
+        self.evict()
+
+    def entries(self):
+        """Cached files as (mtime, size, path), least recently used first"""
+        items = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".npz") and not name.endswith(".tmp.npz"):
+                fname = os.path.join(self.cache_dir, name)
+                st = os.stat(fname)
+                items.append((st.st_mtime, st.st_size, fname))
+        return sorted(items)
+
+    def evict(self):
+        items = self.entries()
+        total = sum(size for _, size, _ in items)
+        while len(items) > 1 and (
+            len(items) > self.max_entries or total > self.max_bytes
+        ):
+            _, size, fname = items.pop(0)
+            os.remove(fname)
+            total -= size
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        for _, _, fname in self.entries():
+            os.remove(fname)
+
+
 def run_gmsh_on_step(
-    stepfile, out_msh, mesh_size=None, occ_shape=None, surface_only=False
+    stepfile,
+    out_msh,
+    mesh_size=None,
+    occ_shape=None,
+    surface_only=False,
+    as_arrays=False,
+    cache=None,
 ):
+    """Mesh ``stepfile`` with gmsh and return the nodes and elements
+
+    With ``as_arrays=False`` returns ``(coords, elements)`` where ``coords`` maps
+    node tag -> (x, y, z) and ``elements`` is a list of (etype, etags, node tag
+    lists). With ``as_arrays=True`` returns ``(nodes, elements)`` where
+    ``nodes`` is a (N, 3) float array and each element block holds a (Ne, k)
+    int array of row indices into ``nodes``.
+
+    If a MeshCache is given as ``cache`` and already holds a mesh for the same
+    geometry and options, it is returned without running gmsh (``out_msh`` is
+    not rewritten in that case).
+    """
+    if cache is not None:
+        key = cache.key(stepfile, **mesh_options(mesh_size, surface_only))
+        hit = cache.get(key)
+        if hit is not None:
+            print(f"gmsh: mesh cache hit {key}")
+            return _mesh_result(*hit, as_arrays=as_arrays)
+
     import gmsh
 
     gmsh.initialize()
@@ -226,32 +448,14 @@ def run_gmsh_on_step(
     for dim, tag in ents2:
         elem_types, elem_tags, elem_node_tags = gmsh.model.mesh.getElements(dim, tag)
         for i, etype in enumerate(elem_types):
-            if len(elem_tags[i]) == 0:
-                continue
             # triangle element type is 2 in gmsh
-            if etype == 2:
-                nodes_flat = list(elem_node_tags[i])
-                etags = list(elem_tags[i])
-                num_nodes = 3
-                tri_to_tag = {}
-                for j in range(len(etags)):
-                    start = j * num_nodes
-                    tri_nodes = tuple(
-                        sorted(
-                            [
-                                int(nodes_flat[start]),
-                                int(nodes_flat[start + 1]),
-                                int(nodes_flat[start + 2]),
-                            ]
-                        )
-                    )
-                    if tri_nodes in tri_to_tag:
-                        print(
-                            f"gmsh: duplicate triangle {tri_nodes} found on surface {tag}"
-                        )
-                        duplicates_found.append((tag, tri_nodes))
-                    else:
-                        tri_to_tag[tri_nodes] = etags[j]
+            if etype != 2 or len(elem_tags[i]) == 0:
+                continue
+            tris = np.asarray(elem_node_tags[i], dtype=np.int64).reshape(-1, 3)
+            for tri_nodes in duplicate_faces(tris):
+                tri_nodes = tuple(int(n) for n in tri_nodes)
+                print(f"gmsh: duplicate triangle {tri_nodes} found on surface {tag}")
+                duplicates_found.append((tag, tri_nodes))
 
     # If duplicates exist, export a STEP with candidate OCC faces for manual inspection
     if len(duplicates_found) > 0:
@@ -262,23 +466,8 @@ def run_gmsh_on_step(
         if occ_shape is not None:
             dup_tag, tri = duplicates_found[0]
             # compute centroid of triangle
-            n0, n1, n2 = tri
-            node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
-            coord_map = {}
-            for idx, tagid in enumerate(node_tags):
-                coord_map[int(tagid)] = (
-                    node_coords[3 * idx],
-                    node_coords[3 * idx + 1],
-                    node_coords[3 * idx + 2],
-                )
-            p0 = coord_map[n0]
-            p1 = coord_map[n1]
-            p2 = coord_map[n2]
-            centroid = (
-                (p0[0] + p1[0] + p2[0]) / 3.0,
-                (p0[1] + p1[1] + p2[1]) / 3.0,
-                (p0[2] + p1[2] + p2[2]) / 3.0,
-            )
+            sorted_tags, xyz = nodes_to_arrays(*gmsh.model.mesh.getNodes()[:2])
+            centroid = tuple(xyz[tags_to_index(sorted_tags, tri)].mean(axis=0))
             # export OCC faces that contain this centroid in their bounding box
             from OCC.Core.Bnd import Bnd_Box
             from OCC.Core.BRepBndLib import brepbndlib_Add
@@ -336,72 +525,35 @@ def run_gmsh_on_step(
         # User requested only surface mesh: write and return surface elements
         gmsh.write(out_msh)
         print(f"gmsh: wrote surface mesh to {out_msh}")
-        # collect nodes and elements directly from gmsh model for downstream use
-        node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
-        # build tag->coord mapping
-        coords = {}
-        for i, tag in enumerate(node_tags):
-            x = node_coords[3 * i]
-            y = node_coords[3 * i + 1]
-            z = node_coords[3 * i + 2]
-            coords[int(tag)] = (float(x), float(y), float(z))
-
-        types, elem_tags, elem_node_tags = gmsh.model.mesh.getElements()
-        elements = []
-        for i, etype in enumerate(types):
-            etags = elem_tags[i]
-            nodes_flat = elem_node_tags[i]
-            props = gmsh.model.mesh.getElementProperties(etype)
-            num_nodes_per_elem = props[3]
-            elems = []
-            for j in range(len(etags)):
-                start = j * num_nodes_per_elem
-                elems.append(
-                    [int(n) for n in nodes_flat[start : start + num_nodes_per_elem]]
-                )
-            elements.append((int(etype), etags, elems))
-
-        gmsh.finalize()
-        return coords, elements
-
-    # Now try 3D mesh generation
-    print("gmsh: generating 3D mesh (this may take a moment)")
-    gmsh.model.mesh.generate(3)
-    print("gmsh: 3D mesh generation succeeded")
-    # write mesh file
-    gmsh.write(out_msh)
-    print(f"gmsh: wrote mesh to {out_msh}")
+    else:
+        # Now try 3D mesh generation
+        print("gmsh: generating 3D mesh (this may take a moment)")
+        gmsh.model.mesh.generate(3)
+        print("gmsh: 3D mesh generation succeeded")
+        # write mesh file
+        gmsh.write(out_msh)
+        print(f"gmsh: wrote mesh to {out_msh}")
 
     # collect nodes and elements directly from gmsh model for downstream use
     node_tags, node_coords, _ = gmsh.model.mesh.getNodes()
-    # build tag->coord mapping
-    coords = {}
-    for i, tag in enumerate(node_tags):
-        x = node_coords[3 * i]
-        y = node_coords[3 * i + 1]
-        z = node_coords[3 * i + 2]
-        coords[int(tag)] = (float(x), float(y), float(z))
+    sorted_tags, nodes = nodes_to_arrays(node_tags, node_coords)
+    elements = elements_to_arrays(gmsh, sorted_tags)
+    gmsh.finalize()
 
-    types, elem_tags, elem_node_tags = gmsh.model.mesh.getElements()
-    # parse elements into lists per type
-    elements = []
-    for i, etype in enumerate(types):
-        etags = elem_tags[i]
-        nodes_flat = elem_node_tags[i]
-        # get number of nodes per element for this type
-        props = gmsh.model.mesh.getElementProperties(etype)
-        # props: (name, dim, order, numNodes, numNodes2)
-        num_nodes_per_elem = props[3]
-        # split flat nodes list
-        elems = []
-        for j in range(len(etags)):
-            start = j * num_nodes_per_elem
-            elems.append(
-                [int(n) for n in nodes_flat[start : start + num_nodes_per_elem]]
-            )
-        elements.append((int(etype), etags, elems))
+    if cache is not None:
+        cache.put(key, sorted_tags, nodes, elements)
+    return _mesh_result(sorted_tags, nodes, elements, as_arrays=as_arrays)
 
-    gmsh.finalize()
+
+def _mesh_result(sorted_tags, nodes, elements, as_arrays=False):
+    if as_arrays:
+        return nodes, elements
+
+    # legacy tag-keyed containers
+    coords = dict(zip(sorted_tags.tolist(), map(tuple, nodes.tolist())))
+    elements = [
+        (etype, etags, sorted_tags[conn].tolist()) for etype, etags, conn in elements
+    ]
     return coords, elements
 
 
@@ -416,6 +568,8 @@ if __name__ == "__main__":
     local_dist_min = 0.5
     local_dist_max = 2.0
     size = 10.0  # shape size parameter
+    cache_dir = "core_solid_volmesh_cache"  # gmsh result cache (None to disable)
+    cache_entries = 16  # max number of cached meshes
     # -------------------------------------------------
 
     shape = make_shape_box(length=size)
@@ -429,67 +583,47 @@ if __name__ == "__main__":
     sewed_shape = write_step(shape, stepfile)
 
     # run gmsh: request volume mesh (tetrahedralization of solid)
-    coords, elements = run_gmsh_on_step(
+    cache = None
+    if cache_dir is not None:
+        cache = MeshCache(cache_dir, max_entries=cache_entries)
+    nodes, elements = run_gmsh_on_step(
         stepfile,
         out_msh,
         mesh_size=mesh_size,
         occ_shape=sewed_shape,
         surface_only=False,
+        as_arrays=True,
+        cache=cache,
     )
+    if cache is not None:
+        print("gmsh: mesh cache stats", cache.stats)
 
-    # Build triangle list for display. `coords` maps node tag -> (x,y,z).
-    tris = []
-    # Look for tetra elements first to extract boundary triangles
-    tets = []
-    tri_elems = []
-    for etype, etags, elems in elements:
-        if len(elems) == 0:
-            continue
-        # check number of nodes in first element
-        nnode = len(elems[0])
-        if nnode == 4:
-            tets.extend(elems)
-        elif nnode == 3:
-            tri_elems.extend(elems)
+    # Build triangle array for display. `nodes` is (N, 3) and every element
+    # block is a (Ne, k) array of row indices into `nodes`.
+    tets = elements_of_size(elements, 4)
+    tri_elems = elements_of_size(elements, 3)
 
+    # Look for tetra elements first to extract boundary triangles
     if len(tets) > 0:
-        face_counts = {}
-        faces = [(0, 1, 2), (0, 1, 3), (0, 2, 3), (1, 2, 3)]
-        for tet in tets:
-            tet = [int(x) for x in tet]
-            for i, j, k in faces:
-                tri = tuple(sorted((tet[i], tet[j], tet[k])))
-                face_counts[tri] = face_counts.get(tri, 0) + 1
-        bfaces = [tri for tri, count in face_counts.items() if count == 1]
-        tris = bfaces
+        tris = boundary_faces(tets)
     elif len(tri_elems) > 0:
-        tris = [tuple(int(x) for x in tri) for tri in tri_elems]
+        tris = tri_elems
     else:
         raise RuntimeError("Mesh contained no triangle or tetra elements")
 
     # Try to build an in-memory skfem MeshTet (no intermediate files)
-    def try_make_skfem_mesh(coords_map, tets_list):
-        # build contiguous node list and mapping
-        node_tags = sorted(coords_map.keys())
-        tag_to_idx = {tag: i for i, tag in enumerate(node_tags)}
-        nodes = np.array([coords_map[tag] for tag in node_tags], dtype=float)
-
-        # build tet index array
-        tets_idx = np.array(
-            [[tag_to_idx[int(n)] for n in tet] for tet in tets_list], dtype=int
-        )
-
+    def try_make_skfem_mesh(nodes, tets):
         # import skfem MeshTet — let ImportError propagate if missing
         from skfem import MeshTet
 
-        # skfem.MeshTet expects nodes as shape (3, n_points) and elems as (4, n_elems)
-        # transpose our arrays to match that convention and let errors propagate
-        mesh = MeshTet(nodes.T, tets_idx.T)
+        # skfem.MeshTet expects nodes as shape (3, n_points) and elems as (4, n_elems);
+        # the transposes are views, so the gmsh arrays are handed over without copies
+        mesh = MeshTet(nodes.T, tets.T)
         print(
             "skfem MeshTet created with nodes.shape",
             nodes.T.shape,
             "tets.shape",
-            tets_idx.T.shape,
+            tets.T.shape,
         )
         return mesh
 
@@ -497,7 +631,7 @@ if __name__ == "__main__":
     # container for shapes of the deformed surface triangles (populated after solve)
     deformed_tri_shapes = None
     if len(tets) > 0:
-        skfem_mesh = try_make_skfem_mesh(coords, tets)
+        skfem_mesh = try_make_skfem_mesh(nodes, tets)
         if skfem_mesh is not None:
             print("In-memory skfem mesh ready for analysis (no files written)")
             # --- run a simple 3D linear elasticity self-weight analysis ---
@@ -673,35 +807,12 @@ if __name__ == "__main__":
                 )
                 # prepare deformed triangle faces (amplify Y component by 1000x)
                 deformed_tri_shapes = []
-                node_tags_sorted = sorted(coords.keys())
-                tag_to_idx = {tag: i for i, tag in enumerate(node_tags_sorted)}
-                for tri in tris:
-                    t0, t1, t2 = int(tri[0]), int(tri[1]), int(tri[2])
-                    i0 = tag_to_idx[t0]
-                    i1 = tag_to_idx[t1]
-                    i2 = tag_to_idx[t2]
-                    d0 = u_nodal[:, i0].copy()
-                    d1 = u_nodal[:, i1].copy()
-                    d2 = u_nodal[:, i2].copy()
-                    p0c = coords[t0]
-                    p1c = coords[t1]
-                    p2c = coords[t2]
-                    p0d = gp_Pnt(
-                        p0c[0] + float(d0[0]) * 1000,
-                        p0c[1] + float(d0[1]) * 1000,
-                        p0c[2] + float(d0[2]) * 1000,
-                    )
-                    p1d = gp_Pnt(
-                        p1c[0] + float(d1[0]) * 1000,
-                        p1c[1] + float(d1[1]) * 1000,
-                        p1c[2] + float(d1[2]) * 1000,
-                    )
-                    p2d = gp_Pnt(
-                        p2c[0] + float(d2[0]) * 1000,
-                        p2c[1] + float(d2[1]) * 1000,
-                        p2c[2] + float(d2[2]) * 1000,
+                # displaced corner points of every surface triangle, (Nt, 3, 3)
+                pd = nodes[tris] + 1000 * u_nodal.T[tris]
+                for p0d, p1d, p2d in pd.tolist():
+                    fd = make_face(
+                        make_polygon([gp_Pnt(*p0d), gp_Pnt(*p1d), gp_Pnt(*p2d)], True)
                     )
-                    fd = make_face(make_polygon([p0d, p1d, p2d], True))
                     deformed_tri_shapes.append(fd)
             else:
                 print("von Mises could not be computed with current projection method.")
@@ -710,23 +821,13 @@ if __name__ == "__main__":
     # Build and display internal edges from tetra elements so volume mesh is visible
     if len(tets) > 0:
         # collect unique edges
-        edge_set = set()
-        for tet in tets:
-            a, b, c, d = [int(x) for x in tet]
-            edges = [(a, b), (a, c), (a, d), (b, c), (b, d), (c, d)]
-            for e in edges:
-                edge_set.add(tuple(sorted(e)))
+        edge_pts = nodes[unique_edges(tets)]
 
         builder = BRep_Builder()
         comp = TopoDS_Compound()
         builder.MakeCompound(comp)
-        for e in edge_set:
-            n0, n1 = e
-            p0c = coords[n0]
-            p1c = coords[n1]
-            p0 = gp_Pnt(p0c[0], p0c[1], p0c[2])
-            p1 = gp_Pnt(p1c[0], p1c[1], p1c[2])
-            ed = make_edge(p0, p1)
+        for p0c, p1c in edge_pts.tolist():
+            ed = make_edge(gp_Pnt(*p0c), gp_Pnt(*p1c))
             builder.Add(comp, ed)
         # display.DisplayShape(comp, update=True, transparency=0.7)
 
@@ -738,14 +839,10 @@ if __name__ == "__main__":
             # final update
             # display.View.Redraw()
 
-    for tri in tris:
-        t0, t1, t2 = int(tri[0]), int(tri[1]), int(tri[2])
-        p0c = coords[t0]
-        p1c = coords[t1]
-        p2c = coords[t2]
-        p0 = gp_Pnt(p0c[0], p0c[1], p0c[2])
-        p1 = gp_Pnt(p1c[0], p1c[1], p1c[2])
-        p2 = gp_Pnt(p2c[0], p2c[1], p2c[2])
+    for p0c, p1c, p2c in nodes[tris].tolist():
+        p0 = gp_Pnt(*p0c)
+        p1 = gp_Pnt(*p1c)
+        p2 = gp_Pnt(*p2c)
         f = make_face(make_polygon([p0, p1, p2], True))
         # display.DisplayShape(p0)
         # display.DisplayShape(p1)
@@ -19,11 +19,19 @@
 
 import os
 import sys
+import argparse
 
 from OCC.Extend.DataExchange import read_step_file
 from OCC.Extend.TopologyUtils import TopologyExplorer
 from OCC.Display.WebGl import threejs_renderer
 
+from threejs_instanced import InstancedThreejsRenderer
+
+parser = argparse.ArgumentParser()
+# --per_solid: one ThreejsRenderer file per solid (previous behaviour)
+parser.add_argument("--per_solid", dest="per_solid", action="store_true")
+opt = parser.parse_args()
+
 # opens a big step file
 # render each part of the assembly as a shape
 stp_file = os.path.join("..", "assets", "models", "3864470050F1.stp")
@@ -44,7 +52,12 @@ big_shp = read_step_file(stp_file)
 
 all_subshapes = TopologyExplorer(big_shp).solids()
 
-my_renderer = threejs_renderer.ThreejsRenderer()
+if opt.per_solid:
+    my_renderer = threejs_renderer.ThreejsRenderer()
+else:
+    # identical parts are drawn as instances of one geometry,
+    # all geometries are in one gzip compressed buffer
+    my_renderer = InstancedThreejsRenderer()
 for single_shape in all_subshapes:
     my_renderer.DisplayShape(single_shape)
 # then call the renderer
@@ -0,0 +1,296 @@
+"""Export tessellated solids to binary glTF (.glb) or binary PLY.
+
+core_tesselation_vertices_list.py gets the triangles of the whole shape as
+Python tuples (GetVerticesPositionAsTuple) and reshapes them afterwards, one
+float object per coordinate for the whole assembly. Here every solid of
+TopologyExplorer(shape).solids() is tessellated on its own, its tuples are
+turned into float32 buffers at once, shared vertices are merged (uint32
+indices) and the buffers are spooled to disk before the next solid, so
+memory is bounded by the largest solid, not by the assembly.
+
+With processes > 0 the solids of a STEP file are tessellated by a pool of
+workers, each reading the file once.
+
+    stats = export_tesselation("./assets/models/as1-oc-214.stp",
+                               "as1-oc-214.glb", processes=4)
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import struct
+import tempfile
+import multiprocessing
+from collections import namedtuple
+
+import numpy as np
+
+from OCC.Core.Tesselator import ShapeTesselator
+from OCC.Extend.TopologyUtils import TopologyExplorer
+from OCC.Extend.DataExchange import read_step_file
+
+# positions: (N, 3) float32, normals: (N, 3) float32
+# indices: (T, 3) uint32 into positions / normals
+# raw_vertices: vertex count before merging (3 per triangle)
+SolidMesh = namedtuple("SolidMesh", ["name", "positions", "normals", "indices",
+                                     "raw_vertices", "time"])
+
+
+def dedupe_vertices(positions, normals):
+    """Merge vertices with the same position and normal.
+
+    positions, normals: (3T, 3) float32 triangle soup
+    Returns positions, normals (N, 3) and indices (T, 3) uint32.
+    """
+    # + 0.0 turns -0.0 into 0.0, the rows are compared as raw bytes
+    key = np.ascontiguousarray(np.hstack([positions, normals]) + np.float32(0.0))
+    key = key.view(np.dtype((np.void, key.dtype.itemsize * 6))).ravel()
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    indices = inverse.ravel().astype(np.uint32).reshape(-1, 3)
+    return positions[first], normals[first], indices
+
+
+def tesselate_solid(solid, name="solid", mesh_quality=1.0, parallel=False):
+    """SolidMesh of one shape"""
+    start = time.perf_counter()
+    tess = ShapeTesselator(solid)
+    tess.Compute(compute_edges=False, mesh_quality=mesh_quality,
+                 parallel=parallel)
+    # the tuples only live until they are copied into float32 buffers
+    positions = np.array(tess.GetVerticesPositionAsTuple(),
+                         dtype=np.float32).reshape(-1, 3)
+    normals = np.array(tess.GetNormalsAsTuple(),
+                       dtype=np.float32).reshape(-1, 3)
+    del tess
+    raw_vertices = len(positions)
+    positions, normals, indices = dedupe_vertices(positions, normals)
+    return SolidMesh(name, positions, normals, indices, raw_vertices,
+                     time.perf_counter() - start)
+
+
+_worker_solids = None
+
+
+def _init_worker(step_file):
+    global _worker_solids
+    _worker_solids = list(TopologyExplorer(read_step_file(step_file)).solids())
+
+
+def _tesselate_worker(args):
+    index, mesh_quality = args
+    return tesselate_solid(_worker_solids[index], "solid%d" % index,
+                           mesh_quality)
+
+
+def iter_solid_meshes(source, mesh_quality=1.0, processes=0):
+    """Yield a SolidMesh for every solid of source, in solid order.
+
+    source: STEP file name or TopoDS_Shape
+    processes: 0 tessellates in this process (faces in parallel with OCCT
+               threads), > 0 uses a pool of workers (STEP file only)
+    """
+    shape = read_step_file(source) if isinstance(source, str) else source
+    solids = list(TopologyExplorer(shape).solids())
+    if processes and isinstance(source, str):
+        pool = multiprocessing.Pool(processes, initializer=_init_worker,
+                                    initargs=(source,))
+        try:
+            tasks = [(index, mesh_quality) for index in range(len(solids))]
+            for mesh in pool.imap(_tesselate_worker, tasks):
+                yield mesh
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for index, solid in enumerate(solids):
+            yield tesselate_solid(solid, "solid%d" % index, mesh_quality,
+                                  parallel=True)
+
+
+class _SpoolWriter(object):
+    """Collect the binary data in a temporary file, write the header on close."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.spool = tempfile.TemporaryFile(
+            dir=os.path.dirname(os.path.abspath(filename)))
+        self.size = 0
+
+    def _spool(self, array):
+        data = np.ascontiguousarray(array).tobytes()
+        offset = self.size
+        self.spool.write(data)
+        self.size += len(data)
+        return offset, len(data)
+
+    def _copy_spool(self, fp):
+        self.spool.seek(0)
+        shutil.copyfileobj(self.spool, fp, 1 << 20)
+        self.spool.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.spool.close()
+
+
+class GlbWriter(_SpoolWriter):
+    """Binary glTF 2.0, one node / mesh per solid"""
+
+    def __init__(self, filename):
+        _SpoolWriter.__init__(self, filename)
+        self.gltf = {
+            "asset": {"version": "2.0", "generator": "tesselation_export.py"},
+            "scene": 0,
+            "scenes": [{"nodes": []}],
+            "nodes": [], "meshes": [], "accessors": [], "bufferViews": [],
+            "buffers": [],
+        }
+
+    def _accessor(self, array, component_type, kind, target, bounds=False):
+        offset, length = self._spool(array)
+        self.gltf["bufferViews"].append({
+            "buffer": 0, "byteOffset": offset, "byteLength": length,
+            "target": target})
+        accessor = {
+            "bufferView": len(self.gltf["bufferViews"]) - 1,
+            "componentType": component_type,
+            "count": int(array.size if kind == "SCALAR" else len(array)),
+            "type": kind,
+        }
+        if bounds:
+            accessor["min"] = array.min(axis=0).tolist()
+            accessor["max"] = array.max(axis=0).tolist()
+        self.gltf["accessors"].append(accessor)
+        return len(self.gltf["accessors"]) - 1
+
+    def add(self, mesh):
+        if len(mesh.indices) == 0:
+            return
+        position = self._accessor(mesh.positions, 5126, "VEC3", 34962, True)
+        normal = self._accessor(mesh.normals, 5126, "VEC3", 34962)
+        indices = self._accessor(mesh.indices, 5125, "SCALAR", 34963)
+        self.gltf["meshes"].append({"name": mesh.name, "primitives": [{
+            "attributes": {"POSITION": position, "NORMAL": normal},
+            "indices": indices, "mode": 4}]})
+        self.gltf["nodes"].append({"name": mesh.name,
+                                   "mesh": len(self.gltf["meshes"]) - 1})
+        self.gltf["scenes"][0]["nodes"].append(len(self.gltf["nodes"]) - 1)
+
+    def close(self):
+        # float32 / uint32 views keep the binary chunk 4-byte aligned
+        self.gltf["buffers"] = [{"byteLength": self.size}]
+        text = json.dumps(self.gltf, separators=(",", ":")).encode()
+        text += b" " * (-len(text) % 4)
+        total = 12 + 8 + len(text) + 8 + self.size
+        with open(self.filename, "wb") as fp:
+            fp.write(struct.pack("<4sII", b"glTF", 2, total))
+            fp.write(struct.pack("<I4s", len(text), b"JSON"))
+            fp.write(text)
+            fp.write(struct.pack("<I4s", self.size, b"BIN\0"))
+            self._copy_spool(fp)
+
+
+class PlyWriter(_SpoolWriter):
+    """Binary little endian PLY, all solids in one vertex / face list"""
+
+    vertex_dtype = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4"),
+                             ("nx", "<f4"), ("ny", "<f4"), ("nz", "<f4")])
+    face_dtype = np.dtype([("n", "u1"), ("v", "<u4", (3,))])
+
+    def __init__(self, filename):
+        _SpoolWriter.__init__(self, filename)
+        # faces go to a second spool, they follow all vertices in the file
+        self.faces = tempfile.TemporaryFile(
+            dir=os.path.dirname(os.path.abspath(filename)))
+        self.num_vertices = 0
+        self.num_faces = 0
+
+    def add(self, mesh):
+        vertices = np.empty(len(mesh.positions), self.vertex_dtype)
+        for i, name in enumerate(("x", "y", "z")):
+            vertices[name] = mesh.positions[:, i]
+            vertices["n" + name] = mesh.normals[:, i]
+        self._spool(vertices)
+        faces = np.empty(len(mesh.indices), self.face_dtype)
+        faces["n"] = 3
+        faces["v"] = mesh.indices + np.uint32(self.num_vertices)
+        self.faces.write(faces.tobytes())
+        self.num_vertices += len(vertices)
+        self.num_faces += len(faces)
+
+    def close(self):
+        header = "\n".join([
+            "ply", "format binary_little_endian 1.0",
+            "comment tesselation_export.py",
+            "element vertex %d" % self.num_vertices,
+            "property float x", "property float y", "property float z",
+            "property float nx", "property float ny", "property float nz",
+            "element face %d" % self.num_faces,
+            "property list uchar uint vertex_indices",
+            "end_header", ""])
+        with open(self.filename, "wb") as fp:
+            fp.write(header.encode("ascii"))
+            self._copy_spool(fp)
+            self.faces.seek(0)
+            shutil.copyfileobj(self.faces, fp, 1 << 20)
+        self.faces.close()
+
+    def __exit__(self, *exc):
+        if exc[0] is not None:
+            self.faces.close()
+        _SpoolWriter.__exit__(self, *exc)
+
+
+def export_tesselation(source, filename, mesh_quality=1.0, processes=0,
+                       file=None):
+    """Tessellate every solid of source into filename (.glb or .ply).
+
+    Prints per-solid and total throughput to file (default stdout) and
+    returns the totals.
+    """
+    file = file or sys.stdout
+    ext = os.path.splitext(filename)[1].lower()
+    if ext == ".glb":
+        writer = GlbWriter(filename)
+    elif ext == ".ply":
+        writer = PlyWriter(filename)
+    else:
+        raise ValueError("{}: use .glb or .ply".format(filename))
+    start = time.perf_counter()
+    totals = {"solids": 0, "triangles": 0, "vertices": 0, "raw_vertices": 0,
+              "tesselation_time": 0.0}
+    with writer:
+        for mesh in iter_solid_meshes(source, mesh_quality, processes):
+            writer.add(mesh)
+            num = len(mesh.indices)
+            print("%-12s %9d triangles %9d vertices (%9d raw) %8.3fs %12.0f tri/s"
+                  % (mesh.name, num, len(mesh.positions), mesh.raw_vertices,
+                     mesh.time, num / mesh.time if mesh.time > 0 else 0.0),
+                  file=file)
+            totals["solids"] += 1
+            totals["triangles"] += num
+            totals["vertices"] += len(mesh.positions)
+            totals["raw_vertices"] += mesh.raw_vertices
+            totals["tesselation_time"] += mesh.time
+    totals["wall_time"] = time.perf_counter() - start
+    totals["triangles_per_second"] = (totals["triangles"] / totals["wall_time"]
+                                      if totals["wall_time"] > 0 else 0.0)
+    totals["bytes"] = os.path.getsize(filename)
+    print("%(solids)d solids, %(triangles)d triangles, %(vertices)d vertices "
+          "(%(raw_vertices)d raw), %(bytes)d bytes in %(wall_time).2fs, "
+          "%(triangles_per_second).0f tri/s" % totals, file=file)
+    return totals
+
+
+if __name__ == "__main__":
+    step_file = "./assets/models/as1-oc-214.stp"
+    export_tesselation(step_file, "as1-oc-214.glb", mesh_quality=0.5)
+    export_tesselation(step_file, "as1-oc-214.ply", mesh_quality=0.5,
+                       processes=os.cpu_count())
@@ -0,0 +1,213 @@
+"""threejs viewer for large assemblies: one binary buffer, instanced parts.
+
+threejs_renderer.ThreejsRenderer writes one JSON file per DisplayShape call,
+so an assembly of thousands of solids makes the browser fetch thousands of
+files, and repeated parts (screws, bearings, ...) are tessellated and
+stored again for every placement. InstancedThreejsRenderer instead
+
+- tessellates every solid without its location (tesselation_export.py),
+- hashes the float32 / uint32 buffers, solids with the same tessellation
+  share one geometry and are drawn as a THREE.InstancedMesh with their
+  location matrices,
+- packs the unique geometries into a single gzip compressed buffer
+  (scene.bin.gz, decompressed in the browser with DecompressionStream)
+  and writes the per-geometry offsets and instances into index.html.
+
+    renderer = InstancedThreejsRenderer()
+    for solid in TopologyExplorer(shape).solids():
+        renderer.DisplayShape(solid)
+    renderer.render()
+"""
+
+import os
+import gzip
+import json
+import hashlib
+import tempfile
+import http.server
+import functools
+import webbrowser
+
+import numpy as np
+
+from OCC.Core.TopLoc import TopLoc_Location
+
+from tesselation_export import tesselate_solid
+
+_html = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>%(title)s</title>
+<style>body { margin: 0; background: #f0f0f0; } #info { position: absolute;
+top: 8px; left: 8px; font: 13px monospace; }</style>
+<script type="importmap">
+{"imports": {"three": "https://unpkg.com/three@0.160.0/build/three.module.js",
+ "three/addons/": "https://unpkg.com/three@0.160.0/examples/jsm/"}}
+</script>
+</head>
+<body>
+<div id="info"></div>
+<script type="module">
+import * as THREE from "three";
+import { OrbitControls } from "three/addons/controls/OrbitControls.js";
+
+const scene_data = %(scene)s;
+
+const renderer = new THREE.WebGLRenderer({ antialias: true });
+renderer.setPixelRatio(window.devicePixelRatio);
+renderer.setSize(window.innerWidth, window.innerHeight);
+document.body.appendChild(renderer.domElement);
+const scene = new THREE.Scene();
+scene.background = new THREE.Color(0xf0f0f0);
+scene.add(new THREE.HemisphereLight(0xffffff, 0x444444, 2.0));
+const light = new THREE.DirectionalLight(0xffffff, 1.5);
+scene.add(light);
+const camera = new THREE.PerspectiveCamera(
+    45, window.innerWidth / window.innerHeight, 1, 1e7);
+const controls = new OrbitControls(camera, renderer.domElement);
+
+const start = performance.now();
+const response = await fetch(scene_data.buffer);
+const buffer = await new Response(
+    response.body.pipeThrough(new DecompressionStream("gzip"))).arrayBuffer();
+const matrix = new THREE.Matrix4();
+const color = new THREE.Color();
+for (const g of scene_data.geometries) {
+    const geometry = new THREE.BufferGeometry();
+    geometry.setAttribute("position", new THREE.BufferAttribute(
+        new Float32Array(buffer, g.position[0], g.position[1]), 3));
+    geometry.setAttribute("normal", new THREE.BufferAttribute(
+        new Float32Array(buffer, g.normal[0], g.normal[1]), 3));
+    geometry.setIndex(new THREE.BufferAttribute(
+        new Uint32Array(buffer, g.index[0], g.index[1]), 1));
+    const material = new THREE.MeshPhongMaterial({ side: THREE.DoubleSide });
+    const mesh = new THREE.InstancedMesh(geometry, material, g.instances.length);
+    g.instances.forEach((instance, i) => {
+        mesh.setMatrixAt(i, matrix.fromArray(instance.matrix));
+        mesh.setColorAt(i, color.setRGB(...instance.color));
+    });
+    mesh.computeBoundingSphere();
+    scene.add(mesh);
+}
+const box = new THREE.Box3().setFromObject(scene);
+const center = box.getCenter(new THREE.Vector3());
+const size = box.getSize(new THREE.Vector3()).length();
+camera.position.copy(center).add(new THREE.Vector3(size, size, size));
+camera.lookAt(center);
+controls.target.copy(center);
+document.getElementById("info").textContent =
+    scene_data.geometries.length + " geometries, " + scene_data.instances +
+    " instances, loaded in " + ((performance.now() - start) / 1000).toFixed(2) + "s";
+
+function animate() {
+    requestAnimationFrame(animate);
+    light.position.copy(camera.position);
+    renderer.render(scene, camera);
+}
+animate();
+window.addEventListener("resize", () => {
+    camera.aspect = window.innerWidth / window.innerHeight;
+    camera.updateProjectionMatrix();
+    renderer.setSize(window.innerWidth, window.innerHeight);
+});
+</script>
+</body>
+</html>
+"""
+
+
+def location_matrix(shape):
+    """4x4 column-major matrix (three.js order) of the shape location"""
+    trsf = shape.Location().Transformation()
+    m = np.eye(4)
+    for row in range(3):
+        for col in range(4):
+            m[row, col] = trsf.Value(row + 1, col + 1)
+    return m.T.ravel().tolist()
+
+
+def tesselation_hash(mesh):
+    h = hashlib.sha1()
+    for a in (mesh.positions, mesh.normals, mesh.indices):
+        h.update(str(a.shape).encode())
+        h.update(np.ascontiguousarray(a).tobytes())
+    return h.hexdigest()
+
+
+class InstancedThreejsRenderer(object):
+    """Drop-in for threejs_renderer.ThreejsRenderer with shared geometries"""
+
+    def __init__(self, path=None, mesh_quality=1.0):
+        self._path = tempfile.mkdtemp() if path is None else path
+        os.makedirs(self._path, exist_ok=True)
+        self.mesh_quality = mesh_quality
+        self.geometries = {}
+        self.instances = 0
+        self.raw_bytes = 0
+        self.tesselation_time = 0.0
+
+    def DisplayShape(self, shape, color=(0.65, 0.65, 0.7), name=None):
+        # tessellate in the part's own frame, the location is the instance
+        mesh = tesselate_solid(shape.Located(TopLoc_Location()),
+                               mesh_quality=self.mesh_quality)
+        self.tesselation_time += mesh.time
+        if len(mesh.indices) == 0:
+            return
+        key = tesselation_hash(mesh)
+        if key not in self.geometries:
+            self.geometries[key] = (mesh, [])
+        self.geometries[key][1].append({
+            "matrix": location_matrix(shape),
+            "color": [float(c) for c in color],
+            "name": name or "shape%d" % self.instances})
+        self.instances += 1
+        # what one buffer per solid would need
+        self.raw_bytes += (mesh.positions.nbytes + mesh.normals.nbytes
+                           + mesh.indices.nbytes)
+
+    def write(self):
+        """Write scene.bin.gz and index.html, return the html file name"""
+        geometries = []
+        offset = 0
+        bin_name = os.path.join(self._path, "scene.bin.gz")
+        with gzip.open(bin_name, "wb", compresslevel=6) as fp:
+            for mesh, instances in self.geometries.values():
+                views = {}
+                for key, a in (("position", mesh.positions),
+                               ("normal", mesh.normals),
+                               ("index", mesh.indices)):
+                    data = np.ascontiguousarray(a).tobytes()
+                    fp.write(data)
+                    views[key] = [offset, int(a.size)]
+                    offset += len(data)
+                views["instances"] = instances
+                geometries.append(views)
+        scene = {"buffer": "scene.bin.gz", "geometries": geometries,
+                 "instances": self.instances}
+        html_name = os.path.join(self._path, "index.html")
+        with open(html_name, "w") as fp:
+            fp.write(_html % {"title": "pythonocc instanced",
+                              "scene": json.dumps(scene)})
+        self.report(offset, os.path.getsize(bin_name))
+        return html_name
+
+    def report(self, unique_bytes, gz_bytes):
+        print("%d instances of %d geometries, tessellation %.2fs"
+              % (self.instances, len(self.geometries), self.tesselation_time))
+        print("buffer: %d bytes per solid, %d bytes shared, %d bytes gzip"
+              % (self.raw_bytes, unique_bytes, gz_bytes))
+
+    def render(self, server_port=8080, open_webbrowser=False):
+        self.write()
+        handler = functools.partial(http.server.SimpleHTTPRequestHandler,
+                                    directory=self._path)
+        server = http.server.HTTPServer(("", server_port), handler)
+        url = "http://localhost:%d/index.html" % server_port
+        print("## Serving %s at %s" % (self._path, url))
+        if open_webbrowser:
+            webbrowser.open(url)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
@@ -1,14 +1,41 @@
 #!/usr/bin/env python
 
-import random
-
-from PyQt5.QtCore import (QLineF, QPointF, QRectF, Qt, QTimer)
-from PyQt5.QtGui import (QBrush, QColor, QPainter, QIntValidator)
+import numpy as np
+from PyQt5.QtCore import (QLineF, QRectF, Qt, QTimer)
+from PyQt5.QtGui import (QColor, QPainter, QIntValidator, QImage)
 from PyQt5.QtWidgets import (QApplication, QWidget, QGraphicsView, QGraphicsScene, QGraphicsItem,
                              QGridLayout, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QPushButton)
 
 
+def rule_table(n):
+    """Wolfram rule number -> lookup table indexed by the 3-bit neighbourhood."""
+    return ((n >> np.arange(8)) & 1).astype(np.uint8)
+
+
+def next_generations(row, n, generations=1, out=None):
+    """Apply rule n to a row of 0/1 cells for several generations.
+
+    The neighbourhood (left << 2) | (center << 1) | right of the whole row is
+    packed into one uint8 index and looked up in the rule table; cells beyond
+    both ends are 0. Returns an array (generations, len(row)), or fills out.
+    """
+    table = rule_table(n)
+    row = np.asarray(row, dtype=np.uint8)
+    if out is None:
+        out = np.empty((generations, row.size), dtype=np.uint8)
+    padded = np.zeros(row.size + 2, dtype=np.uint8)
+    index = np.empty(row.size, dtype=np.uint8)
+    for g in range(len(out)):
+        padded[1:-1] = row
+        np.left_shift(padded[:-2], 2, out=index)
+        index |= padded[1:-1] << 1
+        index |= padded[2:]
+        row = out[g]
+        np.take(table, index, out=row)
+    return out
+
+
 class CelllarAutomaton(QGraphicsItem):
     def __init__(self, width=500, height=500, size=5):
         super(CelllarAutomaton, self).__init__()
@@ -17,68 +44,65 @@ class CelllarAutomaton(QGraphicsItem):
         self.size = size
         self.NH = self.height // size
         self.NW = self.width // size
-        self.board = []
-        for y in range(self.NH):
-            self.board.append([0] * self.NW)
-        self.board[0][self.NW // 2] = 1
+        self.board = np.zeros((self.NH, self.NW), dtype=np.uint8)
+        # 8-bit image of the board (live cells black) drawn in one blit
+        self.pixels = np.full((self.NH, self.NW), 255, dtype=np.uint8)
+        self.image = QImage(self.pixels.data, self.NW, self.NH, self.NW,
+                            QImage.Format_Grayscale8)
+        self.reset(update=False)
+
+    def set_row(self, y, row):
+        self.board[y] = row
+        self.pixels[y] = 255 - 255 * self.board[y]
+
+    def reset(self, update=True):
+        self.board[:] = 0
+        self.pixels[:] = 255
+        row = np.zeros(self.NW, dtype=np.uint8)
+        row[self.NW // 2] = 1
+        self.set_row(0, row)
         self.pos = 0
-
-    def reset(self):
-        for y in range(self.NH):
-            for x in range(self.NW):
-                self.board[y][x] = 0
-        self.board[0][self.NW // 2] = 1
-        self.pos = 0
-        self.update()
+        if update:
+            self.update()
 
     def randomInit(self):
-        for y in range(self.NH):
-            for x in range(self.NW):
-                self.board[y][x] = 0
-        for x in range(self.NW):
-            self.board[0][x] = int(random.random() < 0.2)
+        self.board[:] = 0
+        self.pixels[:] = 255
+        self.set_row(0, np.random.random(self.NW) < 0.2)
         self.pos = 0
         self.update()
 
     def paint(self, painter, option, widget):
-        painter.setPen(QColor(220, 220, 220))
-        for y in range(self.NH):
-            painter.drawLine(0, y * self.size, self.width, y * self.size)
-        for x in range(self.NW):
-            painter.drawLine(x * self.size, 0, x * self.size, self.height)
-
-        painter.setBrush(Qt.black)
-        for y in range(self.NH):
-            for x in range(self.NW):
-                if self.board[y][x] == 1:
-                    painter.drawRect(self.size * x, self.size *
-                                     y, self.size, self.size)
+        # NW x NH cells of size px, not stretched over width x height
+        painter.drawImage(QRectF(0, 0, self.NW * self.size, self.NH * self.size),
+                          self.image)
+
+        # grid lines are only drawn while cells are large enough to see them
+        if self.size >= 4:
+            painter.setPen(QColor(220, 220, 220))
+            painter.drawLines([QLineF(0, y * self.size, self.width, y * self.size)
+                               for y in range(self.NH)]
+                              + [QLineF(x * self.size, 0, x * self.size, self.height)
+                                 for x in range(self.NW)])
 
     def do_prev(self):
         if self.pos == 0:
             return
-        for x in range(self.NW):
-            self.board[self.pos][x] = 0
+        self.board[self.pos] = 0
+        self.pixels[self.pos] = 255
         self.pos -= 1
         self.update()
 
-    def do_next(self, n):
-        if self.pos + 1 >= self.NH:
+    def do_next(self, n, generations=1):
+        """Compute up to `generations` rows with rule n in one call."""
+        generations = min(generations, self.NH - 1 - self.pos)
+        if generations <= 0:
             return False
-        p = []
-        for i in range(8):
-            p.append(n & 0b1)
-            n >>= 1
-
-        self.board[self.pos +
-                   1][0] = p[(self.board[self.pos][0] << 1) + self.board[self.pos][1]]
-        self.board[self.pos + 1][self.NW - 1] = p[(
-            self.board[self.pos][self.NW - 2] << 1) + self.board[self.pos][self.NW - 1]]
-        for x in range(1, self.NW - 1):
-            self.board[self.pos + 1][x] = p[(self.board[self.pos][x - 1] << 2)
-                                            + (self.board[self.pos][x] << 1)
-                                            + (self.board[self.pos][x + 1])]
-        self.pos += 1
+        rows = slice(self.pos + 1, self.pos + 1 + generations)
+        next_generations(self.board[self.pos], n, generations,
+                         out=self.board[rows])
+        self.pixels[rows] = 255 - 255 * self.board[rows]
+        self.pos += generations
         self.update()
         return True
 
@@ -87,14 +111,16 @@ class CelllarAutomaton(QGraphicsItem):
 
 
 class MainWindow(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, width=400, height=400, size=5, generations=1):
         super(MainWindow, self).__init__(parent)
 
+        # generations computed per Next/Auto step
+        self.generations = generations
         self.graphicsView = QGraphicsView()
         scene = QGraphicsScene(self.graphicsView)
-        scene.setSceneRect(0, 0, 400, 400)
+        scene.setSceneRect(0, 0, width, height)
         self.graphicsView.setScene(scene)
-        self.celluarAutomaton = CelllarAutomaton(400, 400)
+        self.celluarAutomaton = CelllarAutomaton(width, height, size)
         scene.addItem(self.celluarAutomaton)
 
         validator = QIntValidator(0, 1)
@@ -183,7 +209,7 @@ class MainWindow(QWidget):
 
     def do_next(self):
         n = self.rule10Edit.text()
-        return self.celluarAutomaton.do_next(int(n))
+        return self.celluarAutomaton.do_next(int(n), self.generations)
 
     def do_prev(self):
         self.celluarAutomaton.do_prev()
@@ -218,7 +244,10 @@ class MainWindow(QWidget):
 if __name__ == '__main__':
     import sys
     app = QApplication(sys.argv)
-    mainWindow = MainWindow()
+    # e.g. "cellular_automap.py 4000 4000 1 20" for a 4000x4000 board,
+    # 20 generations per step
+    args = [int(a) for a in sys.argv[1:5]]
+    mainWindow = MainWindow(None, *args)
 
     mainWindow.show()
     sys.exit(app.exec_())
@@ -218,5 +218,36 @@ def performance_test():
         print(msg)
 
 
+def summary_performance_test(row_nums=(1000, 10000, 100000)):
+    """
+    Performance test for long tables with summary rows on every page.
+    """
+    table_style = [
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -4), [colors.white, colors.lightgrey]),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTSIZE', (0, 0), (-1, -1), 10),
+        ('FONTNAME', (0, -3), (-1, -1), 'Times-Bold'),
+    ]
+
+    print('Summary rows performance test...')
+    for row_num in row_nums:
+        data = [['Row No', 'Amount']]
+        for row in range(row_num):
+            data.append([RowNumber(), '%d.%02d' % (row % 9973, row % 100)])
+        data.append(['Previous pages:', PreviousPagesColSum()])
+        data.append(['Current page:', CurrentPageColSum()])
+        data.append(['Total:', TotalPagesColSum()])
+
+        a = time.time()
+        table = SpreadsheetTable(data, repeatRows=1, repeatRowsB=3,
+                                 style=table_style)
+        create_pdfdoc('spreadsheet_summary_%d.pdf' % row_num, [table])
+        b = time.time()
+        msg = 'SpreadsheetTable generation time with summary rows (%d rows): %s.'
+        msg %= (row_num, b - a)
+        print(msg)
+
+
 if __name__ == '__main__':
     demo()
@@ -3,9 +3,102 @@
 __author__ = u'Tomasz Świderski <contact@tomaszswiderski.com>'
 __copyright__ = u'Copyright (c) 2010 Tomasz Świderski'
 
+from bisect import bisect_left
+from collections import OrderedDict
 from decimal import Decimal as D, InvalidOperation as DConversionError
 
 
+class ColumnIndex(object):
+
+    """
+    Prefix sums of one column of table data.
+
+    Sum of plain values in rows [start, end) is sums[end] - sums[start], so
+    formulas don't have to rescan and reconvert the column on every split and
+    draw. Cells holding formulas and values which can't be converted are
+    kept in sorted row lists, so they can be found with bisect and handled
+    exactly like the linear scan did.
+    """
+
+    def __init__(self, data, col_num):
+        self.data = data
+        self.col_num = col_num
+        self.formula_rows = []
+        self.invalid_rows = []   # D(value) raises DConversionError
+        self.broken_rows = []    # D(value) raises anything else
+        self.sums = sums = [D(0)]
+        total = D(0)
+        for row_num, row in enumerate(data):
+            col_value = row[col_num]
+            if isinstance(col_value, Formula):
+                self.formula_rows.append(row_num)
+            else:
+                try:
+                    total += D(col_value)
+                except DConversionError:
+                    self.invalid_rows.append(row_num)
+                except Exception:
+                    self.broken_rows.append(row_num)
+            sums.append(total)
+
+    def is_valid(self, data, col_num):
+        """
+        Checks if index was built for given data. Table data is not expected
+        to change after table creation, only its length is verified.
+        """
+        return (self.data is data and self.col_num == col_num and
+                len(self.sums) == len(data) + 1)
+
+    def _first_row(self, rows, start, end):
+        i = bisect_left(rows, start)
+        if i < len(rows) and rows[i] < end:
+            return rows[i]
+        return None
+
+    def sum(self, start, end, ignore_convert_errors, evaluate):
+        """
+        Returns sum of column values in rows [start, end). Values of formula
+        cells are taken from evaluate(row_num).
+        """
+        # Reconverting the first offending value raises the same error as
+        # the linear scan would.
+        row_num = self._first_row(self.broken_rows, start, end)
+        if row_num is None and not ignore_convert_errors:
+            row_num = self._first_row(self.invalid_rows, start, end)
+        if row_num is not None:
+            D(self.data[row_num][self.col_num])
+
+        sum = self.sums[end] - self.sums[start]
+        lo = bisect_left(self.formula_rows, start)
+        hi = bisect_left(self.formula_rows, end)
+        for row_num in self.formula_rows[lo:hi]:
+            try:
+                sum += D(evaluate(row_num))
+            except DConversionError:
+                if not ignore_convert_errors:
+                    raise
+        return sum
+
+
+# Indexes are shared by all formulas summing the same table column.
+_column_indexes = OrderedDict()
+_COLUMN_INDEXES_SIZE = 32
+
+
+def get_column_index(data, col_num):
+    """
+    Returns ColumnIndex of data column, building it on first use.
+    """
+    key = (id(data), col_num)
+    index = _column_indexes.pop(key, None)
+    if index is None or not index.is_valid(data, col_num):
+        index = ColumnIndex(data, col_num)
+    _column_indexes[key] = index
+    while len(_column_indexes) > _COLUMN_INDEXES_SIZE:
+        _column_indexes.popitem(last=False)
+    return index
+
+
 class Formula(object):
 
     """
@@ -59,28 +152,16 @@ class CurrentPageColSum(Formula):
         be considered.  All data will be converted to decimals. Unconvertable
         values can be ignored or cause to raise Exception.
         """
-        # Takes slice of data which will be used in evaluation.
         cell_row = cell_coord[1]
         if active_rows[0] <= cell_row < active_rows[1]:
             raise ValueError('Formula inside range to be evaluated!')
 
-        active_data = data[active_rows[0]:active_rows[1]]
-
         col_num = cell_coord[0]
-        sum = D(0)
-
-        for row_num, row in enumerate(active_data):
-            col_value = row[col_num]
-            if isinstance(col_value, Formula):
-                col_value = col_value(data, repeat_rows, repeat_rows_b,
-                                      active_rows, (col_num, row_num + active_rows[0]))
-            try:
-                value = D(col_value)
-            except DConversionError:
-                if not self._ignore_convert_errors:
-                    raise
-                continue
-            sum += value
+        evaluate = lambda row_num: data[row_num][col_num](
+            data, repeat_rows, repeat_rows_b, active_rows, (col_num, row_num))
+        sum = get_column_index(data, col_num).sum(
+            active_rows[0], active_rows[1], self._ignore_convert_errors,
+            evaluate)
         format_str = '%%.%df' % self._decimal_places
 
         return format_str % sum
@@ -89,29 +170,17 @@ class CurrentPageColSum(Formula):
         """
         Returns largest possible value of Formula.
         """
-        # Takes slice of data which will be used in evaluation.
         cell_row = cell_coord[1]
         end_row = len(data) - repeat_rows_b
         if repeat_rows <= cell_row < end_row:
             raise ValueError('Formula inside range to be evaluated!')
 
-        active_data = data[repeat_rows:end_row]
-
         col_num = cell_coord[0]
-        sum = D(0)
-
-        for row_num, row in enumerate(active_data):
-            col_value = row[col_num]
-            if isinstance(col_value, Formula):
-                col_value = col_value(data, repeat_rows, repeat_rows_b,
-                                      (repeat_rows, end_row), (col_num, row_num + repeat_rows))
-            try:
-                value = D(col_value)
-            except DConversionError:
-                if not self._ignore_convert_errors:
-                    raise
-                continue
-            sum += value
+        evaluate = lambda row_num: data[row_num][col_num](
+            data, repeat_rows, repeat_rows_b, (repeat_rows, end_row),
+            (col_num, row_num))
+        sum = get_column_index(data, col_num).sum(
+            repeat_rows, end_row, self._ignore_convert_errors, evaluate)
         format_str = '%%.%df' % self._decimal_places
 
         return format_str % sum
@@ -137,28 +206,16 @@ class PreviousPagesColSum(Formula):
         All data will be converted to decimals. Unconvertable values
         can be ignored or cause to raise Exception.
         """
-        # Takes slice of data which will be used in evaluation.
         cell_row = cell_coord[1]
         if repeat_rows <= cell_row < active_rows[0]:
             raise ValueError('Formula inside range to be evaluated!')
 
-        active_data = data[repeat_rows:active_rows[0]]
-
         col_num = cell_coord[0]
-        sum = self._starting_value
-
-        for row_num, row in enumerate(active_data):
-            col_value = row[col_num]
-            if isinstance(col_value, Formula):
-                col_value = col_value(data, repeat_rows, repeat_rows_b,
-                                      active_rows, (col_num, row_num + active_rows[0]))
-            try:
-                value = D(col_value)
-            except DConversionError:
-                if not self._ignore_convert_errors:
-                    raise
-                continue
-            sum += value
+        evaluate = lambda row_num: data[row_num][col_num](
+            data, repeat_rows, repeat_rows_b, active_rows, (col_num, row_num))
+        sum = self._starting_value + get_column_index(data, col_num).sum(
+            repeat_rows, active_rows[0], self._ignore_convert_errors,
+            evaluate)
         format_str = '%%.%df' % self._decimal_places
 
         return format_str % sum
@@ -167,29 +224,17 @@ class PreviousPagesColSum(Formula):
         """
         Returns largest possible value of Formula.
         """
-        # Takes slice of data which will be used in evaluation.
         cell_row = cell_coord[1]
         end_row = len(data) - repeat_rows_b
         if repeat_rows <= cell_row < end_row:
             raise ValueError('Formula inside range to be evaluated!')
 
-        active_data = data[repeat_rows:end_row]
-
         col_num = cell_coord[0]
-        sum = self._starting_value
-
-        for row_num, row in enumerate(active_data):
-            col_value = row[col_num]
-            if isinstance(col_value, Formula):
-                col_value = col_value(data, repeat_rows, repeat_rows_b,
-                                      (repeat_rows, end_row), (col_num, row_num + repeat_rows))
-            try:
-                value = D(col_value)
-            except DConversionError:
-                if not self._ignore_convert_errors:
-                    raise
-                continue
-            sum += value
+        evaluate = lambda row_num: data[row_num][col_num](
+            data, repeat_rows, repeat_rows_b, (repeat_rows, end_row),
+            (col_num, row_num))
+        sum = self._starting_value + get_column_index(data, col_num).sum(
+            repeat_rows, end_row, self._ignore_convert_errors, evaluate)
         format_str = '%%.%df' % self._decimal_places
 
         return format_str % sum
@@ -263,12 +308,9 @@ class RowNumber(Formula):
         """
         Returns largest possible value of Formula.
         """
-        # Takes slice of data which will be used in evaluation.
         cell_row = cell_coord[1]
         end_row = len(data) - repeat_rows_b
         if not repeat_rows <= cell_row < end_row:
             raise ValueError('Formula must be inside visible range!')
 
-        active_data = data[repeat_rows:end_row]
-
-        return str(len(active_data))
+        return str(end_row - repeat_rows)
@@ -7,6 +7,8 @@ from reportlab.platypus.tables import *
 from reportlab.platypus.tables import (_rowLen, _calc_pc, _hLine, _multiLine,
     _convert2int, _endswith, _isLineCommand, _setCellStyle)
 
+from bisect import bisect_right
+
 from formula import Formula
 
 def spanFixDim(V0,V,spanCons,FUZZ=rl_config._FUZZ):
@@ -29,7 +31,7 @@ class SpreadsheetTable(Flowable):
     def __init__(self, data, colWidths=None, rowHeights=None, style=None,
         repeatRows=0, repeatCols=0, splitByRow=1, emptyTableAction=None,
         ident=None, hAlign='CENTER', vAlign='MIDDLE', normalizedData=0,
-        cellStyles=None, activeRows=None, repeatRowsB=0):
+        cellStyles=None, activeRows=None, repeatRowsB=0, _ncols=None):
 
         self.ident = ident
         self.hAlign = hAlign
@@ -45,7 +47,10 @@ class SpreadsheetTable(Flowable):
         self._cellvalues = []
         _seqCW = isinstance(colWidths,(tuple,list))
         _seqRH = isinstance(rowHeights,(tuple,list))
-        if nrows: self._ncols = ncols = max(map(_rowLen,data))
+        # _ncols is passed by _copy: data was already checked by the table
+        # being split, so long tables don't rescan every row on each split.
+        if nrows and _ncols is not None: self._ncols = ncols = _ncols
+        elif nrows: self._ncols = ncols = max(map(_rowLen,data))
         elif colWidths and _seqCW: ncols = len(colWidths)
         else: ncols = 0
         if not emptyTableAction: emptyTableAction = rl_config.emptyTableAction
@@ -86,6 +91,7 @@ class SpreadsheetTable(Flowable):
         elif len(rowHeights) != nrows:
             raise ValueError("%s data error - %d rows in data but %d in row heights" % (self.identity(),nrows, len(rowHeights)))
         for i,d in enumerate(data):
+            if _ncols is not None: break
             n = len(d)
             if n!=ncols:
                 if rl_config.allowShortTableRows and isinstance(d,list):
@@ -300,7 +306,8 @@ class SpreadsheetTable(Flowable):
 
         hmax = lim = len(H)
 
-        if None in H:
+        # Once cumulative heights exist, all row heights are known.
+        if getattr(self, '_cumRowHeights', None) is None and None in H:
             canv = getattr(self,'canv',None)
             saved = None
             #get a handy list of any cells which span rows. should be ignored for sizing
@@ -315,8 +322,8 @@ class SpreadsheetTable(Flowable):
             if canv: saved = canv._fontname, canv._fontsize, canv._leading
             spanCons = {}
             FUZZ = rl_config._FUZZ
-            while None in H:
-                i = H.index(None)
+            # one pass over unknown rows, H.index(None) per row is quadratic
+            for i in [i for i, h in enumerate(H) if h is None]:
                 V = self._cellvalues[i] # values for row i
                 S = self._cellStyles[i] # styles for row i
                 h = 0
@@ -360,14 +367,44 @@ class SpreadsheetTable(Flowable):
 
         hmax = self._activeRows[1]
         activeRows0 = self._activeRows[0] if self._activeRows[0] is not None else self.repeatRows # ugly hack to make it backward compatible
-        height = self._height = sum(H[:self.repeatRows] +
-            H[activeRows0:hmax] +
+        C = self._getCumRowHeights()
+        self._height = (C[self.repeatRows] + C[hmax] - C[activeRows0] +
+            C[self._nrows] - C[self._nrows-self._repeatRowsB])
+        # Row positions are only needed for drawing. Remaining part of a long
+        # table is wrapped and split many times, so they are built lazily.
+        self._rowpositionsCache = None
+
+    def _getCumRowHeights(self):
+        """
+        Returns cumulative row heights, C[i] is height of rows [0, i).
+        Row heights don't change once calculated, so the list is built once
+        and shared with split parts.
+        """
+        C = getattr(self, '_cumRowHeights', None)
+        if C is None or len(C) != self._nrows + 1:
+            C = [0]
+            for h in self._rowHeights:
+                C.append(C[-1] + h)
+            self._cumRowHeights = C
+        return C
+
+    def _getRowPositions(self):
+        rowpositions = getattr(self, '_rowpositionsCache', None)
+        if rowpositions is not None:
+            return rowpositions
+        H = self._rowHeights
+        activeRows0 = self._activeRows[0] if self._activeRows[0] is not None else self.repeatRows # ugly hack to make it backward compatible
+        visibleH = (H[:self.repeatRows] + H[activeRows0:self._activeRows[1]] +
             H[self._nrows-self._repeatRowsB:])
-        self._rowpositions = [height]    # index 0 is actually topline; we skip when processing cells
-        for h in H[:self.repeatRows] + H[activeRows0:hmax] + H[self._nrows-self._repeatRowsB:]:
+        height = sum(visibleH)
+        rowpositions = [height]    # index 0 is actually topline; we skip when processing cells
+        for h in visibleH:
             height = height - h
-            self._rowpositions.append(height)
+            rowpositions.append(height)
         assert abs(height)<1e-8, 'Internal height error'
+        self._rowpositionsCache = rowpositions
+        return rowpositions
+    _rowpositions = property(_getRowPositions)
 
     def _calc(self, availWidth, availHeight):
         #if hasattr(self,'_width'): return
@@ -878,6 +915,26 @@ class SpreadsheetTable(Flowable):
             activeRows0 <= row_num < self._activeRows[1] or
             self._nrows - self._repeatRowsB <= row_num < self._nrows)
 
+    def _visible_range(self, first, last, lines=False):
+        """
+        Returns visible rows (or lines) from first to last inclusive, in
+        increasing order. Same as filtering with _is_visible_row
+        (_is_visible_line), but only visible part of range is visited.
+        """
+        activeRows0 = self._activeRows[0] if self._activeRows[0] is not None else self.repeatRows # ugly hack to make it backward compatible
+        e = lines and 1 or 0
+        visible = []
+        start = first
+        for lo, hi in ((0, self.repeatRows + e),
+                (activeRows0, self._activeRows[1] + e),
+                (self._nrows - self._repeatRowsB, self._nrows + e)):
+            lo = max(lo, start)
+            hi = min(hi, last + 1)
+            if lo < hi:
+                visible.extend(xrange(lo, hi))
+                start = hi
+        return visible
+
     def _abs_to_vis(self, line_num):
         """
         Translates absolute line positions to relative (visible positions).
@@ -963,11 +1020,7 @@ class SpreadsheetTable(Flowable):
             return
 
         # Some parts visible - searching for visible rows.
-        visible = []
-        for i in xrange(sr, er + 1):
-            if not self._is_visible_row(i):
-                continue
-            visible.append(i)
+        visible = self._visible_range(sr, er)
 
         # Generates line for each visible row.
         for vis in visible:
@@ -982,11 +1035,7 @@ class SpreadsheetTable(Flowable):
             return
 
         # Some parts visible - searching for visible rows.
-        visible = []
-        for i in xrange(sr, er + 1):
-            if not self._is_visible_row(i):
-                continue
-            visible.append(i)
+        visible = self._visible_range(sr, er)
 
         # Generates line for each visible row.
         for vis in visible:
@@ -1003,7 +1052,7 @@ class SpreadsheetTable(Flowable):
     def _drawHLines(self, (sc, sr), (ec, er), weight, color, count, space):
         ecp = self._colpositions[sc:ec+2]
 
-        visible = [i for i in range(sr, er + 1) if self._is_visible_line(i)]
+        visible = self._visible_range(sr, er, lines=True)
         rp_pos = [self._abs_to_vis(abs_num) for abs_num in visible]
         rp = [self._rowpositions[pos] for pos in rp_pos]
 
@@ -1022,7 +1071,7 @@ class SpreadsheetTable(Flowable):
                 _hLine(lf, scp, ecp, y, hBlocks)
 
     def _drawVLines(self, (sc, sr), (ec, er), weight, color, count, space):
-        visible = [i for i in range(sr, er + 1) if self._is_visible_line(i)]
+        visible = self._visible_range(sr, er, lines=True)
         rp_pos = [self._abs_to_vis(abs_num) for abs_num in visible]
         erp = [self._rowpositions[pos] for pos in rp_pos]
 
@@ -1080,7 +1129,7 @@ class SpreadsheetTable(Flowable):
         n=self._getFirstPossibleSplitRowPosition(availHeight)
         if n==0: return []
         activeRows0 = self._activeRows[0] if self._activeRows[0] is not None else self.repeatRows # ugly hack to make it backward compatible
-        lim = len(self._rowHeights[activeRows0:self._activeRows[1]])
+        lim = self._activeRows[1] - activeRows0
         if n==lim: return [self]
 
         R0 = self._copy()
@@ -1127,17 +1176,18 @@ class SpreadsheetTable(Flowable):
                     self._nosplitRanges)
             self._impossible = impossible
 
-        h = sum(self._rowHeights[:self.repeatRows])
-        h += sum(self._rowHeights[self._nrows-self._repeatRowsB:])
-        split_at = 0 # from this point of view 0 is the first position where the table may *always* be splitted
+        C = self._getCumRowHeights()
+        h = C[self.repeatRows] + C[self._nrows] - C[self._nrows-self._repeatRowsB]
         activeRows0 = self._activeRows[0] if self._activeRows[0] is not None else self.repeatRows # ugly hack to make it backward compatible
-        for n, rh in enumerate(self._rowHeights[activeRows0:self._activeRows[1]]):
-            if h+rh>availHeight:
-                break
-            if not impossible.has_key(self._vis_to_abs(n+self.repeatRows)):
-                split_at=n + 1
-            h=h+rh
-        return split_at
+        # Number of active rows which fit, found by bisection of cumulative
+        # row heights instead of walking them.
+        fit = bisect_right(C, C[activeRows0] + availHeight - h, activeRows0,
+            self._activeRows[1] + 1) - 1 - activeRows0
+        # from this point of view 0 is the first position where the table may *always* be splitted
+        for n in xrange(max(fit, 0), 0, -1):
+            if not impossible.has_key(self._vis_to_abs(n - 1 + self.repeatRows)):
+                return n
+        return 0
 
     def split(self, availWidth, availHeight):
         self._calc(availWidth, availHeight)
@@ -1209,11 +1259,7 @@ class SpreadsheetTable(Flowable):
         spanRects = getattr(self,'_spanRects',None)
         for cmd, (sc, sr), (ec, er), arg in self._bkgrndcmds:
 
-            visible = []
-            for row_num in xrange(sr, er + 1):
-                if not self._is_visible_row(row_num):
-                    continue
-                visible.append(row_num)
+            visible = self._visible_range(sr, er)
             if not visible:
                 continue
             sr = self._abs_to_vis(visible[0])
@@ -1351,7 +1397,7 @@ class SpreadsheetTable(Flowable):
             splitByRow = self.splitByRow, normalizedData = 1,
             cellStyles = self._cellStyles, activeRows = self._activeRows,
             repeatRowsB = self._repeatRowsB, hAlign = self.hAlign,
-            vAlign = self.vAlign, ident = self.ident)
+            vAlign = self.vAlign, ident = self.ident, _ncols = self._ncols)
 
         # copy the commands
         shadow._linecmds = self._linecmds
@@ -1372,6 +1418,7 @@ class SpreadsheetTable(Flowable):
             shadow._rowNoSplitCells = self._rowNoSplitCells
 
         shadow._impossible = getattr(self, '_impossible', None)
+        shadow._cumRowHeights = getattr(self, '_cumRowHeights', None)
 
         return shadow
 
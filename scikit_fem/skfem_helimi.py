@@ -1,6 +1,9 @@
 import skfem
 import numpy as np
-from scipy.sparse import coo_matrix, bmat, identity, isspmatrix_coo, block_diag
+import time
+from collections import OrderedDict
+from scipy.sparse import coo_matrix, bmat, identity, isspmatrix_coo, block_diag, csc_matrix
+from scipy.sparse.linalg import splu
 # from helmi import Helmholtz
 
 import skfem
@@ -106,10 +109,13 @@ def helmholtz_near2far(w):
 
 
 class Helmholtz:
-    def __init__(self, mesh: skfem.Mesh, element: skfem.Element) -> None:
+    def __init__(self, mesh: skfem.Mesh, element: skfem.Element, dtype=np.float64) -> None:
+        # dtype=np.complex128 assembles and solves the complex system directly instead of
+        # separate real/imaginary matrices staggered into a real system of twice the size
         self.mesh = mesh
         self.element = element
         self.basis = skfem.Basis(mesh, element)
+        self.dtype = np.dtype(dtype)
 
         self.phi = None
         self.phi_re = None
@@ -123,8 +129,48 @@ class Helmholtz:
         self._A_mass_im = None
         self._b_re = None
         self._b_im = None
+        self._A_laplace = None
+        self._A_mass = None
+        self._b = None
+        self._sweep_terms = {}
+        self.lu_cache_size = 8
+        self.timing = {}
+
+    @property
+    def is_complex(self) -> bool:
+        return np.issubdtype(self.dtype, np.complexfloating)
+
+    def _accumulate(self, name: str, value) -> None:
+        current = getattr(self, name)
+        setattr(self, name, value if current is None else current + value)
+
+    def _assemble_complex(self, name: str, form, basis, **fields) -> None:
+        # single complex assembly; skipped for all-zero coefficients like the real path
+        if all(np.allclose(field, 0) for field in fields.values()):
+            return
+        self._accumulate(name, skfem.asm(form, basis, **fields))
 
     def assemble_subdomains(self, alpha: dict = None, beta: dict = None, f: dict = None) -> None:
+        if self.is_complex:
+            alpha_c = self.basis.zeros(dtype=self.dtype)
+            beta_c = self.basis.zeros(dtype=self.dtype)
+            f_c = self.basis.zeros(dtype=self.dtype)
+            for subdomain in self.mesh.subdomains.keys():
+                dofs = self.basis.get_dofs(elements=subdomain)
+                if alpha is not None and subdomain in alpha:
+                    alpha_c[dofs] = alpha[subdomain]
+                if beta is not None and subdomain in beta:
+                    beta_c[dofs] = beta[subdomain]
+                if f is not None and subdomain in f:
+                    f_c[dofs] = f[subdomain]
+            self._accumulate('_A_laplace', skfem.asm(
+                skfem.BilinearForm(helmholtz_laplace, dtype=self.dtype), self.basis, alpha=alpha_c))
+            self._accumulate('_A_mass', skfem.asm(
+                skfem.BilinearForm(helmholtz_mass, dtype=self.dtype), self.basis, beta=beta_c))
+            self._accumulate('_b', skfem.asm(
+                skfem.LinearForm(helmholtz_excitation, dtype=self.dtype), self.basis, f=f_c))
+            return
+
         alpha_re = self.basis.zeros()
         alpha_im = self.basis.zeros()
         beta_re = self.basis.zeros()
@@ -182,6 +228,36 @@ class Helmholtz:
             self._b_im += b_im
 
     def assemble_boundaries_3rd(self, gamma: dict = None, gamma2: dict = None, q: dict = None) -> None:
+        if self.is_complex:
+            gamma1_c = self.basis.zeros(dtype=self.dtype)
+            gamma2_c = self.basis.zeros(dtype=self.dtype)
+            q_c = self.basis.zeros(dtype=self.dtype)
+            boundaries_lhs = []
+            boundaries_rhs = []
+            for boundary in self.mesh.boundaries.keys():
+                dofs = self.basis.get_dofs(boundary)
+                if gamma is not None and boundary in gamma:
+                    gamma1_c[dofs] = gamma[boundary]
+                    if boundary not in boundaries_lhs:
+                        boundaries_lhs.append(boundary)
+                if gamma2 is not None and boundary in gamma2:
+                    gamma2_c[dofs] = gamma2[boundary]
+                    if boundary not in boundaries_lhs:
+                        boundaries_lhs.append(boundary)
+                if q is not None and boundary in q:
+                    q_c[dofs] = q[boundary]
+                    if boundary not in boundaries_rhs:
+                        boundaries_rhs.append(boundary)
+            if len(boundaries_lhs) > 0:
+                self._assemble_complex('_A_mass', skfem.BilinearForm(helmholtz_mass, dtype=self.dtype),
+                                       self.basis.boundary(boundaries_lhs), beta=gamma1_c)
+                self._assemble_complex('_A_laplace', skfem.BilinearForm(helmholtz_abc2, dtype=self.dtype),
+                                       self.basis.boundary(boundaries_lhs), gamma2=gamma2_c)
+            if len(boundaries_rhs) > 0:
+                self._assemble_complex('_b', skfem.LinearForm(helmholtz_excitation, dtype=self.dtype),
+                                       self.basis.boundary(boundaries_rhs), f=q_c)
+            return
+
         gamma1_re = self.basis.zeros()
         gamma1_im = self.basis.zeros()
         gamma2_re = self.basis.zeros()
@@ -297,6 +373,13 @@ class Helmholtz:
                 if boundary not in boundaries_rhs:
                     boundaries_rhs.append(boundary)
 
+        if self.is_complex:
+            self._assemble_complex('_A_mass', skfem.BilinearForm(helmholtz_mass, dtype=self.dtype),
+                                   self.basis.boundary(boundaries_lhs), beta=gamma_re + 1j * gamma_im)
+            self._assemble_complex('_b', skfem.LinearForm(helmholtz_excitation, dtype=self.dtype),
+                                   self.basis.boundary(boundaries_rhs), f=q_re + 1j * q_im)
+            return gamma_n, phi_n
+
         c = skfem.asm(helmholtz_mass, self.basis.boundary(
             boundaries_lhs), beta=gamma_re)
         if self._A_mass_re is None:
@@ -357,10 +440,11 @@ class Helmholtz:
                 a_re = a_re.tocoo()
             if not isspmatrix_coo(a_im):
                 a_im = a_im.tocoo()
-            a = coo_matrix(([*a_re.data, *a_re.data, *(-1 * a_im.data), *a_im.data],
-                            ([*(2 * a_re.row), *(2 * a_re.row + 1), *(2 * a_im.row), *(2 * a_im.row + 1)],
-                             [*(2 * a_re.col), *(2 * a_re.col + 1), *(2 * a_im.col + 1), *(2 * a_im.col)])),
-                           shape=(2 * a_re.shape[0], 2 * a_re.shape[1])).tocsr()
+            # [[re, -im], [im, re]] per entry, built with index arithmetic on the COO arrays
+            data = np.concatenate((a_re.data, a_re.data, -1 * a_im.data, a_im.data))
+            row = np.concatenate((2 * a_re.row, 2 * a_re.row + 1, 2 * a_im.row, 2 * a_im.row + 1))
+            col = np.concatenate((2 * a_re.col, 2 * a_re.col + 1, 2 * a_im.col + 1, 2 * a_im.col))
+            a = coo_matrix((data, (row, col)), shape=(2 * a_re.shape[0], 2 * a_re.shape[1])).tocsr()
         elif len(a_re.shape) == 1:
             # vector
             a = np.empty(2 * a_re.shape[0])
@@ -371,7 +455,32 @@ class Helmholtz:
 
         return a
 
+    def _solve_complex(self, direct=True):
+        A = self._A_laplace + self._A_mass
+        b = self._b if self._b is not None else self.basis.zeros(dtype=self.dtype)
+
+        if direct:
+            solver = skfem.solver_direct_scipy()
+        else:
+            # iLU preconditioning
+            M = skfem.build_pc_ilu(A)
+            solver = skfem.solver_iter_krylov(M=M, x0=M.matvec(b))
+
+        if self._boundaries_dirichlet is not None and len(self._boundaries_dirichlet) > 0:
+            D = self.basis.get_dofs(self._boundaries_dirichlet).flatten()
+            x = self._phi_dirichlet_re + 1j * self._phi_dirichlet_im
+            phi = skfem.solve(*skfem.condense(A, b, x=x, D=D), solver=solver)
+        else:
+            phi = skfem.solve(A, b, solver=solver)
+
+        self.phi = phi
+        self.phi_re = phi.real
+        self.phi_im = phi.imag
+
     def solve(self, direct=True, cuda=False):
+        if self.is_complex:
+            return self._solve_complex(direct=direct)
+
         A = self._stagger_re_im(a_re=self._A_laplace_re + self._A_mass_re,
                                 a_im=self._A_laplace_im + self._A_mass_im)
         b = self._stagger_re_im(a_re=self._b_re, a_im=self._b_im)
@@ -422,6 +531,155 @@ class Helmholtz:
         self.phi_im = phi[1::2]
         self.phi = self.phi_re + 1j * self.phi_im
 
+    @staticmethod
+    def _indicators(regions, get_dofs, n):
+        # 0/1 dof fields per region; later regions overwrite shared dofs, exactly like
+        # the sequential assignment in `assemble_subdomains` / `assemble_boundaries_3rd`
+        owner = np.full(n, -1)
+        for i, region in enumerate(regions):
+            owner[get_dofs(region)] = i
+        return [(owner == i).astype(float) for i in range(len(regions))]
+
+    def _assemble_sweep_terms(self, keys: dict) -> dict:
+        # assemble every (coefficient, region) contribution once with unit coefficient,
+        # condense it to the free dofs and align it on one common CSC sparsity pattern
+        t0 = time.perf_counter()
+        n = self.basis.N
+        subdomains = [s for s in self.mesh.subdomains.keys()]
+        boundaries = [b for b in self.mesh.boundaries.keys()]
+        boundaries_lhs = [b for b in boundaries if b in keys['gamma'] or b in keys['gamma2']]
+        boundaries_rhs = [b for b in boundaries if b in keys['q']]
+
+        lhs = {}
+        rhs = {}
+        for name, form, arg in (('alpha', helmholtz_laplace, 'alpha'), ('beta', helmholtz_mass, 'beta'),
+                                ('f', helmholtz_excitation, 'f')):
+            regions = [s for s in subdomains if s in keys[name]]
+            chis = self._indicators(regions, lambda s: self.basis.get_dofs(elements=s), n)
+            for region, chi in zip(regions, chis):
+                c = skfem.asm(form, self.basis, **{arg: chi})
+                if name == 'f':
+                    rhs[name, region] = c
+                else:
+                    lhs[name, region] = c
+        for name, form, arg, regions in (('gamma', helmholtz_mass, 'beta', boundaries_lhs),
+                                         ('gamma2', helmholtz_abc2, 'gamma2', boundaries_lhs),
+                                         ('q', helmholtz_excitation, 'f', boundaries_rhs)):
+            selected = [b for b in regions if b in keys[name]]
+            if len(selected) == 0:
+                continue
+            fbasis = self.basis.boundary(regions)
+            chis = self._indicators(selected, lambda b: self.basis.get_dofs(b), n)
+            for region, chi in zip(selected, chis):
+                c = skfem.asm(form, fbasis, **{arg: chi})
+                if name == 'q':
+                    rhs[name, region] = c
+                else:
+                    lhs[name, region] = c
+
+        if self._boundaries_dirichlet is not None and len(self._boundaries_dirichlet) > 0:
+            D = self.basis.get_dofs(self._boundaries_dirichlet).flatten()
+            x_D = (self._phi_dirichlet_re + 1j * self._phi_dirichlet_im)[D]
+        else:
+            D = np.zeros(0, dtype=int)
+            x_D = np.zeros(0)
+        I = np.setdiff1d(np.arange(n), D)
+
+        # common pattern of the condensed operator, stored column-major for splu
+        names = list(lhs.keys())
+        blocks = [lhs[name].tocsr()[I] for name in names]
+        coos = [block[:, I].tocoo() for block in blocks]
+        nI = I.size
+        pos = [c.col.astype(np.int64) * nI + c.row for c in coos]
+        pattern = np.unique(np.concatenate(pos))
+        cols = pattern // nI
+        data = np.array([np.bincount(np.searchsorted(pattern, p), weights=c.data, minlength=pattern.size)
+                         for p, c in zip(pos, coos)])
+        lifts = np.array([block[:, D] @ x_D if D.size > 0 else np.zeros(nI) for block in blocks])
+
+        self.timing['assembly'] = time.perf_counter() - t0
+        return {'names': names,
+                'data': data,
+                'lifts': lifts,
+                'indices': (pattern % nI).astype(np.int32),
+                'indptr': np.searchsorted(cols, np.arange(nI + 1)).astype(np.int32),
+                'rhs': {name: vec[I] for name, vec in rhs.items()},
+                'I': I,
+                'D': D,
+                'x_D': x_D,
+                'lu': OrderedDict()}
+
+    def solve_sweep(self, params, alpha, beta, f=None, gamma=None, gamma2=None, q=None) -> np.ndarray:
+        """Solve the Helmholtz problem for every entry of `params` with one assembly.
+
+        Each coefficient is either a dict {region: value} as for `assemble_subdomains` /
+        `assemble_boundaries_3rd`, or a callable `p -> dict` evaluated for every sweep parameter
+        `p` (e.g. `beta=lambda k0: {'air': -k0 ** 2}`). `f` and `q` may also return a list of
+        dicts to solve several excitations at once. The unit-coefficient matrices are
+        assembled and condensed once; the operator for each `p` is a linear combination of
+        their data on a common sparsity pattern and identical operators reuse their LU
+        factorization. The Dirichlet values from `assemble_boundaries_dirichlet` are applied.
+
+        Returns the complex solutions with shape (len(params), N) or, for multiple
+        excitations, (len(params), N, n_rhs). Timings are stored in `self.timing`.
+        """
+        specs = {'alpha': alpha, 'beta': beta, 'f': f, 'gamma': gamma, 'gamma2': gamma2, 'q': q}
+
+        def evaluate(p):
+            values = {}
+            for name, spec in specs.items():
+                value = spec(p) if callable(spec) else spec
+                if value is None:
+                    value = {}
+                values[name] = value if isinstance(value, (list, tuple)) else [value]
+            return values
+
+        values = [evaluate(p) for p in params]
+        keys = {name: tuple(sorted({k for v in values for d in v[name] for k in d}))
+                for name in specs}
+        cache_key = tuple(sorted(keys.items())) + (tuple(self._boundaries_dirichlet or ()),)
+        if cache_key not in self._sweep_terms:
+            self._sweep_terms[cache_key] = self._assemble_sweep_terms(keys)
+        else:
+            self.timing['assembly'] = 0.0
+        terms = self._sweep_terms[cache_key]
+        I, D, nI = terms['I'], terms['D'], terms['I'].size
+
+        n_rhs = max(len(v[name]) for v in values for name in ('f', 'q'))
+        phis = np.zeros((len(params), self.basis.N, n_rhs), dtype=complex)
+        self.timing['factorize'] = []
+        self.timing['solve'] = []
+        for i, v in enumerate(values):
+            coeffs = np.array([v[name][0].get(region, 0) for name, region in terms['names']], dtype=complex)
+
+            t0 = time.perf_counter()
+            lu_key = tuple(np.round(coeffs, 12))
+            lu = terms['lu'].pop(lu_key, None)
+            if lu is None:
+                A = csc_matrix((coeffs @ terms['data'], terms['indices'], terms['indptr']), shape=(nI, nI))
+                lu = splu(A)
+            terms['lu'][lu_key] = lu
+            while len(terms['lu']) > self.lu_cache_size:
+                terms['lu'].popitem(last=False)
+            t1 = time.perf_counter()
+
+            # block of right-hand sides, one column per excitation
+            b = np.zeros((nI, n_rhs), dtype=complex)
+            for name in ('f', 'q'):
+                for j, d in enumerate(v[name]):
+                    for region, value in d.items():
+                        b[:, j] += value * terms['rhs'][name, region]
+            b -= (coeffs @ terms['lifts'])[:, None]
+            phis[i, I] = lu.solve(b)
+            phis[i, D] = terms['x_D'][:, None]
+            self.timing['factorize'].append(t1 - t0)
+            self.timing['solve'].append(time.perf_counter() - t1)
+
+        self.phi = phis[-1, :, 0]
+        self.phi_re = self.phi.real
+        self.phi_im = self.phi.imag
+        return phis[:, :, 0] if n_rhs == 1 else phis
+
     def solve_eigenmodes_boundary(self, boundary, n_modes=1):
         # dofs = self.basis.get_dofs(facets=boundary)
         # x, y = self.basis.doflocs[:, dofs]
@@ -607,28 +865,77 @@ class Helmholtz:
     def flux_ez(self, ez: skfem.DiscreteField, boundaries: list):
         pass
 
-    def create_gif(self, field: skfem.DiscreteField, n_frames=36):
-        import matplotlib.pyplot as mplt
-        from skfem.visuals.matplotlib import plot
-        import matplotlib.animation as animation
-        import os
-        import subprocess
+    def create_gif(self, field: skfem.DiscreteField, n_frames=36, filename='video.gif', fps=8, figsize=(6, 6),
+                   dpi=100, nrefs=1, workers=None) -> str:
+        """Animate `Re(field * exp(1j * phi))` over one period and write it as GIF or MP4.
+
+        The refined triangulation and its face values are computed once; each frame only
+        updates the colour array of one tripcolor collection. Frames are rendered across a
+        process pool and encoded from memory (Pillow for .gif, an ffmpeg pipe for .mp4),
+        so no temporary files are written and the working directory is left alone.
+        """
+        import multiprocessing
+
+        m, z_re = self.basis.refinterp(np.real(field), nrefs=nrefs)
+        _, z_im = self.basis.refinterp(np.imag(field), nrefs=nrefs)
+        triangles = m.t.T
+        # flat shading colours each triangle by the mean of its corner values (like tripcolor)
+        z_faces = (z_re + 1j * z_im)[triangles].mean(axis=1)
+        vmax = np.abs(z_faces).max()
+        phases = np.arange(n_frames) / n_frames * 2 * np.pi
+
+        workers = workers or multiprocessing.cpu_count()
+        chunks = [c for c in np.array_split(phases, min(workers, n_frames)) if len(c) > 0]
+        tasks = [(m.p[0], m.p[1], triangles, z_faces, c, figsize, dpi, vmax) for c in chunks]
+        if len(tasks) == 1:
+            blocks = [_render_phase_frames(tasks[0])]
+        else:
+            with multiprocessing.Pool(len(tasks)) as pool:
+                blocks = pool.map(_render_phase_frames, tasks)
+        frames = [frame for block in blocks for frame in block]
+
+        if filename.endswith('.mp4'):
+            import subprocess
+
+            h, w = frames[0].shape[:2]
+            proc = subprocess.Popen(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'rawvideo', '-pix_fmt', 'rgb24',
+                                     '-s', f'{w}x{h}', '-r', str(fps), '-i', '-',
+                                     '-vf', 'pad=ceil(iw/2)*2:ceil(ih/2)*2', '-pix_fmt', 'yuv420p', filename],
+                                    stdin=subprocess.PIPE)
+            for frame in frames:
+                proc.stdin.write(frame.tobytes())
+            proc.stdin.close()
+            if proc.wait() != 0:
+                raise RuntimeError(f'ffmpeg failed writing {filename}')
+        else:
+            from PIL import Image
+
+            images = [Image.fromarray(frame) for frame in frames]
+            images[0].save(filename, save_all=True, append_images=images[1:], duration=int(1000 / fps), loop=0)
+        return filename
 
-        if not os.path.exists('video'):
-            os.mkdir('video')
 
-        for i in range(n_frames):
-            plot(self.basis, np.real(
-                field * np.exp(1j * i / n_frames * 2 * np.pi)), figsize=(6, 6))
-            mplt.tight_layout()
-            mplt.savefig(f'./video/frame_{i:02d}.png', dpi=300)
-            mplt.close()
+def _render_phase_frames(args) -> list:
+    # worker for Helmholtz.create_gif: one Agg figure, only the colour array changes per frame
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    import matplotlib.pyplot as mplt
 
-        os.chdir('video')
-        # subprocess.call(['ffmpeg', '-framerate', '8', '-i', 'frame_%02d.png', '-r', '30', '-pix_fmt', 'yuv420p', 'video.mp4'])
+    x, y, triangles, z_faces, phases, figsize, dpi, vmax = args
+    fig = Figure(figsize=figsize, dpi=dpi)
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot(111)
+    ax.set_aspect(1)
+    ax.set_axis_off()
+    im = ax.tripcolor(x, y, triangles, facecolors=np.real(z_faces), cmap=mplt.cm.jet, vmin=-vmax, vmax=vmax)
+    fig.tight_layout()
 
-        # convert from ImageMagick
-        subprocess.call(['convert', '-loop', '0', 'frame_*.png', 'video.gif'])
+    frames = []
+    for phi in phases:
+        im.set_array(np.real(z_faces * np.exp(1j * phi)))
+        canvas.draw()
+        frames.append(np.asarray(canvas.buffer_rgba())[:, :, :3].copy())
+    return frames
 
 
 if __name__ == '__main__':
@@ -668,6 +975,19 @@ if __name__ == '__main__':
                                    'bound_xmax': 0})
     fem.solve()
 
+    # frequency sweep: one assembly, one factorization per k0
+    k0_sweep = np.linspace(0.4, 0.6, 5)
+    phi_sweep = fem.solve_sweep(k0_sweep,
+                                alpha={'air': 1 / mu_air, 'plastic': 1 / mu_plastic},
+                                beta=lambda k: {'air': -1 * k ** 2 * eps_air, 'plastic': -1 * k ** 2 * eps_plastic},
+                                gamma=lambda k: {'bound_xmin': 1 / mu_plastic * 1j * k,
+                                                 'bound_xmax': 1 / mu_plastic * 1j * k},
+                                q=lambda k: {'bound_xmin': 1 / mu_plastic * 2j * k})
+    print(f'sweep assembly: {fem.timing["assembly"]:.3f} s')
+    for k, t_fac, t_sol in zip(k0_sweep, fem.timing['factorize'], fem.timing['solve']):
+        print(f'k0 = {k:.3f}: factorize {t_fac:.3f} s, solve {t_sol:.3f} s')
+    fem.solve()
+
     x_bound_xmin, y_bound_xmin = fem.basis.doflocs[:, fem.basis.get_dofs(
         'bound_xmin')]
     from skfem.visuals.matplotlib import plot
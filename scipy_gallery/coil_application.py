@@ -11,11 +11,12 @@ and a full-blown example of what you might want to do
 """
 
 import numpy as np
-from scipy import linalg, special
 from traits.api import HasTraits, Array, CFloat, Str, List, Instance, on_trait_change
 from traitsui.api import Item, View, HGroup, ListEditor, HSplit, VSplit, spring
 from mayavi.core.ui.api import EngineView, MlabSceneModel, SceneEditor
 
+from loop_field import B_field_coils
+
 ##############################################################################
 # A current loop
 
@@ -105,46 +106,10 @@ class Loop(HasTraits):
         (mu I) / (2 pi d) 
         for I in amps and d in meters and mu = 4 pi * 10^-7 we get Tesla 
         """
-        # Translate the coordinates in the coil's frame
-        n, l, m = self.base_vectors()
-        R = self.radius
-        r0 = self.position
-        r = np.c_[np.ravel(self.app.X), np.ravel(self.app.Y),
-                  np.ravel(self.app.Z)]
-
-        # transformation matrix coil frame to lab frame
-        trans = np.vstack((l, m, n))
-
-        r -= r0  # point location from center of coil
-        r = np.dot(r, linalg.inv(trans))  # transform vector to coil frame
-
-        # calculate field
-
-        # express the coordinates in polar form
-        x = r[:, 0]
-        y = r[:, 1]
-        z = r[:, 2]
-        rho = np.sqrt(x**2 + y**2)
-        theta = np.arctan(x / y)
-
-        E = special.ellipe((4 * R * rho) / ((R + rho)**2 + z**2))
-        K = special.ellipk((4 * R * rho) / ((R + rho)**2 + z**2))
-        Bz = 1 / np.sqrt((R + rho)**2 + z**2) * (
-            K
-            + E * (R**2 - rho**2 - z**2) / ((R - rho)**2 + z**2)
-        )
-        Brho = z / (rho * np.sqrt((R + rho)**2 + z**2)) * (
-            -K
-            + E * (R**2 + rho**2 + z**2) / ((R - rho)**2 + z**2)
-        )
-        # On the axis of the coil we get a divided by zero here. This returns a
-        # NaN, where the field is actually zero :
-        Brho[np.isnan(Brho)] = 0
-
-        B = np.c_[np.cos(theta) * Brho, np.sin(theta) * Brho, Bz]
-
-        # Rotate the field back in the lab's frame
-        B = np.dot(B, trans)
+        # blocks of grid points, evaluated by a pool of threads
+        B = B_field_coils(np.c_[np.ravel(self.app.X), np.ravel(self.app.Y),
+                                np.ravel(self.app.Z)],
+                          self.direction, self.position, self.radius)
 
         Bx, By, Bz = B.T
         Bx = np.reshape(Bx, self.app.X.shape)
@@ -7,7 +7,8 @@ coils.
 """
 
 import numpy as np
-from scipy import special, linalg
+
+from loop_field import B_field_coils
 
 ##############################################################################
 # Function to caculate the field of a loop
@@ -52,50 +53,7 @@ def B_field(r, n, r0, R):
     (mu I) / (2 pi d)
     for I in amps and d in meters and mu = 4 pi * 10^-7 we get Tesla
     """
-    # Translate the coordinates in the coil's frame
-    n, l, m = base_vectors(n)
-
-    # transformation matrix coil frame to lab frame
-    trans = np.vstack((l, m, n))
-    # transformation matrix to lab frame to coil frame
-    inv_trans = linalg.inv(trans)
-
-    r = r - r0  # point location from center of coil
-    r = np.dot(r, inv_trans)  # transform vector to coil frame
-
-    # calculate field
-
-    # express the coordinates in polar form
-    x = r[:, 0]
-    y = r[:, 1]
-    z = r[:, 2]
-    rho = np.sqrt(x**2 + y**2)
-    theta = np.arctan(x / y)
-    # NaNs are generated where y is zero.
-    theta[y == 0] = np.pi / 2
-
-    E = special.ellipe((4 * R * rho) / ((R + rho)**2 + z**2))
-    K = special.ellipk((4 * R * rho) / ((R + rho)**2 + z**2))
-    dist = ((R - rho)**2 + z**2)
-    Bz = 1 / np.sqrt((R + rho)**2 + z**2) * (
-        K
-        + E * (R**2 - rho**2 - z**2) / dist
-    )
-    Brho = z / (rho * np.sqrt((R + rho)**2 + z**2)) * (
-        -K
-        + E * (R**2 + rho**2 + z**2) / dist
-    )
-    # On the axis of the coil we get a divided by zero here. This returns a
-    # NaN, where the field is actually zero :
-    Brho[dist == 0] = 0
-    Brho[rho == 0] = 0
-    Bz[dist == 0] = 0
-
-    B = np.c_[np.cos(theta) * Brho, np.sin(theta) * Brho, Bz]
-
-    # Rotate the field back in the lab's frame
-    B = np.dot(B, trans)
-    return B
+    return B_field_coils(r, n, r0, np.r_[R])
 
 
 ##############################################################################
@@ -128,11 +86,6 @@ n = np.vstack((n, n))	    # Helmoltz like configuration
 
 ##############################################################################
 # Calculate field
-# First initialize a container matrix for the field vector :
-B = np.zeros_like(r)
-# Then loop through the different coils and sum the fields :
-for this_n, this_r0, this_R in zip(n, r0, R):
-    this_n = np.array(this_n)
-    this_r0 = np.array(this_r0)
-    this_R = np.array(this_R)
-    B += B_field(r, this_n, this_r0, this_R)
+# All the coils at once, the points are split in blocks between threads
+# and the field of every coil is added in place :
+B = B_field_coils(r, n, r0, R)
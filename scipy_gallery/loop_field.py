@@ -0,0 +1,152 @@
+"""
+Field of a set of current loops
+===============================
+
+Batched evaluation of the loop field of compute_field.B_field for many
+coils: the points are split in blocks evaluated by a pool of threads, the
+field of every coil is added in place, and the field on a regular grid can
+be cached as an interpolator for repeated queries.
+"""
+
+import os
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from scipy import special, interpolate
+
+
+def coil_frames(n):
+    """ Returns the (m, 3, 3) coil to lab frame matrices (rows l, m, n) of
+    the normals n (m, 3), the same base as base_vectors.
+    """
+    n = np.asarray(n, dtype=float).reshape(-1, 3)
+    n = n / np.sqrt(np.square(n).sum(axis=-1))[:, None]
+    l = np.c_[np.zeros(len(n)), n[:, 2], -n[:, 1]]
+    on_x = np.abs(n[:, 0]) == 1
+    l[on_x] = np.c_[n[on_x, 2], np.zeros(on_x.sum()), -n[on_x, 0]]
+    l = l / np.sqrt(np.square(l).sum(axis=-1))[:, None]
+    m = np.cross(n, l)
+    return np.stack((l, m, n), axis=1)
+
+
+def _coils_block(r, frames, r0, R, out):
+    """ Adds the field of all the coils at the points r (k, 3) to out.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for trans, c, a in zip(frames, r0, R):
+            # point location in the coil frame
+            x, y, z = np.dot(r - c, trans.T).T
+            rho2 = x**2 + y**2
+            rho = np.sqrt(rho2)
+            z2 = z**2
+            s = (a + rho)**2 + z2
+            dist = (a - rho)**2 + z2
+            # the elliptic integrals, once per coil and block
+            k2 = 4 * a * rho / s
+            K = special.ellipk(k2)
+            E = special.ellipe(k2)
+            sq = np.sqrt(s)
+            Bz = (K + E * (a**2 - rho2 - z2) / dist) / sq
+            # Brho / rho, the radial unit vector is (x, y) / rho
+            Brho = z / (rho2 * sq) * (-K + E * (a**2 + rho2 + z2) / dist)
+            # On the axis and on the wire the expressions are 0 / 0
+            Brho[(dist == 0) | (rho == 0)] = 0
+            Bz[dist == 0] = 0
+            out += np.outer(x * Brho, trans[0])
+            out += np.outer(y * Brho, trans[1])
+            out += np.outer(Bz, trans[2])
+    return out
+
+
+def B_field_coils(r, n, r0, R, chunk=32768, workers=None, out=None):
+    """
+    returns the magnetic field of a set of current loops, same formulas and
+    units as B_field.
+
+    Parameters
+    ----------
+        r is the (k, 3) array of points where the field is evaluated
+        n, r0 are the (m, 3) normals and centers of the loops
+        R is the (m,) array of radii
+        chunk is the number of points evaluated at once, it bounds the
+            size of the temporaries to a few chunk-sized arrays per thread
+        workers is the number of threads (default: cpu count), the blocks
+            of points are split between them
+        out, if given, is a (k, 3) array the field is added to
+
+    Returns
+    -------
+        B is the (k, 3) field summed over the loops
+    """
+    r = np.asarray(r, dtype=float).reshape(-1, 3)
+    frames = coil_frames(n)
+    r0 = np.asarray(r0, dtype=float).reshape(-1, 3)
+    R = np.asarray(R, dtype=float).ravel()
+    if out is None:
+        out = np.zeros_like(r)
+
+    def block(start):
+        _coils_block(r[start:start + chunk], frames, r0, R,
+                     out[start:start + chunk])
+
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        list(pool.map(block, range(0, len(r), chunk)))
+    return out
+
+
+def B_field_grid(x, y, z, n, r0, R, chunk=32768, workers=None,
+                 dtype=np.float64):
+    """
+    returns the (nx, ny, nz, 3) field of the loops on the grid x, y, z
+    (1D axes), see B_field_coils. The points are generated block by block,
+    the full (nx * ny * nz, 3) array of positions is never built.
+    """
+    x, y, z = (np.asarray(a, dtype=float) for a in (x, y, z))
+    shape = (len(x), len(y), len(z))
+    B = np.zeros(shape + (3,), dtype=dtype)
+    flat = B.reshape(-1, 3)
+    frames = coil_frames(n)
+    r0 = np.asarray(r0, dtype=float).reshape(-1, 3)
+    R = np.asarray(R, dtype=float).ravel()
+
+    def block(start):
+        i, j, k = np.unravel_index(
+            np.arange(start, min(start + chunk, len(flat))), shape)
+        r = np.c_[x[i], y[j], z[k]]
+        flat[start:start + chunk] += _coils_block(r, frames, r0, R,
+                                                  np.zeros_like(r))
+
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        list(pool.map(block, range(0, len(flat), chunk)))
+    return B
+
+
+# interpolators of B_field_grid, keyed on the grid and the coils (LRU)
+field_interpolator_cache = OrderedDict()
+field_interpolator_cache_size = 4
+
+
+def field_interpolator(x, y, z, n, r0, R, **kwargs):
+    """
+    returns a RegularGridInterpolator of B_field_grid(x, y, z, n, r0, R),
+    called with (k, 3) points it gives the (k, 3) field. Repeated queries
+    on the same grid and coils reuse the cached field.
+    """
+    h = hashlib.sha1()
+    for a in (x, y, z, n, r0, R):
+        a = np.ascontiguousarray(a, dtype=float)
+        h.update(str(a.shape).encode())
+        h.update(a.tobytes())
+    key = h.hexdigest()
+    if key in field_interpolator_cache:
+        field_interpolator_cache.move_to_end(key)
+        return field_interpolator_cache[key]
+
+    B = B_field_grid(x, y, z, n, r0, R, **kwargs)
+    interp = interpolate.RegularGridInterpolator((x, y, z), B)
+    field_interpolator_cache[key] = interp
+    if len(field_interpolator_cache) > field_interpolator_cache_size:
+        field_interpolator_cache.popitem(last=False)
+    return interp
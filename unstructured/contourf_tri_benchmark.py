@@ -0,0 +1,33 @@
+"""
+===========================
+plot2d.contourf_tri timing
+===========================
+
+Mesh images of plot2d.contourf_tri drawn with one Line2D per triangle
+(collection=False) against the unique edge set as a LineCollection
+(collection=True, default).
+"""
+import numpy as np
+import matplotlib.pyplot as plt
+import sys
+import os
+import time
+
+sys.path.append(os.path.join("../"))
+from base import plot2d
+
+if __name__ == '__main__':
+    obj = plot2d(aspect="equal")
+    for num in [250, 1000, 4000]:
+        np.random.seed(1)
+        x = np.random.uniform(-1, 1, num)
+        y = np.random.uniform(-1, 1, num)
+        z = (1 - x / 2 + x**5 + y**3) * np.exp(-x**2 - y**2)
+        for collection in [False, True]:
+            name = "contourf_tri_{:d}_{}.png".format(num, collection)
+            t0 = time.perf_counter()
+            obj.contourf_tri(x, y, z, pngname=obj.tmpdir + name,
+                             collection=collection)
+            print(num, "collection" if collection else "per triangle",
+                  "{:.2f}s".format(time.perf_counter() - t0))
+            plt.close("all")